@@ -3,42 +3,55 @@ Citas V2 API OAuth2
 """
 from datetime import timedelta
 
-from fastapi import Depends, FastAPI, HTTPException, status
+from anyio import to_thread
+from fastapi import Depends, FastAPI, Header, HTTPException, Request, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import OAuth2PasswordRequestForm
 from fastapi_pagination import add_pagination
 from sqlalchemy.orm import Session
 
-from config.settings import ACCESS_TOKEN_EXPIRE_MINUTES, ORIGINS
-from lib.database import get_db
+from config.settings import (
+    ACCESS_TOKEN_EXPIRE_MINUTES,
+    CONSULTAS_SQL_ENCABEZADOS,
+    CONSULTAS_SQL_REPETIDAS,
+    DB_ASINCRONA_RUTAS,
+    METRICAS_TOKEN,
+    ORIGINS,
+    RUTAS_HILOS,
+)
+from lib.catalogos import catalogos
+from lib.consultas_sql import avisar_repetidas, contar_consultas
+from lib.database import get_db, pool_estadisticas
+from lib.passwords import ejecutor_contrasenas
 
 from citas_cliente.v2.autoridades.paths import autoridades as autoridades_v2
-from citas_cliente.v2.cit_citas.paths import cit_citas_v2
+from citas_cliente.v2.cit_citas.paths import cit_citas_v2, cit_citas_v2_asincrono
 from citas_cliente.v2.cit_clientes.paths import cit_clientes_v2
 from citas_cliente.v2.cit_clientes_recuperaciones.paths import cit_clientes_recuperaciones_v2
 from citas_cliente.v2.cit_clientes_registros.paths import cit_clientes_registros_v2
-from citas_cliente.v2.cit_dias_disponibles.paths import cit_dias_disponibles_v2
+from citas_cliente.v2.cit_dias_disponibles.paths import cit_dias_disponibles_v2, cit_dias_disponibles_v2_asincrono
+from citas_cliente.v2.cit_disponibilidad.paths import cit_disponibilidad_v2
 from citas_cliente.v2.cit_horas_disponibles.paths import cit_horas_disponibles_v2
-from citas_cliente.v2.cit_oficinas_servicios.paths import cit_oficinas_servicios_v2
+from citas_cliente.v2.cit_oficinas_servicios.paths import cit_oficinas_servicios_v2, cit_oficinas_servicios_v2_asincrono
 from citas_cliente.v2.cit_servicios.paths import cit_servicios_v2
 from citas_cliente.v2.distritos.paths import distritos as distritos_v2
 from citas_cliente.v2.domicilios.paths import domicilios_v2
 from citas_cliente.v2.enc_servicios.paths import enc_servicios_v2
 from citas_cliente.v2.enc_sistemas.paths import enc_sistemas_v2
 from citas_cliente.v2.materias.paths import materias_v2
-from citas_cliente.v2.oficinas.paths import oficinas_v2
+from citas_cliente.v2.oficinas.paths import oficinas_v2, oficinas_v2_asincrono
 
-from citas_cliente.v3.autoridades.paths import autoridades as autoridades_v3
-from citas_cliente.v3.distritos.paths import distritos as distritos_v3
-from citas_cliente.v3.municipios.paths import municipios as municipios_v3
+from citas_cliente.v3.autoridades.paths import autoridades as autoridades_v3, autoridades_asincrono as autoridades_v3_asincrono
+from citas_cliente.v3.distritos.paths import distritos as distritos_v3, distritos_asincrono as distritos_v3_asincrono
+from citas_cliente.v3.municipios.paths import municipios as municipios_v3, municipios_asincrono as municipios_v3_asincrono
 from citas_cliente.v3.pag_pagos.paths import pag_pagos as pag_pagos_v3
 from citas_cliente.v3.pag_tramites_servicios.paths import pag_tramites_servicios as pag_tramites_servicios_v3
 from citas_cliente.v3.ppa_solicitudes.paths import ppa_solicitudes as ppa_solicitudes_v3
 from citas_cliente.v3.tdt_partidos.paths import tdt_partidos as tdt_partidos_v3
 from citas_cliente.v3.tdt_solicitudes.paths import tdt_solicitudes as tdt_solicitudes_v3
 
-from citas_cliente.v2.cit_clientes.authentications import authenticate_user, create_access_token, get_current_active_user
-from citas_cliente.v2.cit_clientes.schemas import Token, CitClienteInDB
+from citas_cliente.v2.cit_clientes.authentications import authenticate_user, create_cit_cliente_access_token, get_cit_cliente, get_current_active_user
+from citas_cliente.v2.cit_clientes.schemas import Token, CitClienteInDB, CitClienteSesion
 
 # FastAPI
 app = FastAPI(
@@ -55,6 +68,37 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Contar las sentencias SQL de cada peticion, para encontrar las rutas con N+1
+if CONSULTAS_SQL_ENCABEZADOS or CONSULTAS_SQL_REPETIDAS > 0:
+
+    @app.middleware("http")
+    async def consultas_sql(request: Request, call_next):
+        """Agregar los encabezados con la cantidad y el tiempo de las sentencias SQL, y avisar de las repetidas"""
+        with contar_consultas() as contador:
+            response = await call_next(request)
+        if CONSULTAS_SQL_ENCABEZADOS:
+            response.headers["X-Consultas-SQL"] = str(contador.consultas)
+            response.headers["X-Consultas-SQL-Ms"] = str(contador.milisegundos)
+        if CONSULTAS_SQL_REPETIDAS > 0:
+            avisar_repetidas(contador, request.url.path, CONSULTAS_SQL_REPETIDAS)
+        return response
+
+
+# Paths asincronos, se incluyen antes de los sincronos para que atiendan sus mismas rutas
+PATHS_ASINCRONOS = {
+    "v2/cit_citas": cit_citas_v2_asincrono,
+    "v2/cit_dias_disponibles": cit_dias_disponibles_v2_asincrono,
+    "v2/cit_oficinas_servicios": cit_oficinas_servicios_v2_asincrono,
+    "v2/oficinas": oficinas_v2_asincrono,
+    "v3/autoridades": autoridades_v3_asincrono,
+    "v3/distritos": distritos_v3_asincrono,
+    "v3/municipios": municipios_v3_asincrono,
+}
+for ruta in DB_ASINCRONA_RUTAS:
+    if ruta not in PATHS_ASINCRONOS:
+        raise ValueError(f"No hay rutas asincronas para {ruta} en DB_ASINCRONA_RUTAS")
+    app.include_router(PATHS_ASINCRONOS[ruta])
+
 # Paths V2
 app.include_router(autoridades_v2)
 app.include_router(distritos_v2)
@@ -63,6 +107,7 @@ app.include_router(cit_clientes_v2)
 app.include_router(cit_clientes_recuperaciones_v2)
 app.include_router(cit_clientes_registros_v2)
 app.include_router(cit_dias_disponibles_v2)
+app.include_router(cit_disponibilidad_v2)
 app.include_router(cit_horas_disponibles_v2)
 app.include_router(cit_oficinas_servicios_v2)
 app.include_router(cit_servicios_v2)
@@ -86,6 +131,18 @@ app.include_router(tdt_solicitudes_v3)
 add_pagination(app)
 
 
+@app.on_event("startup")
+async def limitar_hilos():
+    """Las rutas sincronas se ejecutan en los hilos de anyio, limitar cuantos hay por proceso"""
+    to_thread.current_default_thread_limiter().total_tokens = RUTAS_HILOS
+
+
+@app.on_event("startup")
+async def suscribir_catalogos():
+    """Los avisos de los catalogos se reciben en el fondo, la suscripcion se hace aqui y no en las peticiones"""
+    catalogos.iniciar()
+
+
 @app.get("/")
 async def root():
     """Mensaje de Bienvenida"""
@@ -94,7 +151,7 @@ async def root():
 
 @app.post("/token", response_model=Token)
 @app.post("/v2/token", response_model=Token)
-async def ingresar_para_solicitar_token(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
+def ingresar_para_solicitar_token(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
     """Entregar el token como un JSON"""
     cit_cliente = authenticate_user(form_data.username, form_data.password, db)
     if not cit_cliente:
@@ -104,12 +161,35 @@ async def ingresar_para_solicitar_token(form_data: OAuth2PasswordRequestForm = D
             headers={"WWW-Authenticate": "Bearer"},
         )
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    access_token = create_access_token(data={"sub": cit_cliente.username}, expires_delta=access_token_expires)
+    access_token = create_cit_cliente_access_token(db, cit_cliente, expires_delta=access_token_expires)
     return {"access_token": access_token, "token_type": "bearer", "username": cit_cliente.username}
 
 
 @app.get("/profile", response_model=CitClienteInDB)
 @app.get("/v2/profile", response_model=CitClienteInDB)
-async def mi_perfil(current_user: CitClienteInDB = Depends(get_current_active_user)):
+def mi_perfil(current_user: CitClienteSesion = Depends(get_current_active_user), db: Session = Depends(get_db)):
     """Mostrar el perfil del cliente"""
-    return current_user
+    if isinstance(current_user, CitClienteInDB):
+        return current_user
+    # Con el token autocontenido no se tienen todos los datos, se consultan
+    cit_cliente = get_cit_cliente(current_user.username, db)
+    if cit_cliente is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return cit_cliente
+
+
+@app.get("/metricas")
+async def metricas(x_metricas_token: str = Header(default="")):
+    """Metricas internas del proceso, requiere el encabezado X-Metricas-Token"""
+    if METRICAS_TOKEN == "" or x_metricas_token != METRICAS_TOKEN:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not found")
+    limitador = to_thread.current_default_thread_limiter()
+    return {
+        "contrasenas": ejecutor_contrasenas.estadisticas(),
+        "pool": pool_estadisticas(),
+        "rutas": {"hilos": limitador.total_tokens, "ocupados": limitador.borrowed_tokens},
+    }
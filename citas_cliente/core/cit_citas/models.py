@@ -4,7 +4,7 @@ Cit Citas, modelos
 from collections import OrderedDict
 from datetime import datetime
 
-from sqlalchemy import Boolean, Column, DateTime, Enum, ForeignKey, Integer, String, Text
+from sqlalchemy import Boolean, Column, DateTime, Enum, ForeignKey, Index, Integer, String, Text
 from sqlalchemy.orm import relationship
 
 from config.settings import LOCAL_HUSO_HORARIO
@@ -27,6 +27,17 @@ class CitCita(Base, UniversalMixin):
     # Nombre de la tabla
     __tablename__ = "cit_citas"
 
+    # Indice compuesto y parcial para las consultas de citas pendientes por cliente
+    # Las citas ocupadas por oficina y hora se leen de cit_slots_ocupacion, no necesitan indice en esta tabla
+    __table_args__ = (
+        Index(
+            "cit_citas_cit_cliente_id_inicio_pendientes_idx",
+            "cit_cliente_id",
+            "inicio",
+            postgresql_where="estatus = 'A' AND estado = 'PENDIENTE'",
+        ),
+    )
+
     # Clave primaria
     id = Column(Integer, primary_key=True)
 
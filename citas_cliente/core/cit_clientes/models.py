@@ -12,6 +12,25 @@ from lib.universal_mixin import UniversalMixin
 class CitCliente(Base, UniversalMixin):
     """CitCliente"""
 
+    # Los permisos son fijos para todos los clientes, donde 1 es solo lectura
+    # En el token autocontenido se codifican en este orden, agregue los nuevos al final
+    PERMISOS = {
+        "AUTORIDADES": 1,
+        "CIT CITAS": 3,
+        "CIT DIAS DISPONIBLES": 1,
+        "CIT HORAS DISPONIBLES": 1,
+        "CIT OFICINAS SERVICIOS": 1,
+        "CIT SERVICIOS": 1,
+        "DISTRITOS": 1,
+        "DOMICILIOS": 1,
+        "ENC SERVICIOS": 2,
+        "ENC SISTEMAS": 2,
+        "MATERIAS": 1,
+        "PAG PAGOS": 3,
+        "PAG TRAMITES SERVICIOS": 1,
+        "OFICINAS": 1,
+    }
+
     # Nombre de la tabla
     __tablename__ = "cit_clientes"
 
@@ -58,23 +77,7 @@ class CitCliente(Base, UniversalMixin):
         """Entrega un diccionario con todos los permisos si no ha llegado la fecha de renovación"""
         if self.renovacion < datetime.now().date():
             return {}
-        # Los permisos son fijos para todos los clientes, donde 1 es solo lectura
-        return {
-            "AUTORIDADES": 1,
-            "CIT CITAS": 3,
-            "CIT DIAS DISPONIBLES": 1,
-            "CIT HORAS DISPONIBLES": 1,
-            "CIT OFICINAS SERVICIOS": 1,
-            "CIT SERVICIOS": 1,
-            "DISTRITOS": 1,
-            "DOMICILIOS": 1,
-            "ENC SERVICIOS": 2,
-            "ENC SISTEMAS": 2,
-            "MATERIAS": 1,
-            "PAG PAGOS": 3,
-            "PAG TRAMITES SERVICIOS": 1,
-            "OFICINAS": 1,
-        }
+        return dict(self.PERMISOS)
 
     def __repr__(self):
         """Representación"""
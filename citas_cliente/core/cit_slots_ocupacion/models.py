@@ -0,0 +1,59 @@
+"""
+Cit Slots Ocupacion, modelos
+"""
+from sqlalchemy import DDL, Column, DateTime, ForeignKey, Integer, event
+
+from lib.database import Base
+
+from ..cit_citas.models import CitCita
+
+
+class CitSlotOcupacion(Base):
+    """CitSlotOcupacion, contador de las citas no canceladas por oficina y tiempo de inicio"""
+
+    # Nombre de la tabla
+    __tablename__ = "cit_slots_ocupacion"
+
+    # Clave primaria compuesta
+    oficina_id = Column(Integer, ForeignKey("oficinas.id"), primary_key=True)
+    inicio = Column(DateTime(), primary_key=True)
+
+    # Columnas
+    ocupados = Column(Integer(), nullable=False, default=0, server_default="0")
+
+    def __repr__(self):
+        """Representación"""
+        return f"<CitSlotOcupacion {self.oficina_id} {self.inicio} {self.ocupados}>"
+
+
+# Los contadores los mantiene un disparador en cit_citas, asi tambien cuentan los cambios del sistema administrativo
+# Cuenta las citas activas que no estan canceladas, igual que rebuild_cit_slots_ocupacion
+CIT_SLOTS_OCUPACION_FUNCION = DDL(
+    """
+CREATE OR REPLACE FUNCTION cit_slots_ocupacion_sincronizar() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') AND OLD.estado <> 'CANCELO' AND OLD.estatus = 'A' THEN
+        UPDATE cit_slots_ocupacion SET ocupados = ocupados - 1
+        WHERE oficina_id = OLD.oficina_id AND inicio = OLD.inicio AND ocupados > 0;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.estado <> 'CANCELO' AND NEW.estatus = 'A' THEN
+        INSERT INTO cit_slots_ocupacion (oficina_id, inicio, ocupados) VALUES (NEW.oficina_id, NEW.inicio, 1)
+        ON CONFLICT (oficina_id, inicio) DO UPDATE SET ocupados = cit_slots_ocupacion.ocupados + 1;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql
+"""
+)
+CIT_SLOTS_OCUPACION_DISPARADOR = DDL(
+    """
+DROP TRIGGER IF EXISTS cit_citas_ocupacion ON cit_citas;
+CREATE TRIGGER cit_citas_ocupacion
+AFTER INSERT OR DELETE OR UPDATE OF oficina_id, inicio, estado, estatus ON cit_citas
+FOR EACH ROW EXECUTE FUNCTION cit_slots_ocupacion_sincronizar()
+"""
+)
+
+# Con create_all se crea el disparador junto con la tabla de las citas, en una base de datos existente lo crea reconciliar.py
+event.listen(CitCita.__table__, "after_create", CIT_SLOTS_OCUPACION_FUNCION.execute_if(dialect="postgresql"))
+event.listen(CitCita.__table__, "after_create", CIT_SLOTS_OCUPACION_DISPARADOR.execute_if(dialect="postgresql"))
@@ -2,7 +2,7 @@
 Autoridades V2, CRUD (create, read, update, and delete)
 """
 from typing import Any
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, joinedload
 
 from lib.safe_string import safe_clave, safe_string
 
@@ -18,8 +18,8 @@ def get_autoridades(
     organo_jurisdiccional: str = None,
     son_notarias: bool = False,
 ) -> Any:
-    """Consultar las autoridades jurisdiccionales activas"""
-    consulta = db.query(Autoridad).filter_by(es_jurisdiccional=True)
+    """Consultar las autoridades jurisdiccionales activas, con el distrito y la materia que entrega AutoridadOut"""
+    consulta = db.query(Autoridad).options(joinedload(Autoridad.distrito), joinedload(Autoridad.materia)).filter_by(es_jurisdiccional=True)
     if distrito_id:
         distrito = get_distrito(db, distrito_id)
         consulta = consulta.filter(Autoridad.distrito == distrito)
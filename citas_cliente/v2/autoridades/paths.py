@@ -2,15 +2,15 @@
 Autoridades V2, rutas (paths)
 """
 from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi_pagination.ext.sqlalchemy import paginate
 from sqlalchemy.orm import Session
 
-from lib.database import get_db
+from lib.database import get_db_replica
 from lib.fastapi_pagination import LimitOffsetPage
+from lib.fastapi_pagination_totales import paginate
 
 from ...core.permisos.models import Permiso
 from ..cit_clientes.authentications import get_current_active_user
-from ..cit_clientes.schemas import CitClienteInDB
+from ..cit_clientes.schemas import CitClienteSesion
 
 from .crud import get_autoridad, get_autoridades
 from .schemas import AutoridadOut
@@ -19,11 +19,11 @@ autoridades = APIRouter(prefix="/v2/autoridades", tags=["autoridades"])
 
 
 @autoridades.get("", response_model=LimitOffsetPage[AutoridadOut])
-async def listado_autoridades(
+def listado_autoridades(
     distrito_id: int = None,
     materia_id: int = None,
-    current_user: CitClienteInDB = Depends(get_current_active_user),
-    db: Session = Depends(get_db),
+    current_user: CitClienteSesion = Depends(get_current_active_user),
+    db: Session = Depends(get_db_replica),
 ):
     """Listado de autoridades"""
     if "AUTORIDADES" not in current_user.permissions or current_user.permissions["AUTORIDADES"] < Permiso.VER:
@@ -42,10 +42,10 @@ async def listado_autoridades(
 
 
 @autoridades.get("/{autoridad_id}", response_model=AutoridadOut)
-async def detalle_autoridad(
+def detalle_autoridad(
     autoridad_id: int,
-    current_user: CitClienteInDB = Depends(get_current_active_user),
-    db: Session = Depends(get_db),
+    current_user: CitClienteSesion = Depends(get_current_active_user),
+    db: Session = Depends(get_db_replica),
 ):
     """Detalle de una autoridad a partir de su id"""
     if "AUTORIDADES" not in current_user.permissions or current_user.permissions["AUTORIDADES"] < Permiso.VER:
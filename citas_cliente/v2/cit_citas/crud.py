@@ -1,33 +1,41 @@
 """
 Cit Citas V2, CRUD (create, read, update, and delete)
 """
+from collections import Counter
 from datetime import date, datetime, time, timedelta
 from typing import Any
-from sqlalchemy.orm import Session
+from rq import Queue
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, joinedload
 
 from config.settings import LIMITE_CITAS_PENDIENTES
+from lib.database import marcar_escritura
 from lib.pwgen import generar_codigo_asistencia
 from lib.safe_string import safe_string
 from lib.redis import task_queue
 
 from ...core.cit_citas.models import CitCita
-from ..cit_citas_anonimas.crud import get_cit_citas_anonimas
-from ..cit_clientes.crud import get_cit_cliente
+from ..cit_citas_anonimas.crud import lock_cit_slot
+from ..cit_clientes.crud import get_cit_cliente, get_cit_cliente_async
 from ..cit_dias_disponibles.crud import get_cit_dias_disponibles
-from ..cit_dias_inhabiles.crud import get_cit_dias_inhabiles
-from ..cit_horas_disponibles.crud import get_cit_horas_disponibles
+from ..cit_dias_inhabiles.calendario import calendario_dias_inhabiles
+from ..cit_horas_bloqueadas.crud import get_horas_bloquedas
+from ..cit_horas_disponibles.crud import calcular_cit_horas_disponibles, invalidate_cit_horas_disponibles
 from ..cit_oficinas_servicios.crud import get_cit_oficinas_servicios
 from ..cit_servicios.crud import get_cit_servicio
 from ..oficinas.crud import get_oficina
-from .schemas import CitCitaOut
+from .schemas import CitCitaIn, CitCitaOut
+
+CANCELAR_ANTES_HORAS = 24
 
 
 def get_cit_citas(
     db: Session,
     cit_cliente_id: int,
 ) -> Any:
-    """Consultar las citas del cliente, desde hoy y con estado PENDIENTE"""
-    consulta = db.query(CitCita)
+    """Consultar las citas del cliente, desde hoy y con estado PENDIENTE, con el cliente, el servicio y la oficina que entrega CitCitaOut"""
+    consulta = db.query(CitCita).options(joinedload(CitCita.cit_cliente), joinedload(CitCita.cit_servicio), joinedload(CitCita.oficina))
 
     # Consultar el cliente
     cit_cliente = get_cit_cliente(db, cit_cliente_id=cit_cliente_id)
@@ -51,7 +59,26 @@ def get_cit_citas(
     consulta = consulta.filter_by(estado="PENDIENTE")
 
     # Entregar
-    return consulta.filter_by(estatus="A").order_by(CitCita.inicio)
+    return consulta.filter_by(estatus="A").order_by(CitCita.inicio, CitCita.id)
+
+
+async def get_cit_citas_async(
+    db: AsyncSession,
+    cit_cliente_id: int,
+) -> Any:
+    """Consultar las citas del cliente, desde hoy y con estado PENDIENTE, entrega la consulta para paginar de forma asincrona"""
+    consulta = select(CitCita).options(joinedload(CitCita.cit_cliente), joinedload(CitCita.cit_servicio), joinedload(CitCita.oficina))
+
+    # Consultar el cliente
+    cit_cliente = await get_cit_cliente_async(db, cit_cliente_id=cit_cliente_id)
+    consulta = consulta.filter(CitCita.cit_cliente_id == cit_cliente.id)
+
+    # Se consultan todas los citas desde hoy con estado PENDIENTE
+    desde_tiempo = datetime.combine(date.today(), time())
+    consulta = consulta.filter(CitCita.inicio >= desde_tiempo).filter_by(estado="PENDIENTE")
+
+    # Entregar
+    return consulta.filter_by(estatus="A").order_by(CitCita.inicio, CitCita.id)
 
 
 def get_cit_cita(db: Session, cit_cliente_id: int, cit_cita_id: int) -> CitCitaOut:
@@ -113,11 +140,15 @@ def cancel_cit_cita(
     if cit_cita.puede_cancelarse is False:
         raise ValueError("No se puede cancelar esta cita")
 
-    # Actualizar registro
+    # Actualizar registro, el disparador de cit_citas resta la cita al contador del tiempo en la oficina
     cit_cita.estado = "CANCELO"
     db.add(cit_cita)
     db.commit()
     db.refresh(cit_cita)
+    marcar_escritura(f"cit_cliente:{cit_cliente_id}")
+
+    # Invalidar las horas disponibles de la oficina en la fecha de la cita
+    invalidate_cit_horas_disponibles(oficina_id=cit_cita.oficina_id, fecha=cit_cita.inicio.date())
 
     # Agregar tarea en el fondo para que se envie un mensaje via correo electronico
     task_queue.enqueue(
@@ -129,92 +160,147 @@ def cancel_cit_cita(
     return cit_cita
 
 
-def create_cit_cita(
+def create_cit_citas(
     db: Session,
     cit_cliente_id: int,
-    oficina_id: int,
-    cit_servicio_id: int,
-    fecha: date,
-    hora_minuto: time,
-    nota: str,
-) -> CitCitaOut:
-    """Crear una cita"""
+    cit_citas_in: list,
+) -> list:
+    """Crear varias citas en una sola transaccion, si alguna no es valida no se crea ninguna"""
+
+    # Validar que haya citas
+    if len(cit_citas_in) == 0:
+        raise ValueError("No hay citas para crear")
 
     # Consultar y validar el cliente
     cit_cliente = get_cit_cliente(db, cit_cliente_id=cit_cliente_id)
 
-    # Consultar y validar la oficina
-    oficina = get_oficina(db, oficina_id=oficina_id)
-
-    # Consultar y validar el servicio
-    cit_servicio = get_cit_servicio(db, cit_servicio_id=cit_servicio_id)
-
-    # Validar que ese servicio lo ofrezca esta oficina
-    cit_oficinas_servicios = get_cit_oficinas_servicios(db, oficina_id=oficina_id).all()
-    if cit_servicio_id not in [cit_oficina_servicio.cit_servicio_id for cit_oficina_servicio in cit_oficinas_servicios]:
-        raise ValueError("No es posible agendar este servicio en esta oficina")
-
-    # Validar la fecha, debe ser un dia disponible
-    if fecha not in get_cit_dias_disponibles(db, oficina_id=oficina_id):
-        raise ValueError("No es valida la fecha")
-
-    # Validar la hora_minuto, respecto a las horas disponibles
-    if hora_minuto not in get_cit_horas_disponibles(db, oficina_id=oficina_id, cit_servicio_id=cit_servicio_id, fecha=fecha):
-        raise ValueError("No es valida la hora-minuto porque no esta disponible")
-
-    # Validar que las citas en ese tiempo para esa oficina NO hayan llegado al limite de personas
-    cit_citas_anonimas = get_cit_citas_anonimas(db, oficina_id=oficina_id, fecha=fecha, hora_minuto=hora_minuto)
-    if cit_citas_anonimas.count() >= oficina.limite_personas:
-        raise ValueError("No se puede crear la cita porque ya se alcanzo el limite de personas en la oficina")
-
-    # Validar que la cantidad de citas pendientes no haya llegado al limite de este cliente
-    if get_cit_citas_disponibles_cantidad(db, cit_cliente_id=cit_cliente_id) <= 0:
+    # Consultar una sola vez lo que comparten todas las citas
+    dias_disponibles = None
+    calendario = calendario_dias_inhabiles.cargar(db)
+    oficinas = {}
+    oficinas_servicios = {}
+    cit_horas_bloqueadas = {}
+    tiempos_pendientes = None
+
+    # Validar cada cita y definir su registro, sin agregarlo a la sesion todavia
+    cit_citas = []
+    for numero, cit_cita_in in enumerate(cit_citas_in, start=1):
+        try:
+            # Consultar y validar la oficina
+            oficina = get_oficina(db, oficina_id=cit_cita_in.oficina_id)
+            oficinas[oficina.id] = oficina
+
+            # Consultar y validar el servicio
+            cit_servicio = get_cit_servicio(db, cit_servicio_id=cit_cita_in.cit_servicio_id)
+
+            # Validar que ese servicio lo ofrezca esta oficina
+            if oficina.id not in oficinas_servicios:
+                oficinas_servicios[oficina.id] = {item.cit_servicio_id for item in get_cit_oficinas_servicios(db, oficina_id=oficina.id).enable_eagerloads(False).all()}
+            if cit_servicio.id not in oficinas_servicios[oficina.id]:
+                raise ValueError("No es posible agendar este servicio en esta oficina")
+
+            # Validar la fecha, debe ser un dia disponible
+            if dias_disponibles is None:
+                dias_disponibles = get_cit_dias_disponibles(db, oficina_id=oficina.id)
+            if cit_cita_in.fecha not in dias_disponibles:
+                raise ValueError("No es valida la fecha")
+
+            # Validar la hora_minuto con el horario y las horas bloqueadas de la base de datos, no con el cache de las horas disponibles
+            # El limite de personas se valida despues, al bloquear el contador de ese tiempo
+            if (oficina.id, cit_cita_in.fecha) not in cit_horas_bloqueadas:
+                cit_horas_bloqueadas[(oficina.id, cit_cita_in.fecha)] = get_horas_bloquedas(db, oficina_id=oficina.id, fecha=cit_cita_in.fecha).all()
+            horas_disponibles = calcular_cit_horas_disponibles(
+                oficina=oficina,
+                cit_servicio=cit_servicio,
+                fecha=cit_cita_in.fecha,
+                cit_horas_bloqueadas=cit_horas_bloqueadas[(oficina.id, cit_cita_in.fecha)],
+                citas_ya_agendadas={},
+            )
+            if cit_cita_in.hora_minuto not in horas_disponibles:
+                raise ValueError("No es valida la hora-minuto porque no esta disponible")
+
+            # Definir los tiempos de la cita
+            inicio_dt = datetime.combine(cit_cita_in.fecha, time(hour=cit_cita_in.hora_minuto.hour, minute=cit_cita_in.hora_minuto.minute))
+            termino_dt = inicio_dt + timedelta(hours=cit_servicio.duracion.hour, minutes=cit_servicio.duracion.minute)
+
+            # Validar que no tenga una cita pendiente, ni otra de este lote, en la misma fecha y hora
+            if tiempos_pendientes is None:
+                tiempos_pendientes = {item.inicio for item in get_cit_citas(db, cit_cliente_id=cit_cliente.id).enable_eagerloads(False).all()}
+            if inicio_dt in tiempos_pendientes:
+                raise ValueError("No se puede crear la cita porque ya tiene una cita pendiente en esta fecha y hora")
+            tiempos_pendientes.add(inicio_dt)
+
+        except (IndexError, ValueError) as error:
+            if len(cit_citas_in) == 1:
+                raise
+            raise type(error)(f"Cita {numero}: {str(error)}") from error
+
+        # Definir el registro, cancelar_antes es 24 horas antes de la cita, si es un dia inhabil, domingo o sabado, se cambia al dia habil anterior
+        cit_citas.append(
+            CitCita(
+                cit_servicio_id=cit_servicio.id,
+                cit_cliente_id=cit_cliente.id,
+                oficina_id=oficina.id,
+                inicio=inicio_dt,
+                termino=termino_dt,
+                notas=safe_string(input_str=cit_cita_in.notas, max_len=512),
+                estado="PENDIENTE",
+                asistencia=False,
+                codigo_asistencia=generar_codigo_asistencia(),
+                cancelar_antes=calendario.horas_antes_en_dia_habil(inicio_dt, CANCELAR_ANTES_HORAS),
+            )
+        )
+
+    # Validar que la cantidad de citas pendientes no llegue al limite de este cliente con todas las citas
+    if get_cit_citas_disponibles_cantidad(db, cit_cliente_id=cit_cliente.id) < len(cit_citas):
         raise ValueError("No se puede crear la cita porque ya se alcanzo el limite de citas pendientes")
 
-    # Definir los tiempos de la cita
-    inicio_dt = datetime(year=fecha.year, month=fecha.month, day=fecha.day, hour=hora_minuto.hour, minute=hora_minuto.minute)
-    termino_dt = datetime(year=fecha.year, month=fecha.month, day=fecha.day, hour=hora_minuto.hour, minute=hora_minuto.minute) + timedelta(hours=cit_servicio.duracion.hour, minutes=cit_servicio.duracion.minute)
-
-    # Validar que no tenga una cita pendiente en la misma fecha y hora
-    for cit_cita in get_cit_citas(db, cit_cliente_id=cit_cliente_id).all():
-        if cit_cita.inicio == inicio_dt:
-            raise ValueError("No se puede crear la cita porque ya tiene una cita pendiente en esta fecha y hora")
-
-    # Definir cancelar_antes con 24 horas antes de la cita
-    cancelar_antes = inicio_dt - timedelta(hours=24)
-
-    # Si cancelar_antes es un dia inhabil, domingo o sabado, se busca el dia habil anterior
-    dias_inhabiles = get_cit_dias_inhabiles(db=db).all()
-    while cancelar_antes.date() in dias_inhabiles or cancelar_antes.weekday() == 6 or cancelar_antes.weekday() == 5:
-        if cancelar_antes.date() in dias_inhabiles:
-            cancelar_antes = cancelar_antes - timedelta(days=1)
-        if cancelar_antes.weekday() == 6:  # Si es domingo, se cambia a viernes
-            cancelar_antes = cancelar_antes - timedelta(days=2)
-        if cancelar_antes.weekday() == 5:  # Si es sábado, se cambia a viernes
-            cancelar_antes = cancelar_antes - timedelta(days=1)
-
-    # Insertar registro
-    cit_cita = CitCita(
-        cit_servicio_id=cit_servicio.id,
-        cit_cliente_id=cit_cliente_id,
-        oficina_id=oficina.id,
-        inicio=inicio_dt,
-        termino=termino_dt,
-        notas=safe_string(input_str=nota, max_len=512),
-        estado="PENDIENTE",
-        asistencia=False,
-        codigo_asistencia=generar_codigo_asistencia(),
-        cancelar_antes=cancelar_antes,
-    )
-    db.add(cit_cita)
-    db.commit()
-    db.refresh(cit_cita)
+    # Bloquear el contador de cada tiempo en la oficina, en orden para que dos lotes no se bloqueen entre si
+    # Validar que las citas en ese tiempo para esa oficina, con las de este lote, NO pasen el limite de personas
+    for (oficina_id, inicio), cantidad in sorted(Counter((item.oficina_id, item.inicio) for item in cit_citas).items()):
+        if lock_cit_slot(db, oficina_id=oficina_id, inicio=inicio) + cantidad > oficinas[oficina_id].limite_personas:
+            db.rollback()
+            raise ValueError("No se puede crear la cita porque ya se alcanzo el limite de personas en la oficina")
 
-    # Agregar tarea en el fondo para que se envie un mensaje via correo electronico
-    task_queue.enqueue(
-        "citas_admin.blueprints.cit_citas.tasks.enviar_pendiente",
-        cit_cita_id=cit_cita.id,
+    # Insertar los registros, todos en la misma transaccion, el disparador de cit_citas suma cada una a su contador
+    db.add_all(cit_citas)
+    db.commit()
+    marcar_escritura(f"cit_cliente:{cit_cliente.id}")
+
+    # Invalidar las horas disponibles de las oficinas en las fechas de las citas
+    for oficina_id, fecha in {(item.oficina_id, item.inicio.date()) for item in cit_citas}:
+        invalidate_cit_horas_disponibles(oficina_id=oficina_id, fecha=fecha)
+
+    # Agregar las tareas en el fondo para que se envien los mensajes via correo electronico, en una sola tuberia de Redis
+    task_queue.enqueue_many(
+        [
+            Queue.prepare_data(
+                "citas_admin.blueprints.cit_citas.tasks.enviar_pendiente",
+                kwargs={"cit_cita_id": cit_cita.id},
+            )
+            for cit_cita in cit_citas
+        ]
     )
 
     # Entregar
-    return cit_cita
+    return cit_citas
+
+
+def create_cit_cita(
+    db: Session,
+    cit_cliente_id: int,
+    oficina_id: int,
+    cit_servicio_id: int,
+    fecha: date,
+    hora_minuto: time,
+    nota: str,
+) -> CitCitaOut:
+    """Crear una cita"""
+    cit_cita_in = CitCitaIn(
+        cit_servicio_id=cit_servicio_id,
+        oficina_id=oficina_id,
+        fecha=fecha,
+        hora_minuto=hora_minuto,
+        notas=nota,
+    )
+    return create_cit_citas(db, cit_cliente_id=cit_cliente_id, cit_citas_in=[cit_cita_in])[0]
@@ -1,27 +1,32 @@
 """
 Cit Citas V2, rutas (paths)
 """
+from typing import List
+
 from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi_pagination.ext.sqlalchemy import paginate
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from lib.database import get_db
+from lib.database import get_async_db, get_db
 from lib.fastapi_pagination import LimitOffsetPage
+from lib.fastapi_pagination_custom_cursor import CustomCursorPage, paginate_cursor
+from lib.fastapi_pagination_totales import paginate, paginate_async
 
 from ...core.permisos.models import Permiso
-from ..cit_clientes.authentications import get_current_active_user
-from ..cit_clientes.schemas import CitClienteInDB
+from ..cit_clientes.authentications import get_current_active_user, get_current_active_user_async, get_db_lectura_cliente
+from ..cit_clientes.schemas import CitClienteSesion
 
-from .crud import cancel_cit_cita, create_cit_cita, get_cit_cita, get_cit_citas, get_cit_citas_disponibles_cantidad
+from .crud import cancel_cit_cita, create_cit_cita, create_cit_citas, get_cit_cita, get_cit_citas, get_cit_citas_async, get_cit_citas_disponibles_cantidad
 from .schemas import CitCitaIn, CitCitaOut
 
 cit_citas_v2 = APIRouter(prefix="/v2/cit_citas", tags=["citas"])
+cit_citas_v2_asincrono = APIRouter(prefix="/v2/cit_citas", tags=["citas"])
 
 
 @cit_citas_v2.get("", response_model=LimitOffsetPage[CitCitaOut])
-async def listado_cit_citas(
-    current_user: CitClienteInDB = Depends(get_current_active_user),
-    db: Session = Depends(get_db),
+def listado_cit_citas(
+    current_user: CitClienteSesion = Depends(get_current_active_user),
+    db: Session = Depends(get_db_lectura_cliente),
 ):
     """Listado de citas"""
     if "CIT CITAS" not in current_user.permissions or current_user.permissions["CIT CITAS"] < Permiso.VER:
@@ -35,11 +40,28 @@ async def listado_cit_citas(
     return paginate(listado)
 
 
+@cit_citas_v2.get("/cursor", response_model=CustomCursorPage[CitCitaOut])
+def listado_cit_citas_cursor(
+    current_user: CitClienteSesion = Depends(get_current_active_user),
+    db: Session = Depends(get_db_lectura_cliente),
+):
+    """Listado de citas paginado por cursor"""
+    if "CIT CITAS" not in current_user.permissions or current_user.permissions["CIT CITAS"] < Permiso.VER:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Forbidden")
+    try:
+        listado = get_cit_citas(db, cit_cliente_id=current_user.id)
+    except IndexError as error:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Not found: {str(error)}") from error
+    except ValueError as error:
+        raise HTTPException(status_code=status.HTTP_406_NOT_ACCEPTABLE, detail=f"Not acceptable: {str(error)}") from error
+    return paginate_cursor(db, listado)
+
+
 @cit_citas_v2.get("/consultar", response_model=CitCitaOut)
-async def detalle_cit_cita(
+def detalle_cit_cita(
     cit_cita_id: int,
-    current_user: CitClienteInDB = Depends(get_current_active_user),
-    db: Session = Depends(get_db),
+    current_user: CitClienteSesion = Depends(get_current_active_user),
+    db: Session = Depends(get_db_lectura_cliente),
 ):
     """Detalle de una cita a partir de su id"""
     if "CIT CITAS" not in current_user.permissions or current_user.permissions["CIT CITAS"] < Permiso.VER:
@@ -54,9 +76,9 @@ async def detalle_cit_cita(
 
 
 @cit_citas_v2.get("/disponibles", response_model=int)
-async def cantidad_cit_citas_disponibles(
-    current_user: CitClienteInDB = Depends(get_current_active_user),
-    db: Session = Depends(get_db),
+def cantidad_cit_citas_disponibles(
+    current_user: CitClienteSesion = Depends(get_current_active_user),
+    db: Session = Depends(get_db_lectura_cliente),
 ):
     """Consultar la cantidad de citas que puede agendar (que es su limite menos las pendientes)"""
     if "CIT CITAS" not in current_user.permissions or current_user.permissions["CIT CITAS"] < Permiso.VER:
@@ -71,9 +93,9 @@ async def cantidad_cit_citas_disponibles(
 
 
 @cit_citas_v2.post("/nueva", response_model=CitCitaOut)
-async def crear_cit_cita(
+def crear_cit_cita(
     datos: CitCitaIn,
-    current_user: CitClienteInDB = Depends(get_current_active_user),
+    current_user: CitClienteSesion = Depends(get_current_active_user),
     db: Session = Depends(get_db),
 ):
     """Crear una cita"""
@@ -96,10 +118,32 @@ async def crear_cit_cita(
     return CitCitaOut.from_orm(cit_cita)
 
 
+@cit_citas_v2.post("/nueva_lote", response_model=List[CitCitaOut])
+def crear_cit_citas(
+    datos: List[CitCitaIn],
+    current_user: CitClienteSesion = Depends(get_current_active_user),
+    db: Session = Depends(get_db),
+):
+    """Crear varias citas, si alguna no es valida no se crea ninguna"""
+    if "CIT CITAS" not in current_user.permissions or current_user.permissions["CIT CITAS"] < Permiso.CREAR:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Forbidden")
+    try:
+        cit_citas = create_cit_citas(
+            db,
+            cit_cliente_id=current_user.id,
+            cit_citas_in=datos,
+        )
+    except IndexError as error:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Not found: {str(error)}") from error
+    except ValueError as error:
+        raise HTTPException(status_code=status.HTTP_406_NOT_ACCEPTABLE, detail=f"Not acceptable: {str(error)}") from error
+    return [CitCitaOut.from_orm(cit_cita) for cit_cita in cit_citas]
+
+
 @cit_citas_v2.get("/cancelar", response_model=CitCitaOut)
-async def cancelar_cit_citas(
+def cancelar_cit_citas(
     cit_cita_id: int,
-    current_user: CitClienteInDB = Depends(get_current_active_user),
+    current_user: CitClienteSesion = Depends(get_current_active_user),
     db: Session = Depends(get_db),
 ):
     """Cancelar una cita"""
@@ -116,3 +160,20 @@ async def cancelar_cit_citas(
     except ValueError as error:
         raise HTTPException(status_code=status.HTTP_406_NOT_ACCEPTABLE, detail=f"Not acceptable: {str(error)}") from error
     return CitCitaOut.from_orm(cit_cita)
+
+
+@cit_citas_v2_asincrono.get("", response_model=LimitOffsetPage[CitCitaOut])
+async def listado_cit_citas_asincrono(
+    current_user: CitClienteSesion = Depends(get_current_active_user_async),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Listado de citas"""
+    if "CIT CITAS" not in current_user.permissions or current_user.permissions["CIT CITAS"] < Permiso.VER:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Forbidden")
+    try:
+        listado = await get_cit_citas_async(db, cit_cliente_id=current_user.id)
+    except IndexError as error:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Not found: {str(error)}") from error
+    except ValueError as error:
+        raise HTTPException(status_code=status.HTTP_406_NOT_ACCEPTABLE, detail=f"Not acceptable: {str(error)}") from error
+    return await paginate_async(db, listado)
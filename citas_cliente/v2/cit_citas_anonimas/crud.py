@@ -1,46 +1,68 @@
 """
 Cit Citas Anonimas, CRUD (create, read, update, and delete)
 """
-from datetime import date, datetime, time
-from typing import Any
+from datetime import date, datetime
+from sqlalchemy import func, select, text
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.orm import Session
 
 from ...core.cit_citas.models import CitCita
-from ..oficinas.crud import get_oficina
-
-
-def get_cit_citas_anonimas(db: Session, oficina_id: int, fecha: date = None, hora_minuto: time = None) -> Any:
-    """Consultar las citas"""
-    consulta = db.query(CitCita)
-
-    # Filtrar por la oficina
-    oficina = get_oficina(db, oficina_id)
-    consulta = consulta.filter(CitCita.oficina == oficina)
-
-    # Si se filtra por fecha
-    if fecha is not None:
-        inicio_dt = datetime(year=fecha.year, month=fecha.month, day=fecha.day, hour=0, minute=0, second=0)
-        termino_dt = datetime(year=fecha.year, month=fecha.month, day=fecha.day, hour=23, minute=59, second=59)
-        consulta = consulta.filter(CitCita.inicio >= inicio_dt).filter(CitCita.inicio <= termino_dt)
-
-    # Si se filtra por hora_minuto
-    if fecha is not None and hora_minuto is not None:
-        inicio_dt = datetime(year=fecha.year, month=fecha.month, day=fecha.day, hour=hora_minuto.hour, minute=hora_minuto.minute, second=0)
-        consulta = consulta.filter(CitCita.inicio == inicio_dt)
-
-    # Filtro por tiempo de termino
-    hasta_tiempo = datetime(
-        year=fecha.year,
-        month=fecha.month,
-        day=fecha.day,
-        hour=23,
-        minute=59,
-        second=59,
+from ...core.cit_slots_ocupacion.models import CitSlotOcupacion
+
+
+def get_cit_citas_anonimas_cantidades(db: Session, oficina_id: int, fecha: date, hasta: date = None) -> dict:
+    """Consultar los contadores de ocupacion por tiempo de inicio, para la oficina en la fecha o desde la fecha hasta otra"""
+    if hasta is None:
+        hasta = fecha
+    inicio_dt = datetime(year=fecha.year, month=fecha.month, day=fecha.day, hour=0, minute=0, second=0)
+    termino_dt = datetime(year=hasta.year, month=hasta.month, day=hasta.day, hour=23, minute=59, second=59)
+    consulta = db.query(CitSlotOcupacion.inicio, CitSlotOcupacion.ocupados)
+    consulta = consulta.filter(CitSlotOcupacion.oficina_id == oficina_id)
+    consulta = consulta.filter(CitSlotOcupacion.inicio >= inicio_dt).filter(CitSlotOcupacion.inicio <= termino_dt)
+    consulta = consulta.filter(CitSlotOcupacion.ocupados > 0)
+
+    # Entregar un diccionario de tiempos y cantidad de citas { 08:30: 2, 08:45: 1, 10:00: 2,... }
+    return dict(consulta.all())
+
+
+def lock_cit_slot(db: Session, oficina_id: int, inicio: datetime) -> int:
+    """Bloquear el contador del tiempo de inicio en la oficina, creandolo si no existe, entrega los ocupados
+
+    El renglon queda bloqueado hasta que termine la transaccion, asi dos peticiones no pueden pasar el limite al mismo tiempo.
+    El contador no se cambia aqui, lo suma el disparador de cit_citas al insertar la cita.
+    """
+    sentencia = insert(CitSlotOcupacion).values(oficina_id=oficina_id, inicio=inicio, ocupados=0)
+    sentencia = sentencia.on_conflict_do_update(
+        index_elements=[CitSlotOcupacion.oficina_id, CitSlotOcupacion.inicio],
+        set_={"ocupados": CitSlotOcupacion.ocupados},
     )
-    consulta = consulta.filter(CitCita.termino <= hasta_tiempo)
+    return db.execute(sentencia.returning(CitSlotOcupacion.ocupados)).scalar_one()
+
+
+def rebuild_cit_slots_ocupacion(db: Session, desde: date, oficina_id: int = None) -> int:
+    """Reconstruir los contadores de ocupacion contando las citas desde una fecha, entrega la cantidad de contadores"""
+    desde_dt = datetime(year=desde.year, month=desde.month, day=desde.day, hour=0, minute=0, second=0)
+
+    # Bloquear la tabla para que el disparador no cambie los contadores mientras se reconstruyen
+    db.execute(text(f"LOCK TABLE {CitSlotOcupacion.__tablename__} IN EXCLUSIVE MODE"))
+
+    # Borrar los contadores
+    borrar = db.query(CitSlotOcupacion).filter(CitSlotOcupacion.inicio >= desde_dt)
+    if oficina_id is not None:
+        borrar = borrar.filter(CitSlotOcupacion.oficina_id == oficina_id)
+    borrar.delete(synchronize_session=False)
+
+    # Contar las citas no canceladas por oficina y tiempo de inicio
+    conteo = select(CitCita.oficina_id, CitCita.inicio, func.count(CitCita.id))
+    conteo = conteo.where(CitCita.inicio >= desde_dt)
+    if oficina_id is not None:
+        conteo = conteo.where(CitCita.oficina_id == oficina_id)
+    conteo = conteo.where(CitCita.estado != "CANCELO").where(CitCita.estatus == "A")
+    conteo = conteo.group_by(CitCita.oficina_id, CitCita.inicio)
 
-    # Descartar las citas canceladas
-    consulta = consulta.filter(CitCita.estado != "CANCELO")
+    # Insertar los contadores y terminar la transaccion
+    resultado = db.execute(insert(CitSlotOcupacion).from_select(["oficina_id", "inicio", "ocupados"], conteo))
+    db.commit()
 
     # Entregar
-    return consulta.filter_by(estatus="A").order_by(CitCita.id)
+    return resultado.rowcount
@@ -1,70 +1,123 @@
 """
 Autentificaciones
 """
-from datetime import datetime, timedelta
+import logging
+import threading
+import time
+from datetime import date, datetime, timedelta
+from functools import partial
 from typing import Optional
+from uuid import uuid4
 
+from anyio import to_thread
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
-from passlib.context import CryptContext
+from redis.exceptions import RedisError
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from config.settings import SECRET_KEY, ALGORITHM
-from lib.database import get_db
+from config.settings import ACCESS_TOKEN_EXPIRE_MINUTES, SECRET_KEY, ALGORITHM, PRINCIPAL_CACHE_REDIS, PRINCIPAL_CACHE_TTL, TOKEN_AUTOCONTENIDO
+from lib.cache import Cache
+from lib.database import get_async_db, get_db, sesion_lectura
+from lib.passwords import hash_password, verify_and_update_password, verify_password as verify_password_hash
+from lib.redis import redis
 
 from ...core.cit_clientes.models import CitCliente
-from .schemas import TokenData, CitClienteInDB
+from .schemas import TokenData, CitClienteInDB, CitClienteSesion
 
-pwd_context = CryptContext(schemes=["pbkdf2_sha256", "des_crypt"], deprecated="auto")  # In tutorial use schemes=["bcrypt"]
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
+# Cache de los clientes autentificados, agrupados por e-mail (sub) para invalidar todos sus tokens (jti) a la vez
+principal_cache = Cache(prefijo="cit_clientes_principal", ttl=PRINCIPAL_CACHE_TTL, local_primero=True, usar_redis=PRINCIPAL_CACHE_REDIS)
+
+# En el token autocontenido cada permiso ocupa PERMISOS_BITS bits de un entero, en el orden de CitCliente.PERMISOS
+PERMISOS_BITS = 3
+REVOCADOS_PREFIJO = "cit_clientes_revocados"
+REVOCADOS_INTENTOS = 3
+
+# Revocaciones que no se pudieron escribir en Redis, de e-mail a la hora de la revocacion, se reintentan antes de volver a leer
+revocaciones_pendientes = {}
+revocaciones_candado = threading.Lock()
+
+bitacora = logging.getLogger(__name__)
+
 
 def verify_password(plain_password, hashed_password):
     """Validar contraseña"""
     # Maybe the hashed_password is not a string or is an empty string
     if not isinstance(hashed_password, str) or hashed_password == "":
         return False
-    return pwd_context.verify(plain_password, hashed_password)
+    return verify_password_hash(plain_password, hashed_password)
 
 
 def get_password_hash(password):
     """Cifrar contraseña"""
-    return pwd_context.hash(password)
+    return hash_password(password)
+
+
+def cit_cliente_in_db(cit_cliente: CitCliente) -> CitClienteInDB:
+    """Convertir el registro del cliente al esquema del cliente en base de datos"""
+    datos = {
+        "id": cit_cliente.id,
+        "nombres": cit_cliente.nombres,
+        "apellido_primero": cit_cliente.apellido_primero,
+        "apellido_segundo": cit_cliente.apellido_segundo,
+        "curp": cit_cliente.curp,
+        "telefono": cit_cliente.telefono,
+        "email": cit_cliente.email,
+        "limite_citas_pendientes": cit_cliente.limite_citas_pendientes,
+        "autoriza_mensajes": cit_cliente.autoriza_mensajes,
+        "enviar_boletin": cit_cliente.enviar_boletin,
+        "username": cit_cliente.email,
+        "permissions": cit_cliente.permissions,
+        "hashed_password": cit_cliente.contrasena_sha256,
+        "disabled": cit_cliente.estatus != "A",
+    }
+    return CitClienteInDB(**datos)
 
 
 def get_cit_cliente(username: str, db: Session = Depends(get_db)):
     """Obtener el cliente a partir de su e-mail"""
     cit_cliente = db.query(CitCliente).filter(CitCliente.email == username).first()
     if cit_cliente:
-        datos = {
-            "id": cit_cliente.id,
-            "nombres": cit_cliente.nombres,
-            "apellido_primero": cit_cliente.apellido_primero,
-            "apellido_segundo": cit_cliente.apellido_segundo,
-            "curp": cit_cliente.curp,
-            "telefono": cit_cliente.telefono,
-            "email": cit_cliente.email,
-            "limite_citas_pendientes": cit_cliente.limite_citas_pendientes,
-            "autoriza_mensajes": cit_cliente.autoriza_mensajes,
-            "enviar_boletin": cit_cliente.enviar_boletin,
-            "username": cit_cliente.email,
-            "permissions": cit_cliente.permissions,
-            "hashed_password": cit_cliente.contrasena_sha256,
-            "disabled": cit_cliente.estatus != "A",
-        }
-        return CitClienteInDB(**datos)
+        return cit_cliente_in_db(cit_cliente)
+
+
+async def get_cit_cliente_async(username: str, db: AsyncSession):
+    """Obtener el cliente a partir de su e-mail con la sesion asincrona"""
+    cit_cliente = (await db.execute(select(CitCliente).filter(CitCliente.email == username))).scalars().first()
+    if cit_cliente:
+        return cit_cliente_in_db(cit_cliente)
 
 
 def authenticate_user(username: str, password: str, db: Session = Depends(get_db)):
-    """Autentificar el cliente"""
-    cit_cliente = get_cit_cliente(username, db)
-    print(repr(cit_cliente))
+    """Autentificar el cliente, si su contrasena esta cifrada de forma obsoleta se cifra de nuevo"""
+    cit_cliente = db.query(CitCliente).filter(CitCliente.email == username).first()
     if not cit_cliente:
         return False
-    if not verify_password(password, cit_cliente.hashed_password):
+    usuario = cit_cliente_in_db(cit_cliente)
+
+    # Liberar la conexion a la base de datos mientras se espera la verificacion de la contrasena
+    db.rollback()
+
+    # Verificar la contrasena
+    if not isinstance(usuario.hashed_password, str) or usuario.hashed_password == "":
         return False
-    return cit_cliente
+    valido, contrasena_sha256 = verify_and_update_password(password, usuario.hashed_password)
+    if not valido:
+        return False
+
+    # Actualizar el cifrado de la contrasena, solo si no la cambiaron mientras se verificaba
+    if contrasena_sha256 is not None:
+        actualizacion = {CitCliente.contrasena_sha256: contrasena_sha256}
+        db.query(CitCliente).filter(CitCliente.id == usuario.id).filter(CitCliente.contrasena_sha256 == usuario.hashed_password).update(actualizacion, synchronize_session=False)
+        db.commit()
+        principal_cache.invalidar(usuario.username)
+
+    # Entregar
+    return usuario
 
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
@@ -74,34 +127,208 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
         expire = datetime.utcnow() + expires_delta
     else:
         expire = datetime.utcnow() + timedelta(minutes=15)
-    to_encode.update({"exp": expire})
+    to_encode.update({"exp": expire, "jti": uuid4().hex})
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
 
-async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
-    """Obtener el usuario a partir del token"""
-    credentials_exception = HTTPException(
+def encode_permissions(permissions: dict) -> int:
+    """Codificar los permisos en un entero"""
+    codigo = 0
+    for posicion, modulo in enumerate(CitCliente.PERMISOS):
+        codigo |= permissions.get(modulo, 0) << (posicion * PERMISOS_BITS)
+    return codigo
+
+
+def decode_permissions(codigo: int) -> dict:
+    """Decodificar los permisos de un entero, omitiendo los que no tienen nivel"""
+    permissions = {}
+    for posicion, modulo in enumerate(CitCliente.PERMISOS):
+        nivel = (codigo >> (posicion * PERMISOS_BITS)) & ((1 << PERMISOS_BITS) - 1)
+        if nivel > 0:
+            permissions[modulo] = nivel
+    return permissions
+
+
+def create_cit_cliente_access_token(db: Session, cit_cliente: CitClienteInDB, expires_delta: Optional[timedelta] = None):
+    """Crear el token de acceso del cliente, si es autocontenido lleva su id, permisos, renovacion y si esta inactivo"""
+    data = {"sub": cit_cliente.username}
+    if TOKEN_AUTOCONTENIDO:
+        renovacion = db.query(CitCliente.renovacion).filter(CitCliente.id == cit_cliente.id).scalar()
+        data.update(
+            {
+                "cid": cit_cliente.id,
+                "prm": encode_permissions(cit_cliente.permissions),
+                "ren": renovacion.toordinal(),
+                "dis": cit_cliente.disabled,
+                "iat": time.time(),  # Con fraccion de segundo, para distinguirlo de una revocacion en el mismo segundo
+            }
+        )
+    return create_access_token(data=data, expires_delta=expires_delta)
+
+
+def _redis_revocar(username: str, revocado: float) -> bool:
+    """Escribir la revocacion en Redis, entrega falso si Redis no responde"""
+    try:
+        redis.set(f"{REVOCADOS_PREFIJO}:{username}", repr(revocado), ex=ACCESS_TOKEN_EXPIRE_MINUTES * 60)
+    except RedisError as error:
+        bitacora.warning("No se pudo revocar los tokens de %s en Redis: %s", username, error)
+        return False
+    return True
+
+
+def _redis_revocaciones_pendientes() -> bool:
+    """Escribir en Redis las revocaciones que fallaron, entrega falso si todavia quedan pendientes"""
+    with revocaciones_candado:
+        pendientes = list(revocaciones_pendientes.items())
+    for username, revocado in pendientes:
+        if not _redis_revocar(username, revocado):
+            return False
+        with revocaciones_candado:
+            if revocaciones_pendientes.get(username) == revocado:
+                del revocaciones_pendientes[username]
+    return True
+
+
+def revoke_cit_cliente_tokens(username: str):
+    """Revocar los tokens autocontenidos del cliente emitidos hasta ahora
+
+    Si Redis no responde la revocacion queda pendiente en este proceso y se escribe antes de volver a leer las revocaciones.
+    """
+    revocado = time.time()
+    for _ in range(REVOCADOS_INTENTOS):
+        if _redis_revocar(username, revocado):
+            return
+    with revocaciones_candado:
+        revocaciones_pendientes[username] = max(revocado, revocaciones_pendientes.get(username, 0))
+
+
+def is_revoked(username: str, emitido: float) -> Optional[bool]:
+    """El token autocontenido fue emitido antes o al revocar los tokens del cliente
+
+    Entrega None si no se puede saber porque Redis no responde o quedan revocaciones pendientes,
+    en ese caso se autoriza consultando el cliente en la base de datos, igual que sin token autocontenido.
+    """
+    if not _redis_revocaciones_pendientes():
+        with revocaciones_candado:
+            pendiente = revocaciones_pendientes.get(username)
+        if pendiente is not None and emitido <= pendiente:
+            return True
+        return None
+    try:
+        revocado = redis.get(f"{REVOCADOS_PREFIJO}:{username}")
+    except RedisError as error:
+        bitacora.warning("No se pudo consultar la revocacion de %s en Redis: %s", username, error)
+        return None
+    return revocado is not None and emitido <= float(revocado)
+
+
+def credentials_exception() -> HTTPException:
+    """Error 401 cuando el token no es valido"""
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+
+
+def decode_token(token: str) -> dict:
+    """Decodificar el token, entrega su contenido con el e-mail en sub"""
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        username: str = payload.get("sub")
-        if username is None:
-            raise credentials_exception
-        token_data = TokenData(username=username)
     except JWTError:
-        raise credentials_exception
-    usuario = get_cit_cliente(token_data.username, db)
+        raise credentials_exception()
+    if payload.get("sub") is None:
+        raise credentials_exception()
+    TokenData(username=payload["sub"])
+    return payload
+
+
+def cit_cliente_sesion_autocontenida(payload: dict) -> Optional[CitClienteSesion]:
+    """El cliente autentificado a partir del token autocontenido, sin consultar la base de datos
+
+    Entrega None si no se puede saber si fue revocado, entonces hay que consultar el cliente como sin token autocontenido.
+    """
+    revocado = is_revoked(payload["sub"], payload.get("iat", 0))
+    if revocado is None:
+        return None
+    if revocado:
+        raise credentials_exception()
+    permissions = {}
+    if date.today().toordinal() <= payload["ren"]:
+        permissions = decode_permissions(payload["prm"])
+    return CitClienteSesion(id=payload["cid"], username=payload["sub"], permissions=permissions, disabled=payload["dis"])
+
+
+def principal_cache_guardar(username: str, jti: str, usuario: CitClienteInDB, generacion: tuple):
+    """Guardar el cliente autentificado, en el cache solo va lo que necesitan las rutas, no la contrasena cifrada ni los datos personales"""
+    principal_cache.guardar(username, jti, usuario.dict(include=set(CitClienteSesion.__fields__)), generacion=generacion)
+
+
+def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+    """Obtener el usuario a partir del token"""
+    payload = decode_token(token)
+    username, jti = payload["sub"], payload.get("jti", "")
+    if TOKEN_AUTOCONTENIDO and "cid" in payload:
+        sesion = cit_cliente_sesion_autocontenida(payload)
+        if sesion is not None:
+            return sesion
+    guardado = principal_cache.obtener(username, jti)
+    if guardado is not None:
+        return CitClienteSesion(**guardado)
+    generacion = principal_cache.generacion(username)
+    usuario = get_cit_cliente(username, db)
+    if usuario is None:
+        raise credentials_exception()
+    principal_cache_guardar(username, jti, usuario, generacion)
+    return usuario
+
+
+async def get_current_user_async(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)):
+    """Obtener el usuario a partir del token en las rutas asincronas, consulta con la misma sesion asincrona de la ruta
+
+    La memoria del proceso se consulta en el ciclo de eventos; Redis, que es bloqueante, en un hilo sin conexion a la base de datos.
+    """
+    payload = decode_token(token)
+    username, jti = payload["sub"], payload.get("jti", "")
+    if TOKEN_AUTOCONTENIDO and "cid" in payload:
+        sesion = await to_thread.run_sync(cit_cliente_sesion_autocontenida, payload)
+        if sesion is not None:
+            return sesion
+    guardado = principal_cache.obtener_local(username, jti)
+    if guardado is None:
+        guardado = await to_thread.run_sync(principal_cache.obtener, username, jti)
+    if guardado is not None:
+        return CitClienteSesion(**guardado)
+    generacion = await to_thread.run_sync(principal_cache.generacion, username)
+    usuario = await get_cit_cliente_async(username, db)
     if usuario is None:
-        raise credentials_exception
+        raise credentials_exception()
+    await to_thread.run_sync(partial(principal_cache_guardar, username, jti, usuario, generacion))
     return usuario
 
 
-async def get_current_active_user(current_user: CitClienteInDB = Depends(get_current_user)):
+def invalidate_cit_cliente_principal(username: str):
+    """Invalidar el cliente autentificado en el cache, para todos sus tokens, y revocar sus tokens autocontenidos"""
+    principal_cache.invalidar(username)
+    if TOKEN_AUTOCONTENIDO:
+        revoke_cit_cliente_tokens(username)
+
+
+async def get_current_active_user(current_user: CitClienteSesion = Depends(get_current_user)):
     """Obtener el usuario a partir del token y provocar error si está inactivo"""
     if current_user.disabled:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Unauthorized (usuario inactivo)")
     return current_user
+
+
+async def get_current_active_user_async(current_user: CitClienteSesion = Depends(get_current_user_async)):
+    """Obtener el usuario a partir del token en las rutas asincronas y provocar error si está inactivo"""
+    if current_user.disabled:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Unauthorized (usuario inactivo)")
+    return current_user
+
+
+def get_db_lectura_cliente(current_user: CitClienteSesion = Depends(get_current_active_user)):
+    """Sesion de lectura para las consultas del cliente, usa la replica salvo que el cliente haya escrito recientemente"""
+    yield from sesion_lectura(f"cit_cliente:{current_user.id}")
@@ -4,12 +4,14 @@ Cit Clientes V2, CRUD (create, read, update, and delete)
 import hashlib
 import re
 from typing import Any
-from passlib.context import CryptContext
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
+from lib.passwords import hash_password
 from lib.safe_string import CURP_REGEXP, EMAIL_REGEXP, PASSWORD_REGEXP, PASSWORD_REGEXP_MESSAGE
 
 from ...core.cit_clientes.models import CitCliente
+from .authentications import invalidate_cit_cliente_principal
 from .schemas import CitClienteActualizarContrasenaIn
 
 
@@ -29,6 +31,16 @@ def get_cit_cliente(db: Session, cit_cliente_id: int) -> CitCliente:
     return cit_cliente
 
 
+async def get_cit_cliente_async(db: AsyncSession, cit_cliente_id: int) -> CitCliente:
+    """Consultar un cliente por su id, de forma asincrona"""
+    cit_cliente = await db.get(CitCliente, cit_cliente_id)
+    if cit_cliente is None:
+        raise IndexError("No existe ese cliente")
+    if cit_cliente.estatus != "A":
+        raise ValueError("No es activo ese cliente, está eliminado")
+    return cit_cliente
+
+
 def get_cit_cliente_from_curp(db: Session, cliente_curp: str) -> CitCliente:
     """Consultar un cliente por su curp"""
     if re.match(CURP_REGEXP, cliente_curp) is None:
@@ -69,14 +81,18 @@ def update_cit_cliente_password(db: Session, actualizacion: CitClienteActualizar
     contrasena_anterior_md5 = hashlib.md5(actualizacion.contrasena_anterior.encode("utf-8")).hexdigest()
     if contrasena_anterior_md5 != cit_cliente.contrasena_md5.lower():
         raise ValueError("La contrasena anterior no es correcta ")
+    # Cifrar la contrasena nueva, liberando antes la conexion a la base de datos para no ocuparla mientras se espera
+    db.rollback()
+    contrasena_sha256 = hash_password(actualizacion.contrasena_nueva)
     # Poner en blanco la contrasena anterior
     cit_cliente.contrasena_md5 = ""
-    # Cifrar la contrasena nueva
-    pwd_context = CryptContext(schemes=["pbkdf2_sha256", "des_crypt"], deprecated="auto")
-    cit_cliente.contrasena_sha256 = pwd_context.hash(actualizacion.contrasena_nueva)
+    # Poner la contrasena nueva
+    cit_cliente.contrasena_sha256 = contrasena_sha256
     # Actualizar el cliente
     db.add(cit_cliente)
     db.commit()
+    # Invalidar el cliente autentificado en el cache
+    invalidate_cit_cliente_principal(cit_cliente.email)
     # Entregar el cliente y el mensaje de exito
     cit_cliente.mensaje = "Contraseña actualizada"
     return cit_cliente
@@ -2,33 +2,58 @@
 Cit Clientes V2, rutas (paths)
 """
 from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi_pagination.ext.sqlalchemy import paginate
 from sqlalchemy.orm import Session
 
 from lib.database import get_db
+from lib.exportar import exportar, formato_query
 from lib.fastapi_pagination import LimitOffsetPage
+from lib.fastapi_pagination_custom_cursor import CustomCursorPage, paginate_cursor
+from lib.fastapi_pagination_totales import paginate
 
 from ...core.permisos.models import Permiso
 from .authentications import get_current_active_user
 from .crud import get_cit_clientes, get_cit_cliente, update_cit_cliente_password
-from .schemas import CitClienteInDB, CitClienteOut, CitClienteActualizarContrasenaIn, CitClienteActualizarContrasenaOut
+from .schemas import CitClienteOut, CitClienteSesion, CitClienteActualizarContrasenaIn, CitClienteActualizarContrasenaOut
 
 cit_clientes_v2 = APIRouter(prefix="/v2/cit_clientes", tags=["clientes"])
 
 
 @cit_clientes_v2.get("", response_model=LimitOffsetPage[CitClienteOut])
-async def listado_cit_clientes(
-    current_user: CitClienteInDB = Depends(get_current_active_user),
+def listado_cit_clientes(
+    current_user: CitClienteSesion = Depends(get_current_active_user),
     db: Session = Depends(get_db),
 ):
     """Listado de clientes"""
     if "CIT CLIENTES" not in current_user.permissions or current_user.permissions["CIT CLIENTES"] < Permiso.VER:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Forbidden")
-    return paginate(get_cit_clientes(db))
+    return paginate(get_cit_clientes(db), total="estimado")
+
+
+@cit_clientes_v2.get("/cursor", response_model=CustomCursorPage[CitClienteOut])
+def listado_cit_clientes_cursor(
+    current_user: CitClienteSesion = Depends(get_current_active_user),
+    db: Session = Depends(get_db),
+):
+    """Listado de clientes paginado por cursor"""
+    if "CIT CLIENTES" not in current_user.permissions or current_user.permissions["CIT CLIENTES"] < Permiso.VER:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Forbidden")
+    return paginate_cursor(db, get_cit_clientes(db))
+
+
+@cit_clientes_v2.get("/exportar")
+def exportar_cit_clientes(
+    formato: str = formato_query(),
+    current_user: CitClienteSesion = Depends(get_current_active_user),
+    db: Session = Depends(get_db),
+):
+    """Exportar todos los clientes como NDJSON o CSV, sin paginar"""
+    if "CIT CLIENTES" not in current_user.permissions or current_user.permissions["CIT CLIENTES"] < Permiso.VER:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Forbidden")
+    return exportar(get_cit_clientes(db), CitClienteOut, formato, nombre="cit_clientes")
 
 
 @cit_clientes_v2.post("/actualizar_contrasena", response_model=CitClienteActualizarContrasenaOut)
-async def actualizar_contrasena(
+def actualizar_contrasena(
     actualizacion: CitClienteActualizarContrasenaIn,
     db: Session = Depends(get_db),
 ):
@@ -43,9 +68,9 @@ async def actualizar_contrasena(
 
 
 @cit_clientes_v2.get("/{cit_cliente_id}", response_model=CitClienteOut)
-async def detalle_cit_cliente(
+def detalle_cit_cliente(
     cit_cliente_id: int,
-    current_user: CitClienteInDB = Depends(get_current_active_user),
+    current_user: CitClienteSesion = Depends(get_current_active_user),
     db: Session = Depends(get_db),
 ):
     """Detalle de un cliente a partir de su id"""
@@ -25,15 +25,21 @@ class CitClienteOut(BaseModel):
         orm_mode = True
 
 
-class CitClienteInDB(CitClienteOut):
-    """Cliente en base de datos"""
+class CitClienteSesion(BaseModel):
+    """Cliente autentificado, es lo que necesitan las rutas y lo que lleva el token autocontenido"""
 
+    id: int
     username: str
     permissions: dict
-    hashed_password: str
     disabled: bool
 
 
+class CitClienteInDB(CitClienteOut, CitClienteSesion):
+    """Cliente en base de datos"""
+
+    hashed_password: str
+
+
 class Token(BaseModel):
     """Token"""
 
@@ -3,12 +3,13 @@ Cit Clientes Recuperaciones V2, CRUD (create, read, update, and delete)
 """
 from datetime import datetime, timedelta
 from sqlalchemy.orm import Session
-from passlib.context import CryptContext
 
+from lib.passwords import hash_password
 from lib.pwgen import generar_aleatorio
 from lib.redis import task_queue
 
 from ...core.cit_clientes_recuperaciones.models import CitClienteRecuperacion
+from ..cit_clientes.authentications import invalidate_cit_cliente_principal
 from ..cit_clientes.crud import get_cit_cliente, get_cit_cliente_from_email
 from .schemas import CitClienteRecuperacionIn, CitClienteRecuperacionConcluirIn
 
@@ -82,16 +83,17 @@ def terminate_recover_password(db: Session, recuperacion: CitClienteRecuperacion
     # Validar la recuperacion
     cit_cliente_recuperacion = validate_recover_password(db, recuperacion.hashid, recuperacion.cadena_validar)
 
+    # Cifrar la contrasena nueva, liberando antes la conexion a la base de datos para no ocuparla mientras se espera
+    db.rollback()
+    contrasena_sha256 = hash_password(recuperacion.password)
+
     # Definir la fecha de renovación dos meses después
     renovacion_fecha = datetime.now() + timedelta(days=60)
 
-    # Cifrar la contrasena
-    pwd_context = CryptContext(schemes=["pbkdf2_sha256", "des_crypt"], deprecated="auto")
-
     # Actualizar el cliente con la nueva contrasena
     cit_cliente = get_cit_cliente(db, cit_cliente_recuperacion.cit_cliente_id)
     cit_cliente.contrasena_md5 = ""
-    cit_cliente.contrasena_sha256 = pwd_context.hash(recuperacion.password)
+    cit_cliente.contrasena_sha256 = contrasena_sha256
     cit_cliente.renovacion = renovacion_fecha.date()
     db.add(cit_cliente)
 
@@ -101,5 +103,8 @@ def terminate_recover_password(db: Session, recuperacion: CitClienteRecuperacion
     db.commit()
     db.refresh(cit_cliente_recuperacion)
 
+    # Invalidar el cliente autentificado en el cache, la renovacion cambia sus permisos
+    invalidate_cit_cliente_principal(cit_cliente.email)
+
     # Entregar
     return cit_cliente_recuperacion
@@ -13,7 +13,7 @@ cit_clientes_recuperaciones_v2 = APIRouter(prefix="/v2/recuperar_contrasena", ta
 
 
 @cit_clientes_recuperaciones_v2.post("/solicitar", response_model=CitClienteRecuperacionOut)
-async def recuperar_contrasena_solicitar(
+def recuperar_contrasena_solicitar(
     recuperacion: CitClienteRecuperacionIn,
     db: Session = Depends(get_db),
 ):
@@ -28,7 +28,7 @@ async def recuperar_contrasena_solicitar(
 
 
 @cit_clientes_recuperaciones_v2.get("/validar", response_model=CitClienteRecuperacionValidarOut)
-async def recuperar_contrasena_validar(
+def recuperar_contrasena_validar(
     hashid: str = None,
     cadena_validar: str = None,
     db: Session = Depends(get_db),
@@ -48,7 +48,7 @@ async def recuperar_contrasena_validar(
 
 
 @cit_clientes_recuperaciones_v2.post("/concluir", response_model=CitClienteRecuperacionConcluirOut)
-async def recuperar_contrasena_concluir(
+def recuperar_contrasena_concluir(
     recuperacion: CitClienteRecuperacionConcluirIn,
     db: Session = Depends(get_db),
 ):
@@ -4,9 +4,9 @@ Cit Clientes Registros V2, CRUD (create, read, update, and delete)
 from datetime import datetime, timedelta
 import re
 from sqlalchemy.orm import Session
-from passlib.context import CryptContext
 
 from config.settings import LIMITE_CITAS_PENDIENTES
+from lib.passwords import hash_password
 from lib.pwgen import generar_aleatorio
 from lib.redis import task_queue
 from lib.safe_string import safe_string, CURP_REGEXP, EMAIL_REGEXP, TELEFONO_REGEXP
@@ -134,12 +134,13 @@ def terminate_new_account(db: Session, registro: CitClienteRegistroConcluirIn) -
     # Ejecutar la funcion que nos apoya con la validacion
     cit_cliente_registro = validate_new_account(db, registro.hashid, registro.cadena_validar)
 
+    # Cifrar la contrasena, liberando antes la conexion a la base de datos para no ocuparla mientras se espera
+    db.rollback()
+    contrasena_sha256 = hash_password(registro.password)
+
     # Definir la fecha de renovación dos meses después
     renovacion_fecha = datetime.now() + timedelta(days=60)
 
-    # Cifrar la contrasena
-    pwd_context = CryptContext(schemes=["pbkdf2_sha256", "des_crypt"], deprecated="auto")
-
     # Insertar el nuevo cliente
     cit_cliente = CitCliente(
         nombres=cit_cliente_registro.nombres,
@@ -149,7 +150,7 @@ def terminate_new_account(db: Session, registro: CitClienteRegistroConcluirIn) -
         telefono=cit_cliente_registro.telefono,
         email=cit_cliente_registro.email,
         contrasena_md5="",
-        contrasena_sha256=pwd_context.hash(registro.password),
+        contrasena_sha256=contrasena_sha256,
         renovacion=renovacion_fecha.date(),
         limite_citas_pendientes=LIMITE_CITAS_PENDIENTES,
     )
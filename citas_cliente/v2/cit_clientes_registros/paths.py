@@ -13,7 +13,7 @@ cit_clientes_registros_v2 = APIRouter(prefix="/v2/nueva_cuenta", tags=["nueva cu
 
 
 @cit_clientes_registros_v2.post("/solicitar", response_model=CitClienteRegistroOut)
-async def nueva_cuenta_solicitar(
+def nueva_cuenta_solicitar(
     registro: CitClienteRegistroIn,
     db: Session = Depends(get_db),
 ):
@@ -28,7 +28,7 @@ async def nueva_cuenta_solicitar(
 
 
 @cit_clientes_registros_v2.get("/validar", response_model=CitClienteRegistroValidarOut)
-async def nueva_cuenta_validar(
+def nueva_cuenta_validar(
     hashid: str = None,
     cadena_validar: str = None,
     db: Session = Depends(get_db),
@@ -48,7 +48,7 @@ async def nueva_cuenta_validar(
 
 
 @cit_clientes_registros_v2.post("/concluir", response_model=CitClienteRegistroConcluirOut)
-async def nueva_cuenta_concluir(
+def nueva_cuenta_concluir(
     registro: CitClienteRegistroConcluirIn,
     db: Session = Depends(get_db),
 ):
@@ -4,38 +4,19 @@ Cit Dias Disponibles V2, CRUD (create, read, update, and delete)
 from datetime import date, datetime, timedelta
 
 from typing import Any
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from config.settings import LOCAL_HUSO_HORARIO, SERVIDOR_HUSO_HORARIO
 
-from ..cit_dias_inhabiles.crud import get_cit_dias_inhabiles
+from ..cit_dias_inhabiles.calendario import CalendarioDiasInhabiles, calendario_dias_inhabiles
 
 LIMITE_DIAS = 90
 QUITAR_PRIMER_DIA_DESPUES_HORAS = 14
 
 
-def get_cit_dias_disponibles(db: Session, oficina_id: int) -> Any:
-    """Consultar los dias disponibles, entrega un listado de fechas"""
-    dias_disponibles = []
-
-    # Consultar dias inhabiles
-    cit_dias_inhabiles = get_cit_dias_inhabiles(db).all()
-    dias_inhabiles = []
-    if len(cit_dias_inhabiles) > 0:
-        dias_inhabiles = [item.fecha for item in cit_dias_inhabiles]
-
-    # Agregar cada dia hasta el limite a partir de manana
-    for fecha in (date.today() + timedelta(n) for n in range(1, LIMITE_DIAS)):
-        # Quitar los sabados y domingos
-        if fecha.weekday() in (5, 6):
-            continue
-
-        # Quitar los dias inhabiles
-        if fecha in dias_inhabiles:
-            continue
-
-        # Acumular
-        dias_disponibles.append(fecha)
+def quitar_primer_dia_disponible(dias_inhabiles: Any) -> bool:
+    """Definir si se debe quitar el primer dia disponible, porque hoy es inhabil o ya es tarde"""
 
     # Definir tiempo local
     servidor_tiempo = datetime.now(SERVIDOR_HUSO_HORARIO)
@@ -44,16 +25,56 @@ def get_cit_dias_disponibles(db: Session, oficina_id: int) -> Any:
     # Definir que dia es hoy
     hoy = tiempo_local.date()
 
-    # Definir si hoy es sabado, domingo o dia inhabil
-    hoy_es_dia_inhabil = hoy.weekday() in (5, 6) or hoy in dias_inhabiles
+    # Si hoy es sabado, domingo o dia inhabil, se quita el primer dia disponible
+    if hoy.weekday() in (5, 6) or hoy in dias_inhabiles:
+        return True
+
+    # Si es dia habil y pasan de las QUITAR_PRIMER_DIA_DESPUES_HORAS horas, se quita el primer dia disponible
+    return tiempo_local.hour >= QUITAR_PRIMER_DIA_DESPUES_HORAS
+
+
+def get_cit_dias_disponibles(db: Session, oficina_id: int) -> Any:
+    """Consultar los dias disponibles, entrega un listado de fechas"""
+    return listar_dias_disponibles(calendario_dias_inhabiles.cargar(db))
 
-    # Si hoy es dia inhabil, quitar el primer dia disponible
-    if hoy_es_dia_inhabil:
-        dias_disponibles.pop(0)
 
-    # Si es dia habil y pasan de las QUITAR_PRIMER_DIA_DESPUES_HORAS horas, quitar el primer dia disponible
-    elif tiempo_local.hour >= QUITAR_PRIMER_DIA_DESPUES_HORAS:
+async def get_cit_dias_disponibles_async(db: AsyncSession, oficina_id: int) -> Any:
+    """Consultar los dias disponibles de forma asincrona, entrega un listado de fechas"""
+    return listar_dias_disponibles(await calendario_dias_inhabiles.cargar_async(db))
+
+
+def listar_dias_disponibles(calendario: CalendarioDiasInhabiles) -> list:
+    """Listar los dias disponibles con el calendario de dias inhabiles ya cargado"""
+
+    # Tomar los dias habiles hasta el limite a partir de manana, sin sabados, domingos ni dias inhabiles
+    hoy = date.today()
+    dias_disponibles = calendario.dias_habiles(hoy + timedelta(1), hoy + timedelta(LIMITE_DIAS - 1))
+
+    # Si hoy es dia inhabil o ya es tarde, quitar el primer dia disponible
+    if quitar_primer_dia_disponible(calendario.dias_inhabiles):
         dias_disponibles.pop(0)
 
     # Entregar
     return dias_disponibles
+
+
+def validate_cit_dia_disponible(db: Session, fecha: date) -> date:
+    """Validar que la fecha sea un dia disponible, con las mismas reglas que get_cit_dias_disponibles pero sin armar todo el listado"""
+
+    # Validar que este dentro del rango a partir de manana y que no sea sabado o domingo
+    hoy_servidor = date.today()
+    if fecha <= hoy_servidor or fecha >= hoy_servidor + timedelta(LIMITE_DIAS) or fecha.weekday() in (5, 6):
+        raise ValueError("No es valida la fecha")
+
+    # Validar que no sea dia inhabil
+    calendario = calendario_dias_inhabiles.cargar(db)
+    if not calendario.is_habil(fecha):
+        raise ValueError("No es valida la fecha")
+
+    # Si se quita el primer dia disponible, validar que la fecha no sea ese primer dia
+    if quitar_primer_dia_disponible(calendario.dias_inhabiles):
+        if calendario.dia_habil_siguiente(hoy_servidor) == fecha:
+            raise ValueError("No es valida la fecha")
+
+    # Entregar
+    return fecha
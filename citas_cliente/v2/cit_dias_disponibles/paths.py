@@ -3,28 +3,43 @@ Cit Dias Disponibles V2, rutas (paths)
 """
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi_pagination import Page, paginate
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from lib.database import get_db
+from lib.database import get_async_db, get_db_replica
 
 from ...core.permisos.models import Permiso
-from ..cit_clientes.authentications import get_current_active_user
-from ..cit_clientes.schemas import CitClienteInDB
+from ..cit_clientes.authentications import get_current_active_user, get_current_active_user_async
+from ..cit_clientes.schemas import CitClienteSesion
 
-from .crud import get_cit_dias_disponibles
+from .crud import get_cit_dias_disponibles, get_cit_dias_disponibles_async
 from .schemas import CitDiaDisponibleOut
 
 cit_dias_disponibles_v2 = APIRouter(prefix="/v2/cit_dias_disponibles", tags=["dias disponibles"])
+cit_dias_disponibles_v2_asincrono = APIRouter(prefix="/v2/cit_dias_disponibles", tags=["dias disponibles"])
 
 
 @cit_dias_disponibles_v2.get("", response_model=Page[CitDiaDisponibleOut])
-async def listado_cit_dias_disponibles(
+def listado_cit_dias_disponibles(
     oficina_id: int,
-    current_user: CitClienteInDB = Depends(get_current_active_user),
-    db: Session = Depends(get_db),
+    current_user: CitClienteSesion = Depends(get_current_active_user),
+    db: Session = Depends(get_db_replica),
 ):
     """Listado de dias disponibles"""
     if "CIT DIAS DISPONIBLES" not in current_user.permissions or current_user.permissions["CIT DIAS DISPONIBLES"] < Permiso.VER:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Forbidden")
     resultado = [CitDiaDisponibleOut(fecha=item) for item in get_cit_dias_disponibles(db, oficina_id)]
     return paginate(resultado)
+
+
+@cit_dias_disponibles_v2_asincrono.get("", response_model=Page[CitDiaDisponibleOut])
+async def listado_cit_dias_disponibles_asincrono(
+    oficina_id: int,
+    current_user: CitClienteSesion = Depends(get_current_active_user_async),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Listado de dias disponibles"""
+    if "CIT DIAS DISPONIBLES" not in current_user.permissions or current_user.permissions["CIT DIAS DISPONIBLES"] < Permiso.VER:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Forbidden")
+    resultado = [CitDiaDisponibleOut(fecha=item) for item in await get_cit_dias_disponibles_async(db, oficina_id)]
+    return paginate(resultado)
@@ -0,0 +1,202 @@
+"""
+Cit Dias Inhabiles V2, calendario compartido por todo el proceso
+"""
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+
+from redis.exceptions import RedisError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from config.settings import CIT_DIAS_INHABILES_REFRESCAR_SEGUNDOS
+from lib.redis import redis
+
+from .crud import get_cit_dias_inhabiles, get_cit_dias_inhabiles_fechas_async
+
+CANAL = "cit_dias_inhabiles"
+REDIS_REINTENTAR_SEGUNDOS = 30
+
+# El indice de dias habiles cubre desde unos dias antes de hoy hasta mas alla del limite de los dias disponibles
+INDICE_DIAS_ANTES = 14
+INDICE_DIAS_DESPUES = 120
+
+
+@dataclass(frozen=True)
+class Carga:
+    """Dias inhabiles consultados con su indice, la version con que se consultaron, el dia y cuando vencen"""
+
+    version: int
+    hoy: date
+    vence: float
+    indice: tuple
+    dias_inhabiles: frozenset
+
+
+class CalendarioDiasInhabiles:
+    """Dias inhabiles cargados una sola vez por proceso
+
+    Se vuelven a cargar cuando cambia el dia, cuando pasan refrescar_segundos o cuando
+    llega cualquier mensaje al canal cit_dias_inhabiles de Redis.
+
+    Lo cargado es una Carga inmutable que se reemplaza en un solo paso, asi que quien la lee
+    nunca ve los dias inhabiles de una carga con el indice de otra y no necesita candado.
+    """
+
+    def __init__(self, refrescar_segundos: int):
+        self.refrescar_segundos = refrescar_segundos
+        self._carga = Carga(version=-1, hoy=None, vence=0.0, indice=(0, -1, []), dias_inhabiles=frozenset())
+        self._version = 0
+        self._candado_carga = threading.Lock()
+        self._candado_suscripcion = threading.Lock()
+        self._hilo = None
+        self._suscribir_despues = 0.0
+
+    @property
+    def dias_inhabiles(self) -> frozenset:
+        """Los dias inhabiles cargados"""
+        return self._carga.dias_inhabiles
+
+    def _vigente(self) -> bool:
+        """Lo cargado es de hoy, no ha vencido y no ha llegado un aviso desde que se consulto"""
+        carga = self._carga
+        return carga.version == self._version and carga.hoy == date.today() and time.monotonic() < carga.vence
+
+    def _suscripcion_fallo(self, error, pubsub, hilo):
+        """Detener el hilo de la suscripcion, se vuelve a intentar despues"""
+        hilo.stop()
+        pubsub.close()
+        self._suscribir_despues = time.monotonic() + REDIS_REINTENTAR_SEGUNDOS
+
+    def _suscribir(self):
+        """Suscribirse al canal de avisos en un hilo en el fondo, si no lo esta ya"""
+        if self._hilo is not None and self._hilo.is_alive():
+            return
+        if time.monotonic() < self._suscribir_despues or not self._candado_suscripcion.acquire(blocking=False):
+            return
+        try:
+            pubsub = redis.pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(**{CANAL: lambda mensaje: self.invalidar()})
+            self._hilo = pubsub.run_in_thread(sleep_time=1, daemon=True, exception_handler=self._suscripcion_fallo)
+        except RedisError:
+            self._suscribir_despues = time.monotonic() + REDIS_REINTENTAR_SEGUNDOS
+        else:
+            # Mientras no hubo suscripcion se pudo perder un aviso
+            self.invalidar()
+        finally:
+            self._candado_suscripcion.release()
+
+    def invalidar(self):
+        """Forzar que se vuelvan a cargar en la siguiente consulta"""
+        self._version += 1
+
+    def cargar(self, db: Session) -> "CalendarioDiasInhabiles":
+        """Cargar los dias inhabiles si lo cargado ya no esta vigente, entrega el mismo calendario
+
+        El candado solo lo toman los hilos de las rutas sincronas, para que consulte uno solo a la vez.
+        """
+        self._suscribir()
+        if self._vigente():
+            return self
+        with self._candado_carga:
+            if self._vigente():
+                return self
+            version = self._version
+            hoy = date.today()
+            self._guardar(version, hoy, frozenset(item.fecha for item in get_cit_dias_inhabiles(db).all()))
+        return self
+
+    async def cargar_async(self, db: AsyncSession) -> "CalendarioDiasInhabiles":
+        """Cargar los dias inhabiles con la sesion asincrona, sin tomar ningun candado
+
+        En el ciclo de eventos no se puede esperar el candado de los hilos, asi que varias peticiones
+        pueden consultar al mismo tiempo al vencer lo cargado, pero solo lo hacen una vez por intervalo.
+        """
+        self._suscribir()
+        if self._vigente():
+            return self
+        version = self._version
+        hoy = date.today()
+        self._guardar(version, hoy, frozenset(await get_cit_dias_inhabiles_fechas_async(db)))
+        return self
+
+    def _guardar(self, version: int, hoy: date, dias_inhabiles: frozenset):
+        """Reemplazar lo cargado en un solo paso, si llego un aviso durante la consulta la version ya no es vigente"""
+        self._carga = Carga(
+            version=version,
+            hoy=hoy,
+            vence=time.monotonic() + self.refrescar_segundos,
+            indice=self._indexar(hoy, dias_inhabiles),
+            dias_inhabiles=dias_inhabiles,
+        )
+
+    @staticmethod
+    def _indexar(hoy: date, dias_inhabiles: frozenset) -> tuple:
+        """Definir el rango de ordinales que cubre el indice y la lista ordenada de los ordinales de los dias habiles"""
+        desde = hoy.toordinal() - INDICE_DIAS_ANTES
+        hasta = hoy.toordinal() + INDICE_DIAS_DESPUES
+        habiles = []
+        for ordinal in range(desde, hasta + 1):
+            fecha = date.fromordinal(ordinal)
+            if fecha.weekday() < 5 and fecha not in dias_inhabiles:
+                habiles.append(ordinal)
+        return desde, hasta, habiles
+
+    def is_habil(self, fecha: date) -> bool:
+        """La fecha no es sabado, domingo ni dia inhabil"""
+        return fecha.weekday() < 5 and fecha not in self._carga.dias_inhabiles
+
+    @staticmethod
+    def _es_habil(fecha: date, dias_inhabiles: frozenset) -> bool:
+        """La fecha no es sabado, domingo ni uno de los dias inhabiles dados"""
+        return fecha.weekday() < 5 and fecha not in dias_inhabiles
+
+    def dia_habil_anterior(self, fecha: date) -> date:
+        """El dia habil mas cercano antes de la fecha"""
+        carga = self._carga
+        desde, hasta, habiles = carga.indice
+        ordinal = fecha.toordinal()
+        indice = bisect_left(habiles, ordinal)
+        if indice > 0 and ordinal <= hasta + 1:
+            return date.fromordinal(habiles[indice - 1])
+
+        # Fuera del indice se busca dia por dia
+        fecha = fecha - timedelta(days=1)
+        while not self._es_habil(fecha, carga.dias_inhabiles):
+            fecha = fecha - timedelta(days=1)
+        return fecha
+
+    def dia_habil_siguiente(self, fecha: date) -> date:
+        """El dia habil mas cercano despues de la fecha"""
+        carga = self._carga
+        desde, hasta, habiles = carga.indice
+        ordinal = fecha.toordinal()
+        indice = bisect_right(habiles, ordinal)
+        if indice < len(habiles) and ordinal >= desde - 1:
+            return date.fromordinal(habiles[indice])
+
+        # Fuera del indice se busca dia por dia
+        fecha = fecha + timedelta(days=1)
+        while not self._es_habil(fecha, carga.dias_inhabiles):
+            fecha = fecha + timedelta(days=1)
+        return fecha
+
+    def dias_habiles(self, desde: date, hasta: date) -> list:
+        """Los dias habiles entre las dos fechas, incluyendolas"""
+        carga = self._carga
+        indice_desde, indice_hasta, habiles = carga.indice
+        if desde.toordinal() < indice_desde or hasta.toordinal() > indice_hasta:
+            return [desde + timedelta(n) for n in range((hasta - desde).days + 1) if self._es_habil(desde + timedelta(n), carga.dias_inhabiles)]
+        return [date.fromordinal(ordinal) for ordinal in habiles[bisect_left(habiles, desde.toordinal()) : bisect_right(habiles, hasta.toordinal())]]
+
+    def horas_antes_en_dia_habil(self, tiempo: datetime, horas: int) -> datetime:
+        """Restar las horas al tiempo, si cae en un dia que no es habil se cambia al dia habil anterior con la misma hora"""
+        tiempo = tiempo - timedelta(hours=horas)
+        if self.is_habil(tiempo.date()):
+            return tiempo
+        return datetime.combine(self.dia_habil_anterior(tiempo.date()), tiempo.time())
+
+
+calendario_dias_inhabiles = CalendarioDiasInhabiles(refrescar_segundos=CIT_DIAS_INHABILES_REFRESCAR_SEGUNDOS)
@@ -3,6 +3,8 @@ Cit Dias Inhabiles V2, CRUD (create, read, update, and delete)
 """
 from datetime import date
 from typing import Any
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from ...core.cit_dias_inhabiles.models import CitDiaInhabil
@@ -17,3 +19,9 @@ def get_cit_dias_inhabiles(db: Session) -> Any:
 
     # Entregar
     return consulta.filter_by(estatus="A").order_by(CitDiaInhabil.id)
+
+
+async def get_cit_dias_inhabiles_fechas_async(db: AsyncSession) -> list:
+    """Consultar las fechas de los dias inhabiles activos, de forma asincrona"""
+    consulta = select(CitDiaInhabil.fecha).filter(CitDiaInhabil.fecha >= date.today()).filter_by(estatus="A").order_by(CitDiaInhabil.id)
+    return (await db.execute(consulta)).scalars().all()
@@ -0,0 +1,61 @@
+"""
+Cit Disponibilidad V2, CRUD (create, read, update, and delete)
+"""
+from datetime import time
+from sqlalchemy.orm import Session
+
+from ..cit_citas_anonimas.crud import get_cit_citas_anonimas_cantidades
+from ..cit_dias_disponibles.crud import get_cit_dias_disponibles
+from ..cit_horas_bloqueadas.crud import get_horas_bloquedas
+from ..cit_horas_disponibles.crud import calcular_cit_horas_disponibles, definir_cit_horas_intervalos, get_oficina_cit_servicio, minutos_del_dia
+from .schemas import CitDisponibilidadDiaOut, CitDisponibilidadOut
+
+
+def get_cit_disponibilidad(db: Session, oficina_id: int, cit_servicio_id: int) -> CitDisponibilidadOut:
+    """Consultar la disponibilidad de todos los dias disponibles, con la cantidad y el mapa de horas disponibles por dia"""
+
+    # Consultar la oficina y el servicio
+    oficina, cit_servicio = get_oficina_cit_servicio(db, oficina_id, cit_servicio_id)
+
+    # Definir los intervalos del dia, son los mismos para todos los dias
+    intervalos = definir_cit_horas_intervalos(oficina, cit_servicio)
+
+    # Consultar los dias disponibles
+    dias_disponibles = get_cit_dias_disponibles(db, oficina_id=oficina_id)
+    if len(dias_disponibles) == 0:
+        raise ValueError("No hay dias disponibles")
+    desde = dias_disponibles[0]
+    hasta = dias_disponibles[-1]
+
+    # Consultar las horas bloqueadas de todo el rango y separarlas por fecha
+    cit_horas_bloqueadas_por_fecha = {}
+    for cit_hora_bloqueada in get_horas_bloquedas(db, oficina_id=oficina_id, fecha=desde, hasta=hasta).all():
+        cit_horas_bloqueadas_por_fecha.setdefault(cit_hora_bloqueada.fecha, []).append(cit_hora_bloqueada)
+
+    # Consultar las citas agendadas de todo el rango, agrupadas por tiempo de inicio, y separarlas por fecha
+    citas_ya_agendadas_por_fecha = {}
+    for tiempo, cantidad in get_cit_citas_anonimas_cantidades(db, oficina_id=oficina_id, fecha=desde, hasta=hasta).items():
+        citas_ya_agendadas_por_fecha.setdefault(tiempo.date(), {})[tiempo] = cantidad
+
+    # Calcular cada dia con la misma regla que las horas disponibles
+    dias = []
+    for fecha in dias_disponibles:
+        horas_disponibles = calcular_cit_horas_disponibles(
+            oficina=oficina,
+            cit_servicio=cit_servicio,
+            fecha=fecha,
+            cit_horas_bloqueadas=cit_horas_bloqueadas_por_fecha.get(fecha, []),
+            citas_ya_agendadas=citas_ya_agendadas_por_fecha.get(fecha, {}),
+        )
+        minutos_disponibles = {minutos_del_dia(hora) for hora in horas_disponibles}
+        mapa = "".join("1" if tiempo in minutos_disponibles else "0" for tiempo in intervalos)
+        dias.append(CitDisponibilidadDiaOut(fecha=fecha, cantidad=len(horas_disponibles), mapa=mapa))
+
+    # Entregar
+    return CitDisponibilidadOut(
+        oficina_id=oficina.id,
+        cit_servicio_id=cit_servicio.id,
+        apertura=time(hour=intervalos.start // 60, minute=intervalos.start % 60),
+        duracion_minutos=intervalos.step,
+        dias=dias,
+    )
@@ -0,0 +1,37 @@
+"""
+Cit Disponibilidad V2, rutas (paths)
+"""
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.orm import Session
+
+from ...core.permisos.models import Permiso
+from ..cit_clientes.authentications import get_current_active_user, get_db_lectura_cliente
+from ..cit_clientes.schemas import CitClienteSesion
+
+from .crud import get_cit_disponibilidad
+from .schemas import CitDisponibilidadOut
+
+cit_disponibilidad_v2 = APIRouter(prefix="/v2/cit_disponibilidad", tags=["horas disponibles"])
+
+
+@cit_disponibilidad_v2.get("", response_model=CitDisponibilidadOut)
+def detalle_cit_disponibilidad(
+    cit_servicio_id: int,
+    oficina_id: int,
+    current_user: CitClienteSesion = Depends(get_current_active_user),
+    db: Session = Depends(get_db_lectura_cliente),
+):
+    """Disponibilidad de los dias disponibles, con la cantidad y el mapa de horas disponibles de cada dia"""
+    if "CIT HORAS DISPONIBLES" not in current_user.permissions or current_user.permissions["CIT HORAS DISPONIBLES"] < Permiso.VER:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Forbidden")
+    try:
+        cit_disponibilidad = get_cit_disponibilidad(
+            db,
+            cit_servicio_id=cit_servicio_id,
+            oficina_id=oficina_id,
+        )
+    except IndexError as error:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Not found: {str(error)}") from error
+    except ValueError as error:
+        raise HTTPException(status_code=status.HTTP_406_NOT_ACCEPTABLE, detail=f"Not acceptable: {str(error)}") from error
+    return cit_disponibilidad
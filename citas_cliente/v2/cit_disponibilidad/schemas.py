@@ -0,0 +1,24 @@
+"""
+Cit Disponibilidad V2, esquemas de pydantic
+"""
+from datetime import date, time
+from typing import List
+from pydantic import BaseModel
+
+
+class CitDisponibilidadDiaOut(BaseModel):
+    """Esquema para entregar la disponibilidad de un dia"""
+
+    fecha: date
+    cantidad: int
+    mapa: str
+
+
+class CitDisponibilidadOut(BaseModel):
+    """Esquema para entregar la disponibilidad de los dias, el mapa tiene un caracter por intervalo a partir de apertura, 1 es disponible y 0 no"""
+
+    oficina_id: int
+    cit_servicio_id: int
+    apertura: time
+    duracion_minutos: int
+    dias: List[CitDisponibilidadDiaOut]
@@ -9,16 +9,19 @@ from ...core.cit_horas_bloqueadas.models import CitHoraBloqueada
 from ..oficinas.crud import get_oficina
 
 
-def get_horas_bloquedas(db: Session, oficina_id: int, fecha: date) -> Any:
-    """Consultar las horas bloqueadas de una oficina en una fecha dada"""
+def get_horas_bloquedas(db: Session, oficina_id: int, fecha: date, hasta: date = None) -> Any:
+    """Consultar las horas bloqueadas de una oficina en una fecha dada, o desde la fecha hasta otra"""
     consulta = db.query(CitHoraBloqueada)
 
     # Filtro por oficina
     oficina = get_oficina(db, oficina_id)
     consulta = consulta.filter(CitHoraBloqueada.oficina == oficina)
 
-    # Filtro por fecha
-    consulta = consulta.filter(CitHoraBloqueada.fecha == fecha)
+    # Filtro por fecha o por rango de fechas
+    if hasta is None:
+        consulta = consulta.filter(CitHoraBloqueada.fecha == fecha)
+    else:
+        consulta = consulta.filter(CitHoraBloqueada.fecha >= fecha).filter(CitHoraBloqueada.fecha <= hasta)
 
     # Entregar
     return consulta.filter_by(estatus="A").order_by(CitHoraBloqueada.id)
@@ -1,36 +1,59 @@
 """
 Cit Horas Disponibles V2, CRUD (create, read, update, and delete)
 """
-from datetime import date, timedelta, datetime
+from datetime import date, time
 from typing import Any
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 
-from ..cit_citas_anonimas.crud import get_cit_citas_anonimas
-from ..cit_dias_disponibles.crud import get_cit_dias_disponibles
+from config.settings import CIT_HORAS_DISPONIBLES_CACHE_TTL
+from lib.cache import Cache
+
+from ...core.cit_oficinas_servicios.models import CitOficinaServicio
+from ...core.cit_servicios.models import CitServicio
+from ...core.oficinas.models import Oficina
+from ..cit_citas_anonimas.crud import get_cit_citas_anonimas_cantidades
+from ..cit_dias_disponibles.crud import validate_cit_dia_disponible
 from ..cit_horas_bloqueadas.crud import get_horas_bloquedas
 from ..cit_servicios.crud import get_cit_servicio
 from ..oficinas.crud import get_oficina
 
 LIMITE_DIAS = 90
 
+# Cache de las horas disponibles, agrupadas por oficina y fecha para invalidarlas al agendar o cancelar
+cit_horas_disponibles_cache = Cache(prefijo="cit_horas_disponibles", ttl=CIT_HORAS_DISPONIBLES_CACHE_TTL)
 
-def get_cit_horas_disponibles(
-    db: Session,
-    oficina_id: int,
-    cit_servicio_id: int,
-    fecha: date,
-) -> Any:
-    """Consultar las horas disponibles, entrega un listado de horas"""
 
-    # Consultar oficina
-    oficina = get_oficina(db, oficina_id)
+def get_oficina_cit_servicio(db: Session, oficina_id: int, cit_servicio_id: int) -> tuple:
+    """Consultar la oficina, el servicio y si la oficina ofrece el servicio en una sola consulta"""
 
-    # Consultar el servicio
-    cit_servicio = get_cit_servicio(db, cit_servicio_id)
+    ofrece = select(CitOficinaServicio.id).where(CitOficinaServicio.oficina_id == Oficina.id).where(CitOficinaServicio.cit_servicio_id == CitServicio.id).where(CitOficinaServicio.estatus == "A").exists()
+    fila = db.query(Oficina, CitServicio, ofrece).join(CitServicio, CitServicio.id == cit_servicio_id).filter(Oficina.id == oficina_id).first()
+
+    # Si alguno no existe, al consultarlos por separado se causa el IndexError que corresponda
+    if fila is None:
+        get_oficina(db, oficina_id)
+        get_cit_servicio(db, cit_servicio_id)
+        raise IndexError("No existe esa oficina o ese servicio")
+
+    # Validar, get_oficina y get_cit_servicio los toman del mapa de identidad sin volver a consultar
+    oficina, cit_servicio, es_ofrecido = fila
+    get_oficina(db, oficina.id)
+    get_cit_servicio(db, cit_servicio.id)
+    if not es_ofrecido:
+        raise ValueError("No es posible agendar este servicio en esta oficina")
+
+    # Entregar
+    return oficina, cit_servicio
+
+
+def minutos_del_dia(tiempo: Any) -> int:
+    """Convertir un time o datetime a minutos desde la medianoche, descartando los segundos"""
+    return tiempo.hour * 60 + tiempo.minute
 
-    # Validar la fecha, debe ser un dia disponible
-    if fecha not in get_cit_dias_disponibles(db, oficina_id=oficina_id):
-        raise ValueError("No es valida la fecha")
+
+def definir_cit_horas_intervalos(oficina: Oficina, cit_servicio: CitServicio) -> range:
+    """Definir los intervalos en minutos del dia en que se puede agendar el servicio en la oficina"""
 
     # Tomar los tiempos de inicio y termino de la oficina
     apertura = oficina.apertura
@@ -44,79 +67,115 @@ def get_cit_horas_disponibles(
     if cit_servicio.hasta and cierre > cit_servicio.hasta:
         cierre = cit_servicio.hasta
 
-    # Definir los tiempos de inicio, de final y el timedelta de la duracion
-    tiempo_inicial = datetime(
-        year=fecha.year,
-        month=fecha.month,
-        day=fecha.day,
-        hour=apertura.hour,
-        minute=apertura.minute,
-        second=0,
-    )
-    tiempo_final = datetime(
-        year=fecha.year,
-        month=fecha.month,
-        day=fecha.day,
-        hour=cierre.hour,
-        minute=cierre.minute,
-        second=0,
-    )
-    duracion = timedelta(
-        hours=cit_servicio.duracion.hour,
-        minutes=cit_servicio.duracion.minute,
-    )
+    # Definir los tiempos de inicio, de final y la duracion, todo en minutos del dia
+    tiempo_inicial = minutos_del_dia(apertura)
+    tiempo_final = minutos_del_dia(cierre)
+    duracion = minutos_del_dia(cit_servicio.duracion)
+    if duracion <= 0:
+        raise ValueError("No es valida la duracion del servicio")
+
+    # Entregar
+    return range(tiempo_inicial, tiempo_final, duracion)
+
 
-    # Consultar las horas bloquedas y convertirlas a datetime para compararlas
+def calcular_cit_horas_disponibles(
+    oficina: Oficina,
+    cit_servicio: CitServicio,
+    fecha: date,
+    cit_horas_bloqueadas: list,
+    citas_ya_agendadas: dict,
+) -> list:
+    """Calcular las horas disponibles a partir de la foto en memoria de la oficina en la fecha"""
+
+    # Juntar las horas bloqueadas en intervalos [inicia, termina) ordenados y sin traslapes
     tiempos_bloqueados = []
-    cit_horas_bloqueadas = get_horas_bloquedas(db, oficina_id=oficina_id, fecha=fecha).all()
-    for cit_hora_bloqueada in cit_horas_bloqueadas:
-        tiempo_bloquedo_inicia = datetime(
-            year=fecha.year,
-            month=fecha.month,
-            day=fecha.day,
-            hour=cit_hora_bloqueada.inicio.hour,
-            minute=cit_hora_bloqueada.inicio.minute,
-            second=0,
-        )
-        tiempo_bloquedo_termina = datetime(
-            year=fecha.year,
-            month=fecha.month,
-            day=fecha.day,
-            hour=cit_hora_bloqueada.termino.hour,
-            minute=cit_hora_bloqueada.termino.minute,
-            second=0,
-        ) - timedelta(minutes=1)
-        tiempos_bloqueados.append((tiempo_bloquedo_inicia, tiempo_bloquedo_termina))
-
-    # Acumular las citas agendadas en un diccionario de tiempos y cantidad de citas, para la oficina en la fecha
-    # { 08:30: 2, 08:45: 1, 10:00: 2,... }
-    citas_ya_agendadas = {}
-    for cit_cita in get_cit_citas_anonimas(db, oficina_id=oficina_id, fecha=fecha).all():
-        if cit_cita.inicio not in citas_ya_agendadas:
-            citas_ya_agendadas[cit_cita.inicio] = 1
+    for inicia, termina in sorted((minutos_del_dia(item.inicio), minutos_del_dia(item.termino)) for item in cit_horas_bloqueadas):
+        if termina <= inicia:
+            continue
+        if tiempos_bloqueados and inicia <= tiempos_bloqueados[-1][1]:
+            tiempos_bloqueados[-1][1] = max(tiempos_bloqueados[-1][1], termina)
         else:
-            citas_ya_agendadas[cit_cita.inicio] += 1
+            tiempos_bloqueados.append([inicia, termina])
+
+    # Definir los tiempos que ya llegaron al limite de personas, solo cuentan los que caen exacto en el minuto
+    tiempos_ocupados = set()
+    for tiempo, cantidad in citas_ya_agendadas.items():
+        if cantidad >= oficina.limite_personas and tiempo.date() == fecha and tiempo.second == 0 and tiempo.microsecond == 0:
+            tiempos_ocupados.add(minutos_del_dia(tiempo))
 
-    # Bucle por los intervalos
+    # Barrer los intervalos junto con los bloqueos, como ambos van en orden cada bloqueo se revisa una sola vez
     horas_minutos_segundos_disponibles = []
-    tiempo = tiempo_inicial
-    while tiempo < tiempo_final:
-        # Bandera
-        es_hora_disponible = True
+    indice = 0
+    for tiempo in definir_cit_horas_intervalos(oficina, cit_servicio):
+        # Avanzar los bloqueos que ya terminaron
+        while indice < len(tiempos_bloqueados) and tiempos_bloqueados[indice][1] <= tiempo:
+            indice += 1
         # Quitar las horas bloqueadas
-        for tiempo_bloqueado in tiempos_bloqueados:
-            if tiempo_bloqueado[0] <= tiempo <= tiempo_bloqueado[1]:
-                es_hora_disponible = False
-                break
+        if indice < len(tiempos_bloqueados) and tiempos_bloqueados[indice][0] <= tiempo:
+            continue
         # Quitar las horas ocupadas
-        if tiempo in citas_ya_agendadas:
-            if citas_ya_agendadas[tiempo] >= oficina.limite_personas:
-                es_hora_disponible = False
-        # Acumular si es hora disponible
-        if es_hora_disponible:
-            horas_minutos_segundos_disponibles.append(tiempo.time())
-        # Siguiente intervalo
-        tiempo = tiempo + duracion
+        if tiempo in tiempos_ocupados:
+            continue
+        # Acumular la hora disponible
+        horas_minutos_segundos_disponibles.append(time(hour=tiempo // 60, minute=tiempo % 60))
+
+    # Entregar
+    return horas_minutos_segundos_disponibles
+
+
+def consultar_cit_horas_disponibles(
+    db: Session,
+    oficina_id: int,
+    cit_servicio_id: int,
+    fecha: date,
+) -> list:
+    """Consultar la base de datos y calcular las horas disponibles, sin usar el cache"""
+
+    # Consultar la oficina y el servicio
+    oficina, cit_servicio = get_oficina_cit_servicio(db, oficina_id, cit_servicio_id)
+
+    # Validar la fecha, debe ser un dia disponible
+    validate_cit_dia_disponible(db, fecha)
+
+    # Consultar las horas bloqueadas de la oficina en la fecha
+    cit_horas_bloqueadas = get_horas_bloquedas(db, oficina_id=oficina_id, fecha=fecha).all()
+
+    # Consultar las citas agendadas, agrupadas en un diccionario de tiempos y cantidad de citas
+    citas_ya_agendadas = get_cit_citas_anonimas_cantidades(db, oficina_id=oficina_id, fecha=fecha)
+
+    # Calcular las horas disponibles con lo consultado
+    return calcular_cit_horas_disponibles(
+        oficina=oficina,
+        cit_servicio=cit_servicio,
+        fecha=fecha,
+        cit_horas_bloqueadas=cit_horas_bloqueadas,
+        citas_ya_agendadas=citas_ya_agendadas,
+    )
+
+
+def get_cit_horas_disponibles(
+    db: Session,
+    oficina_id: int,
+    cit_servicio_id: int,
+    fecha: date,
+) -> Any:
+    """Consultar las horas disponibles, entrega un listado de horas"""
+
+    # Consultar el cache, agrupado por oficina y fecha
+    grupo = f"{oficina_id}:{fecha.isoformat()}"
+    guardadas = cit_horas_disponibles_cache.obtener(grupo, cit_servicio_id)
+
+    # Si no estan en el cache, calcularlas y guardarlas, si se agenda o cancela mientras se calculan no se guardan
+    if guardadas is None:
+        generacion = cit_horas_disponibles_cache.generacion(grupo)
+        horas_minutos_segundos_disponibles = consultar_cit_horas_disponibles(db, oficina_id, cit_servicio_id, fecha)
+        cit_horas_disponibles_cache.guardar(grupo, cit_servicio_id, [item.isoformat() for item in horas_minutos_segundos_disponibles], generacion=generacion)
+
+    # Si estan en el cache, validar de nuevo la oficina, el servicio y la fecha, porque pudieron cambiar despues de guardarlas
+    else:
+        get_oficina_cit_servicio(db, oficina_id, cit_servicio_id)
+        validate_cit_dia_disponible(db, fecha)
+        horas_minutos_segundos_disponibles = [time.fromisoformat(item) for item in guardadas]
 
     # Que hacer cuando no haya horas_minutos_segundos_disponibles
     if len(horas_minutos_segundos_disponibles) == 0:
@@ -124,3 +183,8 @@ def get_cit_horas_disponibles(
 
     # Entregar
     return horas_minutos_segundos_disponibles
+
+
+def invalidate_cit_horas_disponibles(oficina_id: int, fecha: date):
+    """Invalidar las horas disponibles en el cache de todos los servicios de la oficina en la fecha"""
+    cit_horas_disponibles_cache.invalidar(f"{oficina_id}:{fecha.isoformat()}")
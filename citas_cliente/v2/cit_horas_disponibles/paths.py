@@ -10,7 +10,7 @@ from lib.database import get_db
 
 from ...core.permisos.models import Permiso
 from ..cit_clientes.authentications import get_current_active_user
-from ..cit_clientes.schemas import CitClienteInDB
+from ..cit_clientes.schemas import CitClienteSesion
 
 from .crud import get_cit_horas_disponibles
 from .schemas import CitHoraDisponibleOut
@@ -19,11 +19,11 @@ cit_horas_disponibles_v2 = APIRouter(prefix="/v2/cit_horas_disponibles", tags=["
 
 
 @cit_horas_disponibles_v2.get("", response_model=Page[CitHoraDisponibleOut])
-async def listado_cit_horas_disponibles(
+def listado_cit_horas_disponibles(
     cit_servicio_id: int,
     fecha: date,
     oficina_id: int,
-    current_user: CitClienteInDB = Depends(get_current_active_user),
+    current_user: CitClienteSesion = Depends(get_current_active_user),
     db: Session = Depends(get_db),
 ):
     """Listado de horas disponibles"""
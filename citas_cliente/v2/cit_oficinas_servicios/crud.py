@@ -2,11 +2,13 @@
 Cit Oficinas Servicios V2, CRUD (create, read, update, and delete)
 """
 from typing import Any
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, joinedload
 
 from ...core.cit_oficinas_servicios.models import CitOficinaServicio
-from ..cit_servicios.crud import get_cit_servicio
-from ..oficinas.crud import get_oficina
+from ..cit_servicios.crud import get_cit_servicio, get_cit_servicio_async
+from ..oficinas.crud import get_oficina, get_oficina_async
 
 
 def get_cit_oficinas_servicios(
@@ -14,8 +16,8 @@ def get_cit_oficinas_servicios(
     cit_servicio_id: int = None,
     oficina_id: int = None,
 ) -> Any:
-    """Consultar los oficinas-servicios activos"""
-    consulta = db.query(CitOficinaServicio)
+    """Consultar los oficinas-servicios activos, con el servicio y la oficina que entrega CitOficinaServicioOut"""
+    consulta = db.query(CitOficinaServicio).options(joinedload(CitOficinaServicio.cit_servicio), joinedload(CitOficinaServicio.oficina))
     if cit_servicio_id:
         cit_servicio = get_cit_servicio(db, cit_servicio_id)
         consulta = consulta.filter(CitOficinaServicio.cit_servicio == cit_servicio)
@@ -25,6 +27,22 @@ def get_cit_oficinas_servicios(
     return consulta.filter_by(estatus="A").order_by(CitOficinaServicio.id)
 
 
+async def get_cit_oficinas_servicios_async(
+    db: AsyncSession,
+    cit_servicio_id: int = None,
+    oficina_id: int = None,
+) -> Any:
+    """Consultar los oficinas-servicios activos, entrega la consulta para paginar de forma asincrona"""
+    consulta = select(CitOficinaServicio).options(joinedload(CitOficinaServicio.cit_servicio), joinedload(CitOficinaServicio.oficina))
+    if cit_servicio_id:
+        cit_servicio = await get_cit_servicio_async(db, cit_servicio_id)
+        consulta = consulta.filter(CitOficinaServicio.cit_servicio_id == cit_servicio.id)
+    if oficina_id:
+        oficina = await get_oficina_async(db, oficina_id)
+        consulta = consulta.filter(CitOficinaServicio.oficina_id == oficina.id)
+    return consulta.filter_by(estatus="A").order_by(CitOficinaServicio.id)
+
+
 def get_cit_oficina_servicio(db: Session, cit_oficina_servicio_id: int) -> CitOficinaServicio:
     """Consultar un oficina-servicio por su id"""
     cit_oficina_servicio = db.query(CitOficinaServicio).get(cit_oficina_servicio_id)
@@ -2,28 +2,30 @@
 Cit Oficinas Servicios V2, rutas (paths)
 """
 from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi_pagination.ext.sqlalchemy import paginate
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from lib.database import get_db
+from lib.database import get_async_db, get_db_replica
 from lib.fastapi_pagination import LimitOffsetPage
+from lib.fastapi_pagination_totales import paginate, paginate_async
 
 from ...core.permisos.models import Permiso
-from ..cit_clientes.authentications import get_current_active_user
-from ..cit_clientes.schemas import CitClienteInDB
+from ..cit_clientes.authentications import get_current_active_user, get_current_active_user_async
+from ..cit_clientes.schemas import CitClienteSesion
 
-from .crud import get_cit_oficinas_servicios, get_cit_oficina_servicio
+from .crud import get_cit_oficinas_servicios, get_cit_oficinas_servicios_async, get_cit_oficina_servicio
 from .schemas import CitOficinaServicioOut
 
 cit_oficinas_servicios_v2 = APIRouter(prefix="/v2/cit_oficinas_servicios", tags=["servicios"])
+cit_oficinas_servicios_v2_asincrono = APIRouter(prefix="/v2/cit_oficinas_servicios", tags=["servicios"])
 
 
 @cit_oficinas_servicios_v2.get("", response_model=LimitOffsetPage[CitOficinaServicioOut])
-async def listado_cit_oficinas_servicios(
+def listado_cit_oficinas_servicios(
     cit_servicio_id: int = None,
     oficina_id: int = None,
-    current_user: CitClienteInDB = Depends(get_current_active_user),
-    db: Session = Depends(get_db),
+    current_user: CitClienteSesion = Depends(get_current_active_user),
+    db: Session = Depends(get_db_replica),
 ):
     """Listado de oficinas-servicios"""
     if "CIT OFICINAS SERVICIOS" not in current_user.permissions or current_user.permissions["CIT OFICINAS SERVICIOS"] < Permiso.VER:
@@ -32,10 +34,10 @@ async def listado_cit_oficinas_servicios(
 
 
 @cit_oficinas_servicios_v2.get("/{cit_oficina_servicio_id}", response_model=CitOficinaServicioOut)
-async def detalle_cit_oficina_servicio(
+def detalle_cit_oficina_servicio(
     cit_oficina_servicio_id: int,
-    current_user: CitClienteInDB = Depends(get_current_active_user),
-    db: Session = Depends(get_db),
+    current_user: CitClienteSesion = Depends(get_current_active_user),
+    db: Session = Depends(get_db_replica),
 ):
     """Detalle de un oficina-servicio a partir de su id"""
     if "CIT OFICINAS SERVICIOS" not in current_user.permissions or current_user.permissions["CIT OFICINAS SERVICIOS"] < Permiso.VER:
@@ -47,3 +49,16 @@ async def detalle_cit_oficina_servicio(
     except ValueError as error:
         raise HTTPException(status_code=status.HTTP_406_NOT_ACCEPTABLE, detail=f"Not acceptable: {str(error)}") from error
     return CitOficinaServicioOut.from_orm(cit_oficina_servicio)
+
+
+@cit_oficinas_servicios_v2_asincrono.get("", response_model=LimitOffsetPage[CitOficinaServicioOut])
+async def listado_cit_oficinas_servicios_asincrono(
+    cit_servicio_id: int = None,
+    oficina_id: int = None,
+    current_user: CitClienteSesion = Depends(get_current_active_user_async),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Listado de oficinas-servicios"""
+    if "CIT OFICINAS SERVICIOS" not in current_user.permissions or current_user.permissions["CIT OFICINAS SERVICIOS"] < Permiso.VER:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Forbidden")
+    return await paginate_async(db, await get_cit_oficinas_servicios_async(db, cit_servicio_id, oficina_id))
@@ -2,15 +2,16 @@
 Cit Servicios V2, CRUD (create, read, update, and delete)
 """
 from typing import Any
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, joinedload
 
 from ...core.cit_servicios.models import CitServicio
 from ..cit_categorias.crud import get_cit_categoria
 
 
 def get_cit_servicios(db: Session, cit_categoria_id: int = None) -> Any:
-    """Consultar los servicios activos"""
-    consulta = db.query(CitServicio)
+    """Consultar los servicios activos, con la categoria que entrega CitServicioOut"""
+    consulta = db.query(CitServicio).options(joinedload(CitServicio.cit_categoria))
     if cit_categoria_id:
         cit_categoria = get_cit_categoria(db, cit_categoria_id)
         consulta = consulta.filter(CitServicio.cit_categoria == cit_categoria)
@@ -25,3 +26,13 @@ def get_cit_servicio(db: Session, cit_servicio_id: int) -> CitServicio:
     if cit_servicio.estatus != "A":
         raise IndexError("No es activo ese servicio, está eliminado")
     return cit_servicio
+
+
+async def get_cit_servicio_async(db: AsyncSession, cit_servicio_id: int) -> CitServicio:
+    """Consultar un servicio por su id, de forma asincrona"""
+    cit_servicio = await db.get(CitServicio, cit_servicio_id)
+    if cit_servicio is None:
+        raise IndexError("No existe ese servicio")
+    if cit_servicio.estatus != "A":
+        raise IndexError("No es activo ese servicio, está eliminado")
+    return cit_servicio
@@ -1,40 +1,43 @@
 """
 Cit Servicios V2, rutas (paths)
 """
-from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi_pagination.ext.sqlalchemy import paginate
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from sqlalchemy.orm import Session
 
-from lib.database import get_db
+from lib.catalogos import catalogos
+from lib.database import get_db_replica
 from lib.fastapi_pagination import LimitOffsetPage
+from lib.fastapi_pagination_totales import paginate
 
 from ...core.permisos.models import Permiso
 from ..cit_clientes.authentications import get_current_active_user
-from ..cit_clientes.schemas import CitClienteInDB
+from ..cit_clientes.schemas import CitClienteSesion
 
 from .crud import get_cit_servicios, get_cit_servicio
 from .schemas import CitServicioOut
 
 cit_servicios_v2 = APIRouter(prefix="/v2/cit_servicios", tags=["servicios"])
 
+catalogo_cit_servicios = catalogos.crear("v2/cit_servicios", publico=False)
+
 
 @cit_servicios_v2.get("", response_model=LimitOffsetPage[CitServicioOut])
-async def listado_cit_servicios(
+def listado_cit_servicios(
+    request: Request,
     cit_categoria_id: int = None,
-    current_user: CitClienteInDB = Depends(get_current_active_user),
-    db: Session = Depends(get_db),
+    current_user: CitClienteSesion = Depends(get_current_active_user),
 ):
-    """Listado de servicios"""
+    """Listado de servicios, desde la instantanea del catalogo"""
     if "CIT SERVICIOS" not in current_user.permissions or current_user.permissions["CIT SERVICIOS"] < Permiso.VER:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Forbidden")
-    return paginate(get_cit_servicios(db, cit_categoria_id))
+    return catalogo_cit_servicios.responder(request, lambda db: paginate(get_cit_servicios(db, cit_categoria_id)))
 
 
 @cit_servicios_v2.get("/{cit_servicio_id}", response_model=CitServicioOut)
-async def detalle_cit_servicio(
+def detalle_cit_servicio(
     cit_servicio_id: int,
-    current_user: CitClienteInDB = Depends(get_current_active_user),
-    db: Session = Depends(get_db),
+    current_user: CitClienteSesion = Depends(get_current_active_user),
+    db: Session = Depends(get_db_replica),
 ):
     """Detalle de un servicio a partir de su id"""
     if "CIT SERVICIOS" not in current_user.permissions or current_user.permissions["CIT SERVICIOS"] < Permiso.VER:
@@ -2,6 +2,7 @@
 Distritos V2, CRUD (create, read, update, and delete)
 """
 from typing import Any
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from ...core.distritos.models import Distrito
@@ -20,3 +21,13 @@ def get_distrito(db: Session, distrito_id: int) -> Distrito:
     if distrito.estatus != "A":
         raise IndexError("No es activo el distrito, está eliminado")
     return distrito
+
+
+async def get_distrito_async(db: AsyncSession, distrito_id: int) -> Distrito:
+    """Consultar un distrito por su id, de forma asincrona"""
+    distrito = await db.get(Distrito, distrito_id)
+    if distrito is None:
+        raise IndexError("No existe ese distrito")
+    if distrito.estatus != "A":
+        raise IndexError("No es activo el distrito, está eliminado")
+    return distrito
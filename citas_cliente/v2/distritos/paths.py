@@ -2,15 +2,15 @@
 Distritos V2, rutas (paths)
 """
 from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi_pagination.ext.sqlalchemy import paginate
 from sqlalchemy.orm import Session
 
-from lib.database import get_db
+from lib.database import get_db_replica
 from lib.fastapi_pagination import LimitOffsetPage
+from lib.fastapi_pagination_totales import paginate
 
 from ...core.permisos.models import Permiso
 from ..cit_clientes.authentications import get_current_active_user
-from ..cit_clientes.schemas import CitClienteInDB
+from ..cit_clientes.schemas import CitClienteSesion
 
 from ..autoridades.crud import get_autoridades
 from ..autoridades.schemas import AutoridadOut
@@ -21,9 +21,9 @@ distritos = APIRouter(prefix="/v2/distritos", tags=["distritos"])
 
 
 @distritos.get("", response_model=LimitOffsetPage[DistritoOut])
-async def listado_distritos(
-    current_user: CitClienteInDB = Depends(get_current_active_user),
-    db: Session = Depends(get_db),
+def listado_distritos(
+    current_user: CitClienteSesion = Depends(get_current_active_user),
+    db: Session = Depends(get_db_replica),
 ):
     """Listado de distritos"""
     if "DISTRITOS" not in current_user.permissions or current_user.permissions["DISTRITOS"] < Permiso.VER:
@@ -32,10 +32,10 @@ async def listado_distritos(
 
 
 @distritos.get("/{distrito_id}", response_model=DistritoOut)
-async def detalle_distrito(
+def detalle_distrito(
     distrito_id: int,
-    current_user: CitClienteInDB = Depends(get_current_active_user),
-    db: Session = Depends(get_db),
+    current_user: CitClienteSesion = Depends(get_current_active_user),
+    db: Session = Depends(get_db_replica),
 ):
     """Detalle de un distrito"""
     if "DISTRITOS" not in current_user.permissions or current_user.permissions["DISTRITOS"] < Permiso.VER:
@@ -48,11 +48,11 @@ async def detalle_distrito(
 
 
 @distritos.get("/{distrito_id}/autoridades", response_model=LimitOffsetPage[AutoridadOut])
-async def listado_autoridades_del_distrito(
+def listado_autoridades_del_distrito(
     distrito_id: int,
     materia_id: int = None,
-    current_user: CitClienteInDB = Depends(get_current_active_user),
-    db: Session = Depends(get_db),
+    current_user: CitClienteSesion = Depends(get_current_active_user),
+    db: Session = Depends(get_db_replica),
 ):
     """Listado de autoridades del distrito"""
     if "AUTORIDADES" not in current_user.permissions or current_user.permissions["AUTORIDADES"] < Permiso.VER:
@@ -1,38 +1,41 @@
 """
 Domicilios V2, rutas (paths)
 """
-from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi_pagination.ext.sqlalchemy import paginate
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from sqlalchemy.orm import Session
 
+from lib.catalogos import catalogos
 from lib.database import get_db
 from lib.fastapi_pagination import LimitOffsetPage
+from lib.fastapi_pagination_totales import paginate
 
 from ...core.permisos.models import Permiso
 from ..cit_clientes.authentications import get_current_active_user
-from ..cit_clientes.schemas import CitClienteInDB
+from ..cit_clientes.schemas import CitClienteSesion
 
 from .crud import get_domicilios, get_domicilio
 from .schemas import DomicilioOut
 
 domicilios_v2 = APIRouter(prefix="/v2/domicilios", tags=["oficinas"])
 
+catalogo_domicilios = catalogos.crear("v2/domicilios", publico=False, sesion=get_db)
+
 
 @domicilios_v2.get("", response_model=LimitOffsetPage[DomicilioOut])
-async def listado_domicilios(
-    current_user: CitClienteInDB = Depends(get_current_active_user),
-    db: Session = Depends(get_db),
+def listado_domicilios(
+    request: Request,
+    current_user: CitClienteSesion = Depends(get_current_active_user),
 ):
-    """Listado de domicilios"""
+    """Listado de domicilios, desde la instantanea del catalogo"""
     if "DOMICILIOS" not in current_user.permissions or current_user.permissions["DOMICILIOS"] < Permiso.VER:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Forbidden")
-    return paginate(get_domicilios(db))
+    return catalogo_domicilios.responder(request, lambda db: paginate(get_domicilios(db)))
 
 
 @domicilios_v2.get("/{domicilio_id}", response_model=DomicilioOut)
-async def detalle_domicilio(
+def detalle_domicilio(
     domicilio_id: int,
-    current_user: CitClienteInDB = Depends(get_current_active_user),
+    current_user: CitClienteSesion = Depends(get_current_active_user),
     db: Session = Depends(get_db),
 ):
     """Detalle de un domicilio a partir de su id"""
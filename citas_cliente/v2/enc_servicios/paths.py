@@ -7,7 +7,7 @@ from sqlalchemy.orm import Session
 from lib.database import get_db
 
 from ..cit_clientes.authentications import get_current_active_user
-from ..cit_clientes.schemas import CitClienteInDB
+from ..cit_clientes.schemas import CitClienteSesion
 
 from .crud import validate_enc_servicio, update_enc_servicio, get_enc_servicio_url
 from .schemas import EncServicioIn, EncServicioOut, EncServicioURLOut
@@ -16,7 +16,7 @@ enc_servicios_v2 = APIRouter(prefix="/v2/enc_servicios", tags=["encuestas"])
 
 
 @enc_servicios_v2.get("/validar", response_model=EncServicioOut)
-async def encuesta_servicio_validar(
+def encuesta_servicio_validar(
     hashid: str = None,
     db: Session = Depends(get_db),
 ):
@@ -33,7 +33,7 @@ async def encuesta_servicio_validar(
 
 
 @enc_servicios_v2.post("/contestar", response_model=EncServicioOut)
-async def encuesta_servicio_contestar(
+def encuesta_servicio_contestar(
     encuesta: EncServicioIn,
     db: Session = Depends(get_db),
 ):
@@ -48,8 +48,8 @@ async def encuesta_servicio_contestar(
 
 
 @enc_servicios_v2.get("/pendiente", response_model=EncServicioURLOut)
-async def encuesta_servicio_pendiente(
-    current_user: CitClienteInDB = Depends(get_current_active_user),
+def encuesta_servicio_pendiente(
+    current_user: CitClienteSesion = Depends(get_current_active_user),
     db: Session = Depends(get_db),
 ):
     """Devuelve la URL de la encuesta de servicio PENDIENTE en caso de existir"""
@@ -1,16 +1,17 @@
 """
 Materias V2, rutas (paths)
 """
-from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi_pagination.ext.sqlalchemy import paginate
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from sqlalchemy.orm import Session
 
-from lib.database import get_db
+from lib.catalogos import catalogos
+from lib.database import get_db_replica
 from lib.fastapi_pagination import LimitOffsetPage
+from lib.fastapi_pagination_totales import paginate
 
 from ...core.permisos.models import Permiso
 from ..cit_clientes.authentications import get_current_active_user
-from ..cit_clientes.schemas import CitClienteInDB
+from ..cit_clientes.schemas import CitClienteSesion
 
 from ..autoridades.crud import get_autoridades
 from ..autoridades.schemas import AutoridadOut
@@ -19,23 +20,25 @@ from .schemas import MateriaOut
 
 materias_v2 = APIRouter(prefix="/v2/materias", tags=["materias"])
 
+catalogo_materias = catalogos.crear("v2/materias", publico=False)
+
 
 @materias_v2.get("", response_model=LimitOffsetPage[MateriaOut])
-async def listado_materias(
-    current_user: CitClienteInDB = Depends(get_current_active_user),
-    db: Session = Depends(get_db),
+def listado_materias(
+    request: Request,
+    current_user: CitClienteSesion = Depends(get_current_active_user),
 ):
-    """Listado de materias"""
+    """Listado de materias, desde la instantanea del catalogo"""
     if "MATERIAS" not in current_user.permissions or current_user.permissions["MATERIAS"] < Permiso.VER:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Forbidden")
-    return paginate(get_materias(db))
+    return catalogo_materias.responder(request, lambda db: paginate(get_materias(db)))
 
 
 @materias_v2.get("/{materia_id}", response_model=MateriaOut)
-async def detalle_materia(
+def detalle_materia(
     materia_id: int,
-    current_user: CitClienteInDB = Depends(get_current_active_user),
-    db: Session = Depends(get_db),
+    current_user: CitClienteSesion = Depends(get_current_active_user),
+    db: Session = Depends(get_db_replica),
 ):
     """Detalle de una materia a partir de su id"""
     if "MATERIAS" not in current_user.permissions or current_user.permissions["MATERIAS"] < Permiso.VER:
@@ -48,10 +51,10 @@ async def detalle_materia(
 
 
 @materias_v2.get("/{materia_id}/autoridades", response_model=LimitOffsetPage[AutoridadOut])
-async def listado_autoridades_de_materia(
+def listado_autoridades_de_materia(
     materia_id: int,
-    current_user: CitClienteInDB = Depends(get_current_active_user),
-    db: Session = Depends(get_db),
+    current_user: CitClienteSesion = Depends(get_current_active_user),
+    db: Session = Depends(get_db_replica),
 ):
     """Listado de autoridades de una materia"""
     if "AUTORIDADES" not in current_user.permissions or current_user.permissions["AUTORIDADES"] < Permiso.VER:
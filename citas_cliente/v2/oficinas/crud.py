@@ -2,21 +2,32 @@
 Oficinas V2, CRUD (create, read, update, and delete)
 """
 from typing import Any
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, joinedload
 
 from ...core.oficinas.models import Oficina
-from ..distritos.crud import get_distrito
+from ..distritos.crud import get_distrito, get_distrito_async
 
 
 def get_oficinas(db: Session, distrito_id: int = None) -> Any:
-    """Consultar las oficinas activas"""
-    consulta = db.query(Oficina)
+    """Consultar las oficinas activas, con el distrito y el domicilio que entrega OficinaOut"""
+    consulta = db.query(Oficina).options(joinedload(Oficina.distrito), joinedload(Oficina.domicilio))
     if distrito_id:
         distrito = get_distrito(db, distrito_id)  # Validar que exista el distrito
         consulta = consulta.filter(Oficina.distrito == distrito)
     return consulta.filter_by(estatus="A").filter_by(puede_agendar_citas=True).order_by(Oficina.clave)
 
 
+async def get_oficinas_async(db: AsyncSession, distrito_id: int = None) -> Any:
+    """Consultar las oficinas activas, entrega la consulta para paginar de forma asincrona"""
+    consulta = select(Oficina).options(joinedload(Oficina.distrito), joinedload(Oficina.domicilio))
+    if distrito_id:
+        distrito = await get_distrito_async(db, distrito_id)  # Validar que exista el distrito
+        consulta = consulta.filter(Oficina.distrito_id == distrito.id)
+    return consulta.filter_by(estatus="A").filter_by(puede_agendar_citas=True).order_by(Oficina.clave)
+
+
 def get_oficina(db: Session, oficina_id: int) -> Oficina:
     """Consultar una oficina por su id"""
     oficina = db.query(Oficina).get(oficina_id)
@@ -27,3 +38,15 @@ def get_oficina(db: Session, oficina_id: int) -> Oficina:
     if oficina.puede_agendar_citas is False:
         raise IndexError("No puede agendar citas en esta oficina")
     return oficina
+
+
+async def get_oficina_async(db: AsyncSession, oficina_id: int) -> Oficina:
+    """Consultar una oficina por su id, de forma asincrona"""
+    oficina = await db.get(Oficina, oficina_id)
+    if oficina is None:
+        raise IndexError("No existe ese oficina")
+    if oficina.estatus != "A":
+        raise IndexError("No es activo ese oficina, está eliminado")
+    if oficina.puede_agendar_citas is False:
+        raise IndexError("No puede agendar citas en esta oficina")
+    return oficina
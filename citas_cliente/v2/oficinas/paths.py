@@ -1,49 +1,58 @@
 """
 Oficinas V2, rutas (paths)
 """
-from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi_pagination.ext.sqlalchemy import paginate
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from lib.database import get_db
+from lib.catalogos import catalogos
+from lib.database import get_async_db, get_db_replica
 from lib.fastapi_pagination import LimitOffsetPage
+from lib.fastapi_pagination_totales import paginate, paginate_async
 
 from ...core.permisos.models import Permiso
-from ..cit_clientes.authentications import get_current_active_user
-from ..cit_clientes.schemas import CitClienteInDB
+from ..cit_clientes.authentications import get_current_active_user, get_current_active_user_async
+from ..cit_clientes.schemas import CitClienteSesion
 
-from .crud import get_oficinas, get_oficina
+from .crud import get_oficinas, get_oficinas_async, get_oficina
 from .schemas import OficinaOut
 
 oficinas_v2 = APIRouter(prefix="/v2/oficinas", tags=["oficinas"])
+oficinas_v2_asincrono = APIRouter(prefix="/v2/oficinas", tags=["oficinas"])
+
+catalogo_oficinas = catalogos.crear("v2/oficinas", publico=False)
 
 
 @oficinas_v2.get("/", response_model=LimitOffsetPage[OficinaOut])
-async def listado_oficinas(
+def listado_oficinas(
+    request: Request,
     distrito_id: int = None,
-    current_user: CitClienteInDB = Depends(get_current_active_user),
-    db: Session = Depends(get_db),
+    current_user: CitClienteSesion = Depends(get_current_active_user),
 ):
-    """Listado de oficinas"""
+    """Listado de oficinas, desde la instantanea del catalogo"""
     if "OFICINAS" not in current_user.permissions or current_user.permissions["OFICINAS"] < Permiso.VER:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Forbidden")
-    try:
-        listado = get_oficinas(
-            db=db,
-            distrito_id=distrito_id,
-        )
-    except IndexError as error:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Not found: {str(error)}") from error
-    except ValueError as error:
-        raise HTTPException(status_code=status.HTTP_406_NOT_ACCEPTABLE, detail=f"Not acceptable: {str(error)}") from error
-    return paginate(listado)
+
+    def construir(db: Session):
+        try:
+            listado = get_oficinas(
+                db=db,
+                distrito_id=distrito_id,
+            )
+        except IndexError as error:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Not found: {str(error)}") from error
+        except ValueError as error:
+            raise HTTPException(status_code=status.HTTP_406_NOT_ACCEPTABLE, detail=f"Not acceptable: {str(error)}") from error
+        return paginate(listado)
+
+    return catalogo_oficinas.responder(request, construir)
 
 
 @oficinas_v2.get("/{oficina_id}", response_model=OficinaOut)
-async def detalle_oficina(
+def detalle_oficina(
     oficina_id: int,
-    current_user: CitClienteInDB = Depends(get_current_active_user),
-    db: Session = Depends(get_db),
+    current_user: CitClienteSesion = Depends(get_current_active_user),
+    db: Session = Depends(get_db_replica),
 ):
     """Detalle de una oficina a partir de su id"""
     if "OFICINAS" not in current_user.permissions or current_user.permissions["OFICINAS"] < Permiso.VER:
@@ -55,3 +64,24 @@ async def detalle_oficina(
     except ValueError as error:
         raise HTTPException(status_code=status.HTTP_406_NOT_ACCEPTABLE, detail=f"Not acceptable: {str(error)}") from error
     return OficinaOut.from_orm(oficina)
+
+
+@oficinas_v2_asincrono.get("/", response_model=LimitOffsetPage[OficinaOut])
+async def listado_oficinas_asincrono(
+    distrito_id: int = None,
+    current_user: CitClienteSesion = Depends(get_current_active_user_async),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Listado de oficinas"""
+    if "OFICINAS" not in current_user.permissions or current_user.permissions["OFICINAS"] < Permiso.VER:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Forbidden")
+    try:
+        listado = await get_oficinas_async(
+            db=db,
+            distrito_id=distrito_id,
+        )
+    except IndexError as error:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Not found: {str(error)}") from error
+    except ValueError as error:
+        raise HTTPException(status_code=status.HTTP_406_NOT_ACCEPTABLE, detail=f"Not acceptable: {str(error)}") from error
+    return await paginate_async(db, listado)
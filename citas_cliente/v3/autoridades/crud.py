@@ -3,7 +3,9 @@ Autoridades V3, CRUD (create, read, update, and delete)
 """
 from typing import Any
 
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, joinedload
 
 from lib.exceptions import CitasIsDeletedError, CitasNotExistsError, CitasNotValidParamError
 from lib.hashids import descifrar_id
@@ -13,8 +15,8 @@ from ...core.autoridades.models import Autoridad
 
 
 def get_autoridades(db: Session) -> Any:
-    """Consultar los autoridades activos"""
-    return db.query(Autoridad).filter_by(estatus="A").order_by(Autoridad.clave)
+    """Consultar los autoridades activos, con el distrito que entrega AutoridadOut"""
+    return db.query(Autoridad).options(joinedload(Autoridad.distrito)).filter_by(estatus="A").order_by(Autoridad.clave)
 
 
 def get_autoridad(db: Session, autoridad_id: int) -> Autoridad:
@@ -47,3 +49,22 @@ def get_autoridad_from_clave(db: Session, clave: str) -> Autoridad:
     if autoridad.estatus != "A":
         raise CitasIsDeletedError("No es activa esa autoridad, está eliminado")
     return autoridad
+
+
+async def get_autoridades_async(db: AsyncSession) -> Any:
+    """Consultar los autoridades activos, entrega la consulta para paginar de forma asincrona"""
+    return select(Autoridad).options(joinedload(Autoridad.distrito)).filter_by(estatus="A").order_by(Autoridad.clave)
+
+
+async def get_autoridad_from_clave_async(db: AsyncSession, clave: str) -> Autoridad:
+    """Consultar un autoridad por su clave, de forma asincrona"""
+    try:
+        clave = safe_clave(clave)
+    except ValueError as error:
+        raise CitasNotValidParamError("Es incorrecta la clave del autoridad") from error
+    autoridad = (await db.execute(select(Autoridad).options(joinedload(Autoridad.distrito)).filter_by(clave=clave))).scalars().first()
+    if autoridad is None:
+        raise CitasNotExistsError("No existe la autoridad")
+    if autoridad.estatus != "A":
+        raise CitasIsDeletedError("No es activa esa autoridad, está eliminado")
+    return autoridad
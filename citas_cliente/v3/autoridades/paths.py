@@ -1,35 +1,80 @@
 """
 Autoridades V3, rutas (paths)
 """
-from fastapi import APIRouter, Depends
-from fastapi_pagination.ext.sqlalchemy import paginate
+from fastapi import APIRouter, Depends, Request
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from lib.database import get_db
+from lib.catalogos import catalogos
+from lib.database import get_async_db, get_db_replica
 from lib.exceptions import CitasAnyError
+from lib.exportar import exportar, formato_query
 from lib.fastapi_pagination_custom_page import CustomPage, custom_page_success_false
+from lib.fastapi_pagination_totales import paginate, paginate_async
 
-from .crud import get_autoridades, get_autoridad_from_clave
+from .crud import get_autoridades, get_autoridades_async, get_autoridad_from_clave, get_autoridad_from_clave_async
 from .schemas import AutoridadOut, OneAutoridadOut
 
 autoridades = APIRouter(prefix="/v3/autoridades", tags=["autoridades"])
+autoridades_asincrono = APIRouter(prefix="/v3/autoridades", tags=["autoridades"])
+
+catalogo_autoridades = catalogos.crear("v3/autoridades", publico=True)
 
 
 @autoridades.get("", response_model=CustomPage[AutoridadOut])
-async def listado_autoridades(db: Session = Depends(get_db)):
-    """Listado de autoridades"""
+def listado_autoridades(request: Request):
+    """Listado de autoridades, desde la instantanea del catalogo"""
+
+    def construir(db: Session):
+        try:
+            resultados = get_autoridades(db=db)
+        except CitasAnyError as error:
+            return custom_page_success_false(error)
+        return paginate(resultados)
+
+    return catalogo_autoridades.responder(request, construir)
+
+
+@autoridades.get("/exportar")
+@autoridades_asincrono.get("/exportar", include_in_schema=False)  # Antes de /{clave} de las rutas asincronas, para que no la tape
+def exportar_autoridades(formato: str = formato_query(), db: Session = Depends(get_db_replica)):
+    """Exportar todos los autoridades como NDJSON o CSV, sin paginar"""
     try:
         resultados = get_autoridades(db=db)
     except CitasAnyError as error:
         return custom_page_success_false(error)
-    return paginate(resultados)
+    return exportar(resultados, AutoridadOut, formato, nombre="autoridades")
 
 
 @autoridades.get("/{clave}", response_model=OneAutoridadOut)
-async def detalle_autoridad(clave: str, db: Session = Depends(get_db)):
+def detalle_autoridad(clave: str, request: Request):
+    """Detalle de una autoridad a partir de su clave, desde la instantanea del catalogo"""
+
+    def construir(db: Session):
+        try:
+            autoridad = get_autoridad_from_clave(db=db, clave=clave)
+        except CitasAnyError as error:
+            return OneAutoridadOut(success=False, message=str(error))
+        return OneAutoridadOut.from_orm(autoridad)
+
+    return catalogo_autoridades.responder(request, construir)
+
+
+@autoridades_asincrono.get("", response_model=CustomPage[AutoridadOut])
+async def listado_autoridades_asincrono(db: AsyncSession = Depends(get_async_db)):
+    """Listado de autoridades"""
+    try:
+        resultados = await get_autoridades_async(db=db)
+    except CitasAnyError as error:
+        return custom_page_success_false(error)
+    return await paginate_async(db, resultados)
+
+
+@autoridades_asincrono.get("/{clave}", response_model=OneAutoridadOut)
+async def detalle_autoridad_asincrono(clave: str, db: AsyncSession = Depends(get_async_db)):
     """Detalle de una autoridad a partir de su clave"""
     try:
-        autoridad = get_autoridad_from_clave(db=db, clave=clave)
+        autoridad = await get_autoridad_from_clave_async(db=db, clave=clave)
     except CitasAnyError as error:
         return OneAutoridadOut(success=False, message=str(error))
     return OneAutoridadOut.from_orm(autoridad)
@@ -3,6 +3,8 @@ Distritos V3, CRUD (create, read, update, and delete)
 """
 from typing import Any
 
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from lib.exceptions import CitasIsDeletedError, CitasNotExistsError, CitasNotValidParamError
@@ -62,3 +64,24 @@ def get_distrito_from_nombre(db: Session, distrito_nombre: str) -> Distrito:
     if distrito.estatus != "A":
         raise CitasIsDeletedError("No es activo ese distrito, está eliminado")
     return distrito
+
+
+async def get_distritos_async(db: AsyncSession) -> Any:
+    """Consultar los distritos activos, entrega la consulta para paginar de forma asincrona"""
+    return select(Distrito).filter_by(estatus="A").order_by(Distrito.nombre)
+
+
+async def get_distrito_from_clave_async(db: AsyncSession, distrito_clave: str) -> Distrito:
+    """Consultar un distrito por su clave, de forma asincrona"""
+    try:
+        clave = safe_clave(distrito_clave)
+    except ValueError as error:
+        raise CitasNotValidParamError("No es válida la clave del distrito") from error
+    if clave == "":
+        raise CitasNotValidParamError("No es válida la clave del distrito")
+    distrito = (await db.execute(select(Distrito).filter_by(clave=clave))).scalars().first()
+    if distrito is None:
+        raise CitasNotExistsError("No existe ese distrito")
+    if distrito.estatus != "A":
+        raise CitasIsDeletedError("No es activo ese distrito, está eliminado")
+    return distrito
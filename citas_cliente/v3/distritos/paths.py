@@ -1,35 +1,64 @@
 """
 Distritos V3, rutas (paths)
 """
-from fastapi import APIRouter, Depends
-from fastapi_pagination.ext.sqlalchemy import paginate
+from fastapi import APIRouter, Depends, Request
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from lib.database import get_db
+from lib.catalogos import catalogos
+from lib.database import get_async_db, get_db_replica
 from lib.exceptions import CitasAnyError
 from lib.fastapi_pagination_custom_page import CustomPage, custom_page_success_false
+from lib.fastapi_pagination_totales import paginate, paginate_async
 
-from .crud import get_distritos, get_distrito_from_clave
+from .crud import get_distritos, get_distritos_async, get_distrito_from_clave, get_distrito_from_clave_async
 from .schemas import DistritoOut, OneDistritoOut
 
 distritos = APIRouter(prefix="/v3/distritos", tags=["distritos"])
+distritos_asincrono = APIRouter(prefix="/v3/distritos", tags=["distritos"])
+
+catalogo_distritos = catalogos.crear("v3/distritos", publico=True)
 
 
 @distritos.get("", response_model=CustomPage[DistritoOut])
-async def listado_distritos(db: Session = Depends(get_db)):
+def listado_distritos(request: Request):
+    """Listado de distritos, desde la instantanea del catalogo"""
+
+    def construir(db: Session):
+        try:
+            resultados = get_distritos(db=db)
+        except CitasAnyError as error:
+            return custom_page_success_false(error)
+        return paginate(resultados)
+
+    return catalogo_distritos.responder(request, construir)
+
+
+@distritos.get("/{distrito_clave}", response_model=OneDistritoOut)
+def detalle_distrito(distrito_clave: str, db: Session = Depends(get_db_replica)):
+    """Detalle de un distrito a partir de su id"""
+    try:
+        distrito = get_distrito_from_clave(db=db, distrito_clave=distrito_clave)
+    except CitasAnyError as error:
+        return OneDistritoOut(success=False, message=str(error))
+    return OneDistritoOut.from_orm(distrito)
+
+
+@distritos_asincrono.get("", response_model=CustomPage[DistritoOut])
+async def listado_distritos_asincrono(db: AsyncSession = Depends(get_async_db)):
     """Listado de distritos"""
     try:
-        resultados = get_distritos(db=db)
+        resultados = await get_distritos_async(db=db)
     except CitasAnyError as error:
         return custom_page_success_false(error)
-    return paginate(resultados)
+    return await paginate_async(db, resultados)
 
 
-@distritos.get("/{distrito_clave}", response_model=OneDistritoOut)
-async def detalle_distrito(distrito_clave: str, db: Session = Depends(get_db)):
+@distritos_asincrono.get("/{distrito_clave}", response_model=OneDistritoOut)
+async def detalle_distrito_asincrono(distrito_clave: str, db: AsyncSession = Depends(get_async_db)):
     """Detalle de un distrito a partir de su id"""
     try:
-        distrito = get_distrito_from_clave(db=db, distrito_clave=distrito_clave)
+        distrito = await get_distrito_from_clave_async(db=db, distrito_clave=distrito_clave)
     except CitasAnyError as error:
         return OneDistritoOut(success=False, message=str(error))
     return OneDistritoOut.from_orm(distrito)
@@ -3,6 +3,8 @@ Municipios V3, CRUD (create, read, update, and delete)
 """
 from typing import Any
 
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from lib.exceptions import CitasIsDeletedError, CitasNotExistsError, CitasNotValidParamError
@@ -32,3 +34,21 @@ def get_municipio_from_id_hasheado(db: Session, municipio_id_hasheado: str) -> M
     if municipio_id is None:
         raise CitasNotValidParamError("El ID del municipio no es válido")
     return get_municipio(db, municipio_id)
+
+
+async def get_municipios_async(db: AsyncSession) -> Any:
+    """Consultar los municipios activos, entrega la consulta para paginar de forma asincrona"""
+    return select(Municipio).filter_by(estatus="A").order_by(Municipio.nombre)
+
+
+async def get_municipio_from_id_hasheado_async(db: AsyncSession, municipio_id_hasheado: str) -> Municipio:
+    """Consultar un municipio por su id_hasheado, de forma asincrona"""
+    municipio_id = descifrar_id(municipio_id_hasheado)
+    if municipio_id is None:
+        raise CitasNotValidParamError("El ID del municipio no es válido")
+    municipio = await db.get(Municipio, municipio_id)
+    if municipio is None:
+        raise CitasNotExistsError("No existe ese municipio")
+    if municipio.estatus != "A":
+        raise CitasIsDeletedError("No es activo ese municipio, está eliminado")
+    return municipio
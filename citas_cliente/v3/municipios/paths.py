@@ -1,35 +1,80 @@
 """
 Municipios V3, rutas (paths)
 """
-from fastapi import APIRouter, Depends
-from fastapi_pagination.ext.sqlalchemy import paginate
+from fastapi import APIRouter, Depends, Request
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from lib.database import get_db
+from lib.catalogos import catalogos
+from lib.database import get_async_db, get_db_replica
 from lib.exceptions import CitasAnyError
+from lib.exportar import exportar, formato_query
 from lib.fastapi_pagination_custom_page import CustomPage, custom_page_success_false
+from lib.fastapi_pagination_totales import paginate, paginate_async
 
-from .crud import get_municipios, get_municipio_from_id_hasheado
+from .crud import get_municipios, get_municipios_async, get_municipio_from_id_hasheado, get_municipio_from_id_hasheado_async
 from .schemas import MunicipioOut, OneMunicipioOut
 
 municipios = APIRouter(prefix="/v3/municipios", tags=["municipios"])
+municipios_asincrono = APIRouter(prefix="/v3/municipios", tags=["municipios"])
+
+catalogo_municipios = catalogos.crear("v3/municipios", publico=True)
 
 
 @municipios.get("", response_model=CustomPage[MunicipioOut])
-async def listado_municipios(db: Session = Depends(get_db)):
-    """Listado de municipios"""
+def listado_municipios(request: Request):
+    """Listado de municipios, desde la instantanea del catalogo"""
+
+    def construir(db: Session):
+        try:
+            resultados = get_municipios(db=db)
+        except CitasAnyError as error:
+            return custom_page_success_false(error)
+        return paginate(resultados)
+
+    return catalogo_municipios.responder(request, construir)
+
+
+@municipios.get("/exportar")
+@municipios_asincrono.get("/exportar", include_in_schema=False)  # Antes de /{municipio_id_hasheado} de las rutas asincronas, para que no la tape
+def exportar_municipios(formato: str = formato_query(), db: Session = Depends(get_db_replica)):
+    """Exportar todos los municipios como NDJSON o CSV, sin paginar"""
     try:
         resultados = get_municipios(db=db)
     except CitasAnyError as error:
         return custom_page_success_false(error)
-    return paginate(resultados)
+    return exportar(resultados, MunicipioOut, formato, nombre="municipios")
 
 
 @municipios.get("/{municipio_id_hasheado}", response_model=OneMunicipioOut)
-async def detalle_municipio(municipio_id_hasheado: str, db: Session = Depends(get_db)):
+def detalle_municipio(municipio_id_hasheado: str, request: Request):
+    """Detalle de un municipio a partir de su id, desde la instantanea del catalogo"""
+
+    def construir(db: Session):
+        try:
+            municipio = get_municipio_from_id_hasheado(db=db, municipio_id_hasheado=municipio_id_hasheado)
+        except CitasAnyError as error:
+            return OneMunicipioOut(success=False, message=str(error))
+        return OneMunicipioOut.from_orm(municipio)
+
+    return catalogo_municipios.responder(request, construir)
+
+
+@municipios_asincrono.get("", response_model=CustomPage[MunicipioOut])
+async def listado_municipios_asincrono(db: AsyncSession = Depends(get_async_db)):
+    """Listado de municipios"""
+    try:
+        resultados = await get_municipios_async(db=db)
+    except CitasAnyError as error:
+        return custom_page_success_false(error)
+    return await paginate_async(db, resultados)
+
+
+@municipios_asincrono.get("/{municipio_id_hasheado}", response_model=OneMunicipioOut)
+async def detalle_municipio_asincrono(municipio_id_hasheado: str, db: AsyncSession = Depends(get_async_db)):
     """Detalle de un municipio a partir de su id"""
     try:
-        municipio = get_municipio_from_id_hasheado(db=db, municipio_id_hasheado=municipio_id_hasheado)
+        municipio = await get_municipio_from_id_hasheado_async(db=db, municipio_id_hasheado=municipio_id_hasheado)
     except CitasAnyError as error:
         return OneMunicipioOut(success=False, message=str(error))
     return OneMunicipioOut.from_orm(municipio)
@@ -14,7 +14,7 @@ pag_pagos = APIRouter(prefix="/v3/pag_pagos", tags=["pagos"])
 
 
 @pag_pagos.post("/carro", response_model=OnePagCarroOut)
-async def carro(datos: PagCarroIn, db: Session = Depends(get_db)):
+def carro(datos: PagCarroIn, db: Session = Depends(get_db)):
     """Recibir, procesar y entregar datos del carro de pagos"""
     try:
         pag_carro_out = create_payment(
@@ -27,7 +27,7 @@ async def carro(datos: PagCarroIn, db: Session = Depends(get_db)):
 
 
 @pag_pagos.post("/resultado", response_model=OnePagResultadoOut)
-async def resultado(datos: PagResultadoIn, db: Session = Depends(get_db)):
+def resultado(datos: PagResultadoIn, db: Session = Depends(get_db)):
     """Recibir, procesar y entregar datos del resultado de pagos"""
     try:
         pag_resultado_out = update_payment(
@@ -40,7 +40,7 @@ async def resultado(datos: PagResultadoIn, db: Session = Depends(get_db)):
 
 
 @pag_pagos.get("/{pag_pago_id_hasheado}", response_model=OnePagPagoOut)
-async def detalle_pag_pago(pag_pago_id_hasheado: str, db: Session = Depends(get_db)):
+def detalle_pag_pago(pag_pago_id_hasheado: str, db: Session = Depends(get_db)):
     """Detalle de un pago a partir de su id hasheado"""
     try:
         pag_pago = get_pag_pago_from_id_hasheado(
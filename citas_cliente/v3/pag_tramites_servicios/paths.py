@@ -1,32 +1,39 @@
 """
 Pagos Tramites y Servicios V3, rutas (paths)
 """
-from fastapi import APIRouter, Depends
-from fastapi_pagination.ext.sqlalchemy import paginate
+from fastapi import APIRouter, Depends, Request
 from sqlalchemy.orm import Session
 
-from lib.database import get_db
+from lib.catalogos import catalogos
+from lib.database import get_db_replica
 from lib.exceptions import CitasAnyError
 from lib.fastapi_pagination_custom_page import CustomPage, custom_page_success_false
+from lib.fastapi_pagination_totales import paginate
 
 from .crud import get_pag_tramites_servicios, get_pag_tramite_servicio_from_clave
 from .schemas import PagTramiteServicioOut, OnePagTramiteServicioOut
 
 pag_tramites_servicios = APIRouter(prefix="/v3/pag_tramites_servicios", tags=["pagos"])
 
+catalogo_pag_tramites_servicios = catalogos.crear("v3/pag_tramites_servicios", publico=True)
+
 
 @pag_tramites_servicios.get("", response_model=CustomPage[PagTramiteServicioOut])
-async def listado_pag_tramites_servicios(db: Session = Depends(get_db)):
-    """Listado de tramites y servicios"""
-    try:
-        resultados = get_pag_tramites_servicios(db=db)
-    except CitasAnyError as error:
-        return custom_page_success_false(error)
-    return paginate(resultados)
+def listado_pag_tramites_servicios(request: Request):
+    """Listado de tramites y servicios, desde la instantanea del catalogo"""
+
+    def construir(db: Session):
+        try:
+            resultados = get_pag_tramites_servicios(db=db)
+        except CitasAnyError as error:
+            return custom_page_success_false(error)
+        return paginate(resultados)
+
+    return catalogo_pag_tramites_servicios.responder(request, construir)
 
 
 @pag_tramites_servicios.get("/{clave}", response_model=OnePagTramiteServicioOut)
-async def detalle_pag_tramite_servicio(clave: str, db: Session = Depends(get_db)):
+def detalle_pag_tramite_servicio(clave: str, db: Session = Depends(get_db_replica)):
     """Detalle de un tramite y servicio a partir de su clave"""
     try:
         pag_tramite_servicio = get_pag_tramite_servicio_from_clave(
@@ -20,7 +20,7 @@ ppa_solicitudes = APIRouter(prefix="/v3/ppa_solicitudes", tags=["pago de pension
 
 
 @ppa_solicitudes.post("/solicitar", response_model=OnePpaSolicitudOut)
-async def solicitar(
+def solicitar(
     datos: PpaSolicitudIn,
     db: Session = Depends(get_db),
 ):
@@ -33,7 +33,7 @@ async def solicitar(
 
 
 @ppa_solicitudes.post("/subir/identificacion_oficial", response_model=OnePpaSolicitudOut)
-async def subir_identificacion_oficial(
+def subir_identificacion_oficial(
     id_hasheado: str,
     archivo: UploadFile = File(...),
     db: Session = Depends(get_db),
@@ -51,7 +51,7 @@ async def subir_identificacion_oficial(
 
 
 @ppa_solicitudes.post("/subir/comprobante_domicilio", response_model=OnePpaSolicitudOut)
-async def subir_comprobante_domicilio(
+def subir_comprobante_domicilio(
     id_hasheado: str,
     archivo: UploadFile = File(...),
     db: Session = Depends(get_db),
@@ -69,7 +69,7 @@ async def subir_comprobante_domicilio(
 
 
 @ppa_solicitudes.post("/subir/autorizacion", response_model=OnePpaSolicitudOut)
-async def subir_autorizacion(
+def subir_autorizacion(
     id_hasheado: str,
     archivo: UploadFile = File(...),
     db: Session = Depends(get_db),
@@ -87,7 +87,7 @@ async def subir_autorizacion(
 
 
 @ppa_solicitudes.get("/{ppa_solicitud_id_hasheado}", response_model=OnePpaSolicitudOut)
-async def detalle_ppa_solicitud(
+def detalle_ppa_solicitud(
     ppa_solicitud_id_hasheado: str,
     db: Session = Depends(get_db),
 ):
@@ -1,32 +1,39 @@
 """
 Tres de Tres - Partidos V3, rutas (paths)
 """
-from fastapi import APIRouter, Depends
-from fastapi_pagination.ext.sqlalchemy import paginate
+from fastapi import APIRouter, Depends, Request
 from sqlalchemy.orm import Session
 
-from lib.database import get_db
+from lib.catalogos import catalogos
+from lib.database import get_db_replica
 from lib.exceptions import CitasAnyError
 from lib.fastapi_pagination_custom_page import CustomPage, custom_page_success_false
+from lib.fastapi_pagination_totales import paginate
 
 from .crud import get_tdt_partidos, get_tdt_partido_from_siglas
 from .schemas import TdtPartidoOut, OneTdtPartidoOut
 
 tdt_partidos = APIRouter(prefix="/v3/tdt_partidos", tags=["tres de tres"])
 
+catalogo_tdt_partidos = catalogos.crear("v3/tdt_partidos", publico=True)
+
 
 @tdt_partidos.get("", response_model=CustomPage[TdtPartidoOut])
-async def listado_tdt_partidos(db: Session = Depends(get_db)):
-    """Listado de partidos"""
-    try:
-        resultados = get_tdt_partidos(db=db)
-    except CitasAnyError as error:
-        return custom_page_success_false(error)
-    return paginate(resultados)
+def listado_tdt_partidos(request: Request):
+    """Listado de partidos, desde la instantanea del catalogo"""
+
+    def construir(db: Session):
+        try:
+            resultados = get_tdt_partidos(db=db)
+        except CitasAnyError as error:
+            return custom_page_success_false(error)
+        return paginate(resultados)
+
+    return catalogo_tdt_partidos.responder(request, construir)
 
 
 @tdt_partidos.get("/{tdt_partido_siglas}", response_model=OneTdtPartidoOut)
-async def detalle_tdt_partido(tdt_partido_siglas: str, db: Session = Depends(get_db)):
+def detalle_tdt_partido(tdt_partido_siglas: str, db: Session = Depends(get_db_replica)):
     """Detalle de un partido a partir de sus siglas"""
     try:
         tdt_partido = get_tdt_partido_from_siglas(db=db, siglas=tdt_partido_siglas)
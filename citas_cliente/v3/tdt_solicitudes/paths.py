@@ -20,7 +20,7 @@ tdt_solicitudes = APIRouter(prefix="/v3/tdt_solicitudes", tags=["tres de tres"])
 
 
 @tdt_solicitudes.post("/solicitar", response_model=OneTdtSolicitudOut)
-async def solicitar(datos: TdtSolicitudIn, db: Session = Depends(get_db)):
+def solicitar(datos: TdtSolicitudIn, db: Session = Depends(get_db)):
     """Recibir, crear y entregar la solicitud de tres de tres"""
     try:
         tdt_solicitud_out = create_tdt_solicitud(
@@ -33,7 +33,7 @@ async def solicitar(datos: TdtSolicitudIn, db: Session = Depends(get_db)):
 
 
 @tdt_solicitudes.post("/subir/identificacion_oficial", response_model=OneTdtSolicitudOut)
-async def subir_identificacion_oficial(
+def subir_identificacion_oficial(
     id_hasheado: str,
     archivo: UploadFile = File(...),
     db: Session = Depends(get_db),
@@ -51,7 +51,7 @@ async def subir_identificacion_oficial(
 
 
 @tdt_solicitudes.post("/subir/comprobante_domicilio", response_model=OneTdtSolicitudOut)
-async def subir_comprobante_domicilio(
+def subir_comprobante_domicilio(
     id_hasheado: str,
     archivo: UploadFile = File(...),
     db: Session = Depends(get_db),
@@ -69,7 +69,7 @@ async def subir_comprobante_domicilio(
 
 
 @tdt_solicitudes.post("/subir/autorizacion", response_model=OneTdtSolicitudOut)
-async def subir_autorizacion(
+def subir_autorizacion(
     id_hasheado: str,
     archivo: UploadFile = File(...),
     db: Session = Depends(get_db),
@@ -87,7 +87,7 @@ async def subir_autorizacion(
 
 
 @tdt_solicitudes.get("/{tdt_solicitud_id_hasheado}", response_model=OneTdtSolicitudOut)
-async def detalle_tdt_solicitud(tdt_solicitud_id_hasheado: str, db: Session = Depends(get_db)):
+def detalle_tdt_solicitud(tdt_solicitud_id_hasheado: str, db: Session = Depends(get_db)):
     """Detalle de una solicitud a partir de su id hasheado"""
     try:
         tdt_solicitud = get_tdt_solicitud_from_id_hasheado(
@@ -13,6 +13,35 @@ DB_USER = os.environ.get("DB_USER", "nouser")
 
 # Google Cloud SQL a Minerva con PostgreSQL
 SQLALCHEMY_DATABASE_URI = f"postgresql+psycopg2://{DB_USER}:{DB_PASS}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+SQLALCHEMY_ASYNC_DATABASE_URI = f"postgresql+asyncpg://{DB_USER}:{DB_PASS}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+
+# Replica de solo lectura, opcional, para los catalogos, la disponibilidad y las citas del cliente
+# Si su retraso rebasa DB_REPLICA_RETRASO_MAXIMO segundos se consulta la base de datos principal
+DB_REPLICA_HOST = os.environ.get("DB_REPLICA_HOST", "")
+DB_REPLICA_RETRASO_MAXIMO = float(os.environ.get("DB_REPLICA_RETRASO_MAXIMO", "5"))
+if DB_REPLICA_HOST:
+    SQLALCHEMY_REPLICA_DATABASE_URI = f"postgresql+psycopg2://{DB_USER}:{DB_PASS}@{DB_REPLICA_HOST}:{DB_PORT}/{DB_NAME}"
+else:
+    SQLALCHEMY_REPLICA_DATABASE_URI = ""
+
+# Pool de conexiones por proceso para psycopg2, la replica tiene otro pool igual pero en su servidor
+# A la base de datos principal cada proceso abre hasta DB_POOL_SIZE + DB_POOL_MAX_OVERFLOW, mas
+# DB_ASINCRONA_POOL_SIZE + DB_ASINCRONA_POOL_MAX_OVERFLOW si hay rutas asincronas; por los procesos de gunicorn no debe rebasar max_connections
+# DB_POOL_RECYCLE son los segundos tras los que se reemplaza una conexion y DB_POOL_PRE_PING prueba cada conexion antes de usarla
+DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", "5"))
+DB_POOL_MAX_OVERFLOW = int(os.environ.get("DB_POOL_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = int(os.environ.get("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.environ.get("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.environ.get("DB_POOL_PRE_PING", "1") == "1"
+
+# Rutas que consultan la base de datos de forma asincrona con asyncpg, separadas por comas, por ejemplo v3/autoridades,v2/cit_citas
+# Las demas siguen con psycopg2 en los hilos, asi se migra poco a poco
+DB_ASINCRONA_RUTAS = [ruta.strip() for ruta in os.environ.get("DB_ASINCRONA_RUTAS", "").split(",") if ruta.strip() != ""]
+
+# Pool de conexiones por proceso para asyncpg, aparte del de psycopg2; en el ciclo de eventos cada conexion
+# se ocupa solo mientras se espera la consulta, asi que basta uno mas chico
+DB_ASINCRONA_POOL_SIZE = int(os.environ.get("DB_ASINCRONA_POOL_SIZE", "2"))
+DB_ASINCRONA_POOL_MAX_OVERFLOW = int(os.environ.get("DB_ASINCRONA_POOL_MAX_OVERFLOW", "3"))
 
 # Always in False
 SQLALCHEMY_TRACK_MODIFICATIONS = False
@@ -22,6 +51,38 @@ SECRET_KEY = os.environ.get("SECRET_KEY")  # openssl rand -hex 32
 ALGORITHM = os.environ.get("ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.environ.get("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
 
+# Segundos que se guarda el cliente autentificado por token, en la memoria del proceso y opcionalmente en Redis
+# Solo guarda el id, el e-mail, los permisos y si esta inactivo; al desactivar un cliente o cambiar sus permisos
+# el sistema administrativo debe borrar en Redis la llave cit_clientes_principal:<email> y publicar el e-mail
+# en el canal cache:cit_clientes_principal, para que cada proceso lo borre de su memoria
+PRINCIPAL_CACHE_TTL = int(os.environ.get("PRINCIPAL_CACHE_TTL", "60"))
+PRINCIPAL_CACHE_REDIS = os.environ.get("PRINCIPAL_CACHE_REDIS", "1") == "1"
+
+# Token autocontenido, lleva el id, los permisos y la renovacion del cliente para autorizar sin consultar la base de datos
+# El sistema administrativo puede revocar los tokens de un cliente guardando en Redis cit_clientes_revocados:<email> con la hora actual (epoch en segundos, puede llevar fraccion)
+# Mientras Redis no responda se autoriza consultando el cliente en la base de datos, como sin token autocontenido,
+# y las revocaciones que no se pudieron escribir quedan pendientes en el proceso hasta que Redis vuelva a responder
+TOKEN_AUTOCONTENIDO = os.environ.get("TOKEN_AUTOCONTENIDO", "0") == "1"
+
+# Cantidad de contrasenas que se cifran o verifican al mismo tiempo en cada proceso
+CONTRASENAS_HILOS = int(os.environ.get("CONTRASENAS_HILOS", "2"))
+
+# Rondas de pbkdf2_sha256, al ingresar se cifran de nuevo las contrasenas con menos rondas, mida con tests/contrasenas_benchmark.py
+CONTRASENAS_PBKDF2_RONDAS = int(os.environ.get("CONTRASENAS_PBKDF2_RONDAS", "29000"))
+
+# Hilos por proceso para las rutas sincronas, que son todas las que consultan la base de datos
+# Por defecto es el pool de conexiones de SQLAlchemy (DB_POOL_SIZE + DB_POOL_MAX_OVERFLOW), si lo rebasa los hilos de mas
+# esperan una conexion hasta DB_POOL_TIMEOUT y la peticion falla; mida con tests/carga_benchmark.py
+RUTAS_HILOS = int(os.environ.get("RUTAS_HILOS", str(DB_POOL_SIZE + DB_POOL_MAX_OVERFLOW)))
+
+# Contar las sentencias SQL de cada peticion, 1 para entregarlas en los encabezados X-Consultas-SQL y X-Consultas-SQL-Ms
+# Ademas se avisa en la bitacora cuando una misma sentencia se repite CONSULTAS_SQL_REPETIDAS veces, 0 para no avisar
+CONSULTAS_SQL_ENCABEZADOS = os.environ.get("CONSULTAS_SQL_ENCABEZADOS", "0") == "1"
+CONSULTAS_SQL_REPETIDAS = int(os.environ.get("CONSULTAS_SQL_REPETIDAS", "0"))
+
+# Token para consultar las metricas internas en /metricas con el encabezado X-Metricas-Token, si esta vacio no se pueden consultar
+METRICAS_TOKEN = os.environ.get("METRICAS_TOKEN", "")
+
 # CORS or "Cross-Origin Resource Sharing" refers to the situations when a frontend
 # running in a browser has JavaScript code that communicates with a backend,
 # and the backend is in a different "origin" than the frontend.
@@ -40,8 +101,24 @@ LIMITE_CITAS_PENDIENTES = int(os.environ.get("LIMITE_CITAS_PENDIENTES", "0"))
 
 # Redis
 REDIS_URL = os.environ.get("REDIS_URL", "redis://127.0.0.1")
+REDIS_TIMEOUT = float(os.environ.get("REDIS_TIMEOUT", "2"))
 TASK_QUEUE = os.environ.get("TASK_QUEUE", "pjecz_citas_v2")
 
+# Segundos que se guardan en el cache las horas disponibles, cubre los cambios hechos desde el sistema administrativo
+CIT_HORAS_DISPONIBLES_CACHE_TTL = int(os.environ.get("CIT_HORAS_DISPONIBLES_CACHE_TTL", "300"))
+
+# Segundos entre recargas de los dias inhabiles, tambien se recargan con un aviso en el canal cit_dias_inhabiles de Redis
+CIT_DIAS_INHABILES_REFRESCAR_SEGUNDOS = int(os.environ.get("CIT_DIAS_INHABILES_REFRESCAR_SEGUNDOS", "3600"))
+
+# Segundos entre reconstrucciones de las instantaneas de los catalogos, tambien se reconstruyen con un aviso en el canal catalogos de Redis
+CATALOGOS_REFRESCAR_SEGUNDOS = int(os.environ.get("CATALOGOS_REFRESCAR_SEGUNDOS", "600"))
+
+# Segundos que los clientes pueden usar un catalogo sin volver a preguntar, en Cache-Control max-age
+CATALOGOS_MAX_AGE = int(os.environ.get("CATALOGOS_MAX_AGE", "60"))
+
+# 1 para guardar tambien los catalogos comprimidos con gzip, y con br si esta instalado Brotli
+CATALOGOS_COMPRIMIR = os.environ.get("CATALOGOS_COMPRIMIR", "1") == "1"
+
 # Salt sirve para cifrar el ID con HashID, debe ser igual en Admin
 SALT = os.environ.get("SALT", "Esta es una muy mala cadena aleatoria")
 
@@ -0,0 +1,25 @@
+#!/usr/bin/env python3
+"""
+Crear los indices compuestos y parciales de las citas que no existan
+
+Se crean con CREATE INDEX CONCURRENTLY para no bloquear la tabla cit_citas mientras se agendan citas.
+"""
+import sys
+
+from citas_cliente import app  # pylint: disable=unused-import  # Registra todos los modelos
+from citas_cliente.core.cit_citas.models import CitCita
+from lib.database import engine
+
+
+def main():
+    """Main"""
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conexion:
+        for indice in CitCita.__table_args__:
+            indice.dialect_options["postgresql"]["concurrently"] = True
+            indice.create(bind=conexion, checkfirst=True)
+            print(f"Existe el indice {indice.name}")
+
+
+if __name__ == "__main__":
+    main()
+    sys.exit(0)
@@ -0,0 +1,251 @@
+"""
+Cache en Redis con respaldo local en memoria
+"""
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any
+
+from redis.exceptions import RedisError, WatchError
+
+from lib.redis import redis
+
+REDIS_REINTENTAR_SEGUNDOS = 30
+INVALIDAR_INTENTOS = 3
+GENERACION_SEGUNDOS = 86400  # Las generaciones duran mas que cualquier calculo, si vencen un guardado pendiente se rechaza
+
+
+class Cache:
+    """Cache de valores JSON por grupo y campo, cada grupo es un hash en Redis que se puede invalidar completo
+
+    Si Redis no esta disponible se usa el respaldo local en memoria del proceso y se vuelve
+    a intentar con Redis despues de REDIS_REINTENTAR_SEGUNDOS.
+
+    Con local_primero se consulta primero la memoria del proceso y despues Redis. Cada invalidacion se publica
+    en el canal cache:<prefijo> y los procesos suscritos la borran de su memoria; mientras Redis no responda
+    una invalidacion hecha en otro proceso tarda hasta ttl segundos en verse. Con usar_redis en falso solo se usa la memoria.
+
+    Cada grupo tiene una generacion que aumenta al invalidarlo. Quien calcula un valor consulta la generacion
+    antes de calcular y la entrega al guardar; si el grupo se invalido mientras tanto el valor no se guarda.
+    """
+
+    def __init__(self, prefijo: str, ttl: int, maximo: int = 1024, local_primero: bool = False, usar_redis: bool = True):
+        self.prefijo = prefijo
+        self.ttl = ttl
+        self.maximo = maximo
+        self.local_primero = local_primero
+        self.usar_redis = usar_redis
+        self._local = OrderedDict()
+        self._local_generacion = 0
+        self._pendientes = set()
+        self._candado = threading.Lock()
+        self._redis_reintentar = 0.0
+        self._candado_suscripcion = threading.Lock()
+        self._hilo = None
+        self._suscribir_despues = 0.0
+
+    @property
+    def canal(self) -> str:
+        """Canal de Redis donde se publican las invalidaciones"""
+        return f"cache:{self.prefijo}"
+
+    def _llave(self, grupo: str) -> str:
+        """Llave en Redis del grupo"""
+        return f"{self.prefijo}:{grupo}"
+
+    def _llave_generacion(self, grupo: str) -> str:
+        """Llave en Redis de la generacion del grupo"""
+        return f"{self.prefijo}:generacion:{grupo}"
+
+    def _redis_disponible(self) -> bool:
+        """Se usa Redis y no ha fallado recientemente"""
+        return self.usar_redis and time.monotonic() >= self._redis_reintentar
+
+    def _redis_fallo(self):
+        """Dejar de usar Redis por un tiempo"""
+        self._redis_reintentar = time.monotonic() + REDIS_REINTENTAR_SEGUNDOS
+
+    def _local_invalidar(self, grupo: str):
+        """Borrar el grupo del respaldo local, los valores que se esten calculando en este proceso ya no se guardan"""
+        with self._candado:
+            self._local.pop(grupo, None)
+            self._local_generacion += 1
+
+    def _recibir(self, mensaje: dict):
+        """Borrar de la memoria el grupo que invalido otro proceso"""
+        grupo = mensaje["data"]
+        self._local_invalidar(grupo.decode() if isinstance(grupo, bytes) else str(grupo))
+
+    def _suscripcion_fallo(self, error, pubsub, hilo):
+        """Detener el hilo de la suscripcion, se vuelve a intentar despues"""
+        hilo.stop()
+        pubsub.close()
+        self._suscribir_despues = time.monotonic() + REDIS_REINTENTAR_SEGUNDOS
+
+    def _suscribir(self):
+        """Suscribirse al canal de invalidaciones, solo hace falta si se consulta primero la memoria"""
+        if not (self.local_primero and self.usar_redis) or (self._hilo is not None and self._hilo.is_alive()):
+            return
+        if time.monotonic() < self._suscribir_despues or not self._candado_suscripcion.acquire(blocking=False):
+            return
+        try:
+            pubsub = redis.pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(**{self.canal: self._recibir})
+            self._hilo = pubsub.run_in_thread(sleep_time=1, daemon=True, exception_handler=self._suscripcion_fallo)
+        except RedisError:
+            self._suscribir_despues = time.monotonic() + REDIS_REINTENTAR_SEGUNDOS
+        else:
+            # Mientras no hubo suscripcion se pudo perder una invalidacion
+            with self._candado:
+                self._local.clear()
+                self._local_generacion += 1
+        finally:
+            self._candado_suscripcion.release()
+
+    def _redis_invalidar(self, grupo: str) -> bool:
+        """Aumentar la generacion, borrar el grupo y publicar la invalidacion en una sola transaccion de Redis"""
+        try:
+            tuberia = redis.pipeline()
+            tuberia.incr(self._llave_generacion(grupo))
+            tuberia.expire(self._llave_generacion(grupo), GENERACION_SEGUNDOS)
+            tuberia.delete(self._llave(grupo))
+            tuberia.publish(self.canal, grupo)
+            tuberia.execute()
+        except RedisError:
+            return False
+        return True
+
+    def _redis_pendientes(self) -> bool:
+        """Hacer en Redis las invalidaciones que fallaron, entrega falso si todavia quedan pendientes"""
+        with self._candado:
+            pendientes = list(self._pendientes)
+        for grupo in pendientes:
+            if not self._redis_invalidar(grupo):
+                self._redis_fallo()
+                return False
+            with self._candado:
+                self._pendientes.discard(grupo)
+        return True
+
+    def _local_obtener(self, grupo: str, campo: str) -> Any:
+        """Obtener del respaldo local, None si no existe o ya expiro"""
+        with self._candado:
+            campos = self._local.get(grupo)
+            if campos is None or campo not in campos:
+                return None
+            expira, valor = campos[campo]
+            if expira <= time.time():
+                del campos[campo]
+                return None
+            self._local.move_to_end(grupo)
+            return valor
+
+    def _local_guardar(self, grupo: str, campo: str, valor: str, expira: float, generacion: int = None):
+        """Guardar en el respaldo local, descartando los grupos menos usados al llegar al maximo"""
+        with self._candado:
+            if generacion is not None and generacion != self._local_generacion:
+                return
+            self._local.setdefault(grupo, {})[campo] = (expira, valor)
+            self._local.move_to_end(grupo)
+            while len(self._local) > self.maximo:
+                self._local.popitem(last=False)
+
+    def obtener_local(self, grupo: str, campo: str) -> Any:
+        """Obtener solo de la memoria del proceso, sin consultar Redis, se puede usar en el ciclo de eventos
+
+        Entrega None si no se configuro local_primero, porque entonces la memoria solo es el respaldo cuando falla Redis.
+        """
+        if not self.local_primero:
+            return None
+        contenido = self._local_obtener(grupo, str(campo))
+        return json.loads(contenido) if contenido is not None else None
+
+    def obtener(self, grupo: str, campo: str) -> Any:
+        """Obtener un valor, entrega None si no esta en el cache"""
+        campo = str(campo)
+        self._suscribir()
+
+        # Consultar primero el respaldo local, si asi se configuro
+        if self.local_primero:
+            contenido = self._local_obtener(grupo, campo)
+            if contenido is not None:
+                return json.loads(contenido)
+
+        # Consultar Redis, antes hacer las invalidaciones pendientes para no leer lo que ya se invalido
+        if self._redis_disponible() and self._redis_pendientes():
+            try:
+                guardado = redis.hget(self._llave(grupo), campo)
+            except RedisError:
+                self._redis_fallo()
+            else:
+                if guardado is None:
+                    return None
+                expira, contenido = json.loads(guardado)
+                if expira <= time.time():
+                    return None
+                if self.local_primero:
+                    self._local_guardar(grupo, campo, contenido, expira)
+                return json.loads(contenido)
+
+        # Sin Redis, consultar el respaldo local
+        if not self.local_primero:
+            contenido = self._local_obtener(grupo, campo)
+            if contenido is not None:
+                return json.loads(contenido)
+        return None
+
+    def generacion(self, grupo: str) -> tuple:
+        """Consultar la generacion del grupo, se hace antes de calcular el valor que se va a guardar"""
+        with self._candado:
+            local = self._local_generacion
+        if self._redis_disponible() and self._redis_pendientes():
+            try:
+                return local, int(redis.get(self._llave_generacion(grupo)) or 0)
+            except RedisError:
+                self._redis_fallo()
+        return local, None
+
+    def guardar(self, grupo: str, campo: str, valor: Any, generacion: tuple = None):
+        """Guardar un valor que se pueda convertir a JSON, con la generacion no se guarda si el grupo se invalido despues de consultarla"""
+        campo = str(campo)
+        contenido = json.dumps(valor)
+        expira = time.time() + self.ttl
+        local, remota = generacion if generacion is not None else (None, None)
+
+        # Guardar en Redis, el hash expira con el ultimo campo guardado
+        # Sin la generacion de Redis no se puede saber si el grupo se invalido, solo se guarda en la memoria
+        if (generacion is None or remota is not None) and self._redis_disponible() and self._redis_pendientes():
+            try:
+                with redis.pipeline() as tuberia:
+                    if remota is not None:
+                        tuberia.watch(self._llave_generacion(grupo))
+                        if int(tuberia.get(self._llave_generacion(grupo)) or 0) != remota:
+                            return
+                        tuberia.multi()
+                    tuberia.hset(self._llave(grupo), campo, json.dumps([expira, contenido]))
+                    tuberia.expire(self._llave(grupo), self.ttl)
+                    tuberia.execute()
+            except WatchError:
+                return
+            except RedisError:
+                self._redis_fallo()
+
+        # Guardar en el respaldo local
+        self._local_guardar(grupo, campo, contenido, expira, local)
+
+    def invalidar(self, grupo: str):
+        """Invalidar todos los campos de un grupo
+
+        En Redis se intenta aunque haya fallado recientemente; si no responde queda pendiente,
+        mientras tanto este proceso no lee de Redis y se hace antes de volver a usarlo.
+        """
+        self._local_invalidar(grupo)
+        if not self.usar_redis:
+            return
+        for _ in range(INVALIDAR_INTENTOS):
+            if self._redis_invalidar(grupo):
+                return
+        with self._candado:
+            self._pendientes.add(grupo)
+        self._redis_fallo()
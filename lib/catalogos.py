@@ -0,0 +1,266 @@
+"""
+Catalogos, instantaneas inmutables en la memoria del proceso de los listados que cambian poco
+
+Cada respuesta de un catalogo se construye una sola vez y se guarda como los bytes del JSON con su ETag,
+que es el hash del contenido, asi que todos los procesos entregan el mismo ETag para los mismos datos.
+Se vuelve a construir cuando pasan CATALOGOS_REFRESCAR_SEGUNDOS o cuando llega al canal catalogos de Redis
+un mensaje con el nombre del catalogo, o con * para todos. Una peticion con If-None-Match igual al ETag
+vigente recibe 304 sin abrir una sesion de la base de datos.
+
+Con CATALOGOS_COMPRIMIR tambien se guardan las variantes ya comprimidas con gzip y, si esta instalado el
+paquete Brotli, con br; cada peticion recibe los bytes de la variante que acepta con su Content-Length,
+sin volver a validar con Pydantic, convertir a JSON ni comprimir.
+"""
+import gzip
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from redis.exceptions import RedisError
+from sqlalchemy.orm import Session
+
+from config.settings import CATALOGOS_COMPRIMIR, CATALOGOS_MAX_AGE, CATALOGOS_REFRESCAR_SEGUNDOS
+from lib.database import sesion_lectura
+from lib.redis import redis
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+CANAL = "catalogos"
+REDIS_REINTENTAR_SEGUNDOS = 30
+TODOS = "*"
+COMPRIMIR_MINIMO = 500  # Bytes, las respuestas mas chicas no ganan nada al comprimirse
+IDENTIDAD = "identity"
+
+
+@dataclass(frozen=True)
+class Variante:
+    """Bytes de una respuesta con una codificacion y sus encabezados ya calculados"""
+
+    contenido: bytes
+    etag: str
+    encabezados: Dict[str, str]
+
+    def coincide(self, if_none_match: Optional[str]) -> bool:
+        """El encabezado If-None-Match incluye el ETag de esta variante, la comparacion es debil como lo pide el RFC 9110
+
+        Solo se compara con la variante elegida, el ETag de otra codificacion no valida esta representacion.
+        """
+        if not if_none_match:
+            return False
+        for candidato in if_none_match.split(","):
+            candidato = candidato.strip()
+            if candidato == "*" or candidato.removeprefix("W/") == self.etag:
+                return True
+        return False
+
+
+@dataclass(frozen=True)
+class Instantanea:
+    """Respuesta ya convertida a JSON de un catalogo en cada codificacion, con la version con que se construyo y cuando vence"""
+
+    variantes: Dict[str, Variante]
+    version: int
+    vence: float
+
+    def elegir(self, accept_encoding: Optional[str]) -> Variante:
+        """La variante que acepta el cliente, primero br, luego gzip y si no la identidad"""
+        aceptadas = codificaciones_aceptadas(accept_encoding)
+        for codificacion in ("br", "gzip"):
+            if codificacion in aceptadas and codificacion in self.variantes:
+                return self.variantes[codificacion]
+        return self.variantes[IDENTIDAD]
+
+
+def codificaciones_aceptadas(accept_encoding: Optional[str]) -> set:
+    """Las codificaciones del encabezado Accept-Encoding, sin las que tienen q=0"""
+    aceptadas = set()
+    for parte in (accept_encoding or "").split(","):
+        nombre, _, parametros = parte.partition(";")
+        parametros = parametros.replace(" ", "")
+        if parametros.startswith("q=") and parametros[2:].strip("0.") == "":
+            continue
+        aceptadas.add(nombre.strip().lower())
+    return aceptadas
+
+
+def comprimir(contenido: bytes) -> Dict[str, bytes]:
+    """El contenido en cada codificacion, se comprime una sola vez por instantanea asi que se usa el nivel maximo"""
+    codificaciones = {IDENTIDAD: contenido}
+    if CATALOGOS_COMPRIMIR and len(contenido) >= COMPRIMIR_MINIMO:
+        codificaciones["gzip"] = gzip.compress(contenido, compresslevel=9, mtime=0)
+        if brotli is not None:
+            codificaciones["br"] = brotli.compress(contenido, quality=11)
+    return codificaciones
+
+
+class Catalogo:
+    """Instantaneas de un catalogo, una por cada ruta y parametros consultados, las menos usadas se descartan al llegar al maximo"""
+
+    def __init__(self, nombre: str, publico: bool, sesion: Callable = sesion_lectura, maximo: int = 256):
+        self.nombre = nombre
+        self.publico = publico
+        self.sesion = contextmanager(sesion)
+        self.maximo = maximo
+        self._instantaneas = OrderedDict()
+        self._version = 0
+        self._candado = threading.Lock()
+        self.encabezados = {
+            "Cache-Control": f"{'public' if publico else 'private'}, max-age={CATALOGOS_MAX_AGE}",
+            "Vary": "Accept-Encoding" if publico else "Accept-Encoding, Authorization",
+        }
+
+    @property
+    def version(self) -> int:
+        """Se incrementa con cada aviso, las instantaneas de versiones anteriores ya no se entregan"""
+        return self._version
+
+    def invalidar(self):
+        """Forzar que se vuelvan a construir todas las instantaneas en la siguiente consulta"""
+        self._version += 1
+
+    @staticmethod
+    def _clave(request: Request) -> str:
+        """La ruta con los parametros ordenados, para que el orden en que llegan no duplique instantaneas"""
+        return f"{request.url.path}?{'&'.join(f'{llave}={valor}' for llave, valor in sorted(request.query_params.multi_items()))}"
+
+    def _vigente(self, clave: str) -> Optional[Instantanea]:
+        """La instantanea guardada si es de la version actual y no ha vencido"""
+        with self._candado:
+            instantanea = self._instantaneas.get(clave)
+            if instantanea is None:
+                return None
+            if instantanea.version != self._version or time.monotonic() >= instantanea.vence:
+                del self._instantaneas[clave]
+                return None
+            self._instantaneas.move_to_end(clave)
+            return instantanea
+
+    def _guardar(self, clave: str, instantanea: Instantanea):
+        """Guardar la instantanea, si llego un aviso mientras se construia se entrega pero no se guarda"""
+        with self._candado:
+            if instantanea.version != self._version:
+                return
+            self._instantaneas[clave] = instantanea
+            self._instantaneas.move_to_end(clave)
+            while len(self._instantaneas) > self.maximo:
+                self._instantaneas.popitem(last=False)
+
+    def _construir(self, construir: Callable[[Session], Any]) -> Any:
+        """Construir la respuesta con una sesion propia, entrega la instantanea o el resultado si no tuvo exito"""
+        version = self._version
+        with self.sesion() as db:
+            resultado = construir(db)
+        # Las respuestas con success en falso no se guardan
+        if getattr(resultado, "success", True) is False:
+            return resultado
+        contenido = json.dumps(jsonable_encoder(resultado), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        huella = hashlib.sha256(contenido).hexdigest()[:32]
+        variantes = {}
+        for codificacion, comprimido in comprimir(contenido).items():
+            # Cada codificacion es otra representacion, asi que lleva su propio ETag fuerte
+            etag = f'"{huella}"' if codificacion == IDENTIDAD else f'"{huella}-{codificacion}"'
+            encabezados = {**self.encabezados, "ETag": etag, "Content-Length": str(len(comprimido))}
+            if codificacion != IDENTIDAD:
+                encabezados["Content-Encoding"] = codificacion
+            variantes[codificacion] = Variante(contenido=comprimido, etag=etag, encabezados=encabezados)
+        return Instantanea(
+            variantes=variantes,
+            version=version,
+            vence=time.monotonic() + CATALOGOS_REFRESCAR_SEGUNDOS,
+        )
+
+    def responder(self, request: Request, construir: Callable[[Session], Any]) -> Any:
+        """Responder con la instantanea vigente o con 304 si el cliente ya la tiene, construir recibe la sesion y entrega la respuesta"""
+        clave = self._clave(request)
+        instantanea = self._vigente(clave)
+        if instantanea is None:
+            instantanea = self._construir(construir)
+            if not isinstance(instantanea, Instantanea):
+                return instantanea
+            self._guardar(clave, instantanea)
+        variante = instantanea.elegir(request.headers.get("accept-encoding"))
+        if variante.coincide(request.headers.get("if-none-match")):
+            return Response(status_code=304, headers={**self.encabezados, "ETag": variante.etag})
+        return Response(variante.contenido, media_type="application/json", headers=variante.encabezados)
+
+
+class Catalogos:
+    """Los catalogos del proceso, con una sola suscripcion al canal de avisos en un hilo en el fondo
+
+    La suscripcion la mantiene otro hilo que se inicia al arrancar el proceso, asi las peticiones nunca
+    esperan a conectarse con Redis; si no responde se vuelve a intentar cada REDIS_REINTENTAR_SEGUNDOS.
+    """
+
+    def __init__(self):
+        self._catalogos = {}
+        self._candado_suscripcion = threading.Lock()
+        self._hilo = None
+        self._suscribir_despues = 0.0
+        self._vigilante = None
+
+    def crear(self, nombre: str, publico: bool, sesion: Callable = sesion_lectura) -> Catalogo:
+        """Crear y registrar un catalogo, las rutas publicas se pueden guardar en caches compartidos"""
+        catalogo = Catalogo(nombre, publico=publico, sesion=sesion)
+        self._catalogos[nombre] = catalogo
+        return catalogo
+
+    def invalidar(self, nombre: str = TODOS):
+        """Invalidar un catalogo por su nombre, o todos con *"""
+        for catalogo in self._catalogos.values():
+            if nombre in (TODOS, catalogo.nombre):
+                catalogo.invalidar()
+
+    def _recibir(self, mensaje: dict):
+        """Invalidar el catalogo que nombra el mensaje"""
+        nombre = mensaje["data"]
+        self.invalidar(nombre.decode() if isinstance(nombre, bytes) else str(nombre))
+
+    def _suscripcion_fallo(self, error, pubsub, hilo):
+        """Detener el hilo de la suscripcion, se vuelve a intentar despues"""
+        hilo.stop()
+        pubsub.close()
+        self._suscribir_despues = time.monotonic() + REDIS_REINTENTAR_SEGUNDOS
+
+    def suscribir(self):
+        """Suscribirse al canal de avisos, si no lo esta ya"""
+        if self._hilo is not None and self._hilo.is_alive():
+            return
+        if time.monotonic() < self._suscribir_despues or not self._candado_suscripcion.acquire(blocking=False):
+            return
+        try:
+            pubsub = redis.pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(**{CANAL: self._recibir})
+            self._hilo = pubsub.run_in_thread(sleep_time=1, daemon=True, exception_handler=self._suscripcion_fallo)
+        except RedisError:
+            self._suscribir_despues = time.monotonic() + REDIS_REINTENTAR_SEGUNDOS
+        else:
+            # Mientras no hubo suscripcion se pudo perder un aviso
+            self.invalidar()
+        finally:
+            self._candado_suscripcion.release()
+
+    def _vigilar(self):
+        """Suscribirse y volver a hacerlo cuando se pierda la suscripcion, suscribir respeta la espera tras una falla"""
+        while True:
+            self.suscribir()
+            time.sleep(max(self._suscribir_despues - time.monotonic(), 1))
+
+    def iniciar(self):
+        """Iniciar el hilo que mantiene la suscripcion, se llama al arrancar el proceso"""
+        if self._vigilante is not None and self._vigilante.is_alive():
+            return
+        self._vigilante = threading.Thread(target=self._vigilar, name="catalogos-suscripcion", daemon=True)
+        self._vigilante.start()
+
+
+catalogos = Catalogos()
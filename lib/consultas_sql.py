@@ -0,0 +1,90 @@
+"""
+Consultas SQL, cuenta las sentencias y su tiempo por peticion con los eventos de SQLAlchemy
+
+Los eventos se registran para todos los engines (principal, replica y el sincrono detras del asincrono).
+El contador de la peticion vive en una variable de contexto, que se copia a los hilos donde se ejecutan
+las rutas sincronas, asi que todas las sentencias de la peticion suman al mismo contador.
+"""
+import logging
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+bitacora = logging.getLogger(__name__)
+
+
+class ContadorSQL:
+    """Sentencias ejecutadas, sus milisegundos y cuantas veces se repitio cada una"""
+
+    def __init__(self):
+        self.consultas = 0
+        self.segundos = 0.0
+        self.sentencias = Counter()
+
+    @property
+    def milisegundos(self) -> float:
+        """Tiempo total de las sentencias en milisegundos"""
+        return round(self.segundos * 1000, 3)
+
+    def repetidas(self, minimo: int) -> list:
+        """Sentencias que se ejecutaron al menos minimo veces, las de un N+1, de la mas repetida a la menos"""
+        return [(sentencia, veces) for sentencia, veces in self.sentencias.most_common() if veces >= minimo]
+
+
+contador_sql: ContextVar[Optional[ContadorSQL]] = ContextVar("contador_sql", default=None)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _antes_de_ejecutar(conn, cursor, statement, parameters, context, executemany):
+    """Guardar el inicio de la sentencia en la conexion"""
+    if contador_sql.get() is not None:
+        conn.info.setdefault("consultas_sql_inicios", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _despues_de_ejecutar(conn, cursor, statement, parameters, context, executemany):
+    """Sumar la sentencia y su tiempo al contador de la peticion"""
+    contador = contador_sql.get()
+    if contador is None or not conn.info.get("consultas_sql_inicios"):
+        return
+    contador.consultas += 1
+    contador.segundos += time.perf_counter() - conn.info["consultas_sql_inicios"].pop()
+    contador.sentencias[statement] += 1
+
+
+@contextmanager
+def contar_consultas():
+    """Contar las sentencias ejecutadas dentro del bloque, entrega el contador"""
+    contador = ContadorSQL()
+    token = contador_sql.set(contador)
+    try:
+        yield contador
+    finally:
+        contador_sql.reset(token)
+
+
+@contextmanager
+def maximo_consultas(maximo: int):
+    """Para las pruebas, provocar AssertionError si dentro del bloque se ejecutan mas de maximo sentencias"""
+    with contar_consultas() as contador:
+        yield contador
+    repetidas = "".join(f"\n{veces} x {sentencia}" for sentencia, veces in contador.repetidas(2))
+    assert contador.consultas <= maximo, f"Se ejecutaron {contador.consultas} sentencias, el maximo es {maximo}{repetidas}"
+
+
+def avisar_repetidas(contador: ContadorSQL, ruta: str, minimo: int):
+    """Escribir en la bitacora las sentencias que se repitieron al menos minimo veces en la peticion"""
+    for sentencia, veces in contador.repetidas(minimo):
+        bitacora.warning("Posible N+1 en %s: %s veces %s", ruta, veces, " ".join(sentencia.split())[:200])
+
+
+def afirmar_maximo_consultas(respuesta, maximo: int):
+    """Para las pruebas contra la API arrancada con CONSULTAS_SQL_ENCABEZADOS=1, provocar AssertionError si la respuesta rebasa maximo sentencias"""
+    assert "X-Consultas-SQL" in respuesta.headers, "La API no entrega X-Consultas-SQL, arranquela con CONSULTAS_SQL_ENCABEZADOS=1"
+    consultas = int(respuesta.headers["X-Consultas-SQL"])
+    assert consultas <= maximo, f"{respuesta.url} ejecuto {consultas} sentencias, el maximo es {maximo}"
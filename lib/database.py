@@ -1,20 +1,241 @@
 """
 Database
 """
-from sqlalchemy import create_engine
+import math
+import threading
+import time
+
+from redis.exceptions import RedisError
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import SQLAlchemyError, TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from config.settings import (
+    DB_ASINCRONA_POOL_MAX_OVERFLOW,
+    DB_ASINCRONA_POOL_SIZE,
+    DB_ASINCRONA_RUTAS,
+    DB_POOL_MAX_OVERFLOW,
+    DB_POOL_PRE_PING,
+    DB_POOL_RECYCLE,
+    DB_POOL_SIZE,
+    DB_POOL_TIMEOUT,
+    DB_REPLICA_RETRASO_MAXIMO,
+    SQLALCHEMY_ASYNC_DATABASE_URI,
+    SQLALCHEMY_DATABASE_URI,
+    SQLALCHEMY_REPLICA_DATABASE_URI,
+)
+from lib.redis import redis
+
+# Cada cuantos segundos se revisa el retraso de la replica
+REPLICA_REVISAR_SEGUNDOS = 5
+
+# Retraso de la replica en segundos, cero si ya reprodujo todo lo recibido, nulo si no es posible saberlo
+REPLICA_RETRASO_SQL = """
+SELECT CASE
+    WHEN NOT pg_is_in_recovery() OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+    ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())
+END
+"""
+
+# Tras escribir, las lecturas de la misma clave van a la principal mientras la replica pudo no tener lo escrito
+ESCRITURAS_PREFIJO = "db_escrituras"
+ESCRITURAS_SEGUNDOS = math.ceil(DB_REPLICA_RETRASO_MAXIMO + REPLICA_REVISAR_SEGUNDOS)
+
+
+class MedidorPool:
+    """Cuenta las conexiones entregadas por el pool y el tiempo que se espero por ellas"""
+
+    def __init__(self):
+        self._candado = threading.Lock()
+        self._entregadas = 0
+        self._agotadas = 0
+        self._espera_total = 0.0
+        self._espera_maxima = 0.0
+
+    def registrar(self, segundos: float, agotada: bool = False):
+        """Registrar una espera, agotada si se rebaso DB_POOL_TIMEOUT sin conseguir conexion"""
+        with self._candado:
+            if agotada:
+                self._agotadas += 1
+            else:
+                self._entregadas += 1
+            self._espera_total += segundos
+            self._espera_maxima = max(self._espera_maxima, segundos)
+
+    def estadisticas(self, pool) -> dict:
+        """Entregar las conexiones del pool en este momento y las esperas acumuladas, en milisegundos"""
+        with self._candado:
+            esperas = self._entregadas + self._agotadas
+            return {
+                "tamano": pool.size(),
+                "disponibles": pool.checkedin(),
+                "en_uso": pool.checkedout(),
+                "desbordadas": pool.overflow(),
+                "entregadas": self._entregadas,
+                "agotadas": self._agotadas,
+                "espera_promedio_ms": round(self._espera_total * 1000 / esperas, 3) if esperas else 0.0,
+                "espera_maxima_ms": round(self._espera_maxima * 1000, 3),
+            }
+
+
+class MedirEsperaMixin:
+    """Medir cuanto se espera por cada conexion del pool, el medidor es de la clase para que sobreviva a recreate()"""
+
+    medidor: MedidorPool
+
+    def _do_get(self):
+        inicio = time.perf_counter()
+        try:
+            conexion = super()._do_get()
+        except PoolTimeoutError:
+            self.medidor.registrar(time.perf_counter() - inicio, agotada=True)
+            raise
+        self.medidor.registrar(time.perf_counter() - inicio)
+        return conexion
 
-from config.settings import SQLALCHEMY_DATABASE_URI
+
+class QueuePoolMedido(MedirEsperaMixin, QueuePool):
+    """Pool de psycopg2 con medidor"""
+
+    medidor = MedidorPool()
+
+
+class QueuePoolReplicaMedido(MedirEsperaMixin, QueuePool):
+    """Pool de la replica con medidor"""
+
+    medidor = MedidorPool()
+
+
+class AsyncAdaptedQueuePoolMedido(MedirEsperaMixin, AsyncAdaptedQueuePool):
+    """Pool de asyncpg con medidor"""
+
+    medidor = MedidorPool()
+
+
+# Opciones del pool de psycopg2, iguales para la base de datos principal y la replica
+POOL_OPCIONES = {
+    "pool_size": DB_POOL_SIZE,
+    "max_overflow": DB_POOL_MAX_OVERFLOW,
+    "pool_timeout": DB_POOL_TIMEOUT,
+    "pool_recycle": DB_POOL_RECYCLE,
+    "pool_pre_ping": DB_POOL_PRE_PING,
+}
+
+# Opciones del pool de asyncpg, con su propio tamaño porque se suma a las conexiones de psycopg2 a la principal
+POOL_ASINCRONO_OPCIONES = {
+    **POOL_OPCIONES,
+    "pool_size": DB_ASINCRONA_POOL_SIZE,
+    "max_overflow": DB_ASINCRONA_POOL_MAX_OVERFLOW,
+}
 
 # SQLAlchemy
-engine = create_engine(SQLALCHEMY_DATABASE_URI)
+engine = create_engine(SQLALCHEMY_DATABASE_URI, poolclass=QueuePoolMedido, **POOL_OPCIONES)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# SQLAlchemy replica de solo lectura, solo si esta configurada
+if SQLALCHEMY_REPLICA_DATABASE_URI:
+    replica_engine = create_engine(SQLALCHEMY_REPLICA_DATABASE_URI, poolclass=QueuePoolReplicaMedido, connect_args={"connect_timeout": 2}, **POOL_OPCIONES)
+    ReplicaSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=replica_engine)
+else:
+    replica_engine = None
+    ReplicaSessionLocal = None
+
+# SQLAlchemy asincrono con asyncpg, solo se crea si hay rutas que lo usan
+if DB_ASINCRONA_RUTAS:
+    async_engine = create_async_engine(SQLALCHEMY_ASYNC_DATABASE_URI, poolclass=AsyncAdaptedQueuePoolMedido, **POOL_ASINCRONO_OPCIONES)
+    AsyncSessionLocal = sessionmaker(autoflush=False, expire_on_commit=False, bind=async_engine, class_=AsyncSession)
+else:
+    async_engine = None
+    AsyncSessionLocal = None
+
 # SQLAlchemy Base for models
 Base = declarative_base()
 
 
+class GuardiaReplica:
+    """Revisa el retraso de la replica cada REPLICA_REVISAR_SEGUNDOS en un hilo en el fondo
+
+    Las peticiones solo leen el ultimo resultado, nunca esperan la conexion a la replica. Hasta la primera
+    revision, si la replica no responde o si su retraso rebasa DB_REPLICA_RETRASO_MAXIMO no esta disponible
+    y se consulta la principal. El hilo se arranca con la primera consulta, asi cada proceso de gunicorn tiene el suyo.
+    """
+
+    def __init__(self, replica, retraso_maximo: float):
+        self.replica = replica
+        self.retraso_maximo = retraso_maximo
+        self.retraso = None
+        self._disponible = False
+        self._hilo = None
+        self._candado = threading.Lock()
+
+    def _revisar(self):
+        """Consultar el retraso en la replica"""
+        try:
+            with self.replica.connect() as conexion:
+                retraso = conexion.execute(text(REPLICA_RETRASO_SQL)).scalar()
+        except SQLAlchemyError:
+            retraso = None
+        self.retraso = None if retraso is None else float(retraso)
+        self._disponible = self.retraso is not None and self.retraso <= self.retraso_maximo
+
+    def _revisar_siempre(self):
+        """Revisar cada REPLICA_REVISAR_SEGUNDOS mientras viva el proceso"""
+        while True:
+            self._revisar()
+            time.sleep(REPLICA_REVISAR_SEGUNDOS)
+
+    def _arrancar(self):
+        """Arrancar el hilo de las revisiones, si no lo esta ya"""
+        if self._hilo is not None and self._hilo.is_alive():
+            return
+        with self._candado:
+            if self._hilo is None or not self._hilo.is_alive():
+                self._hilo = threading.Thread(target=self._revisar_siempre, name="guardia_replica", daemon=True)
+                self._hilo.start()
+
+    def disponible(self) -> bool:
+        """La replica respondio en la ultima revision y su retraso es aceptable, sin consultarla"""
+        self._arrancar()
+        return self._disponible
+
+
+replica_guardia = GuardiaReplica(replica_engine, DB_REPLICA_RETRASO_MAXIMO) if replica_engine is not None else None
+
+
+def marcar_escritura(clave: str):
+    """Marcar que la clave escribio, para que sus lecturas vayan a la principal mientras la replica se pone al corriente"""
+    if replica_guardia is None:
+        return
+    try:
+        redis.set(f"{ESCRITURAS_PREFIJO}:{clave}", 1, ex=ESCRITURAS_SEGUNDOS)
+    except RedisError:
+        pass
+
+
+def escritura_reciente(clave: str) -> bool:
+    """La clave escribio recientemente, si Redis no responde se supone que si"""
+    if clave == "":
+        return False
+    try:
+        return redis.exists(f"{ESCRITURAS_PREFIJO}:{clave}") > 0
+    except RedisError:
+        return True
+
+
+def pool_estadisticas() -> dict:
+    """Entregar las estadisticas de los pools de este proceso"""
+    estadisticas = {"sincrono": QueuePoolMedido.medidor.estadisticas(engine.pool)}
+    if replica_engine is not None:
+        estadisticas["replica"] = QueuePoolReplicaMedido.medidor.estadisticas(replica_engine.pool)
+        estadisticas["replica"].update({"disponible": replica_guardia.disponible(), "retraso": replica_guardia.retraso})
+    if async_engine is not None:
+        estadisticas["asincrono"] = AsyncAdaptedQueuePoolMedido.medidor.estadisticas(async_engine.sync_engine.pool)
+    return estadisticas
+
+
 # SQLAlchemy database session
 def get_db():
     """Dependency"""
@@ -23,3 +244,28 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+def sesion_lectura(clave: str = ""):
+    """Sesion de la replica si esta disponible y la clave no escribio recientemente, si no de la principal"""
+    if replica_guardia is not None and replica_guardia.disponible() and not escritura_reciente(clave):
+        db = ReplicaSessionLocal()
+    else:
+        db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+# SQLAlchemy read-only database session
+def get_db_replica():
+    """Dependency para las consultas que toleran el retraso de la replica, como los catalogos"""
+    yield from sesion_lectura()
+
+
+# SQLAlchemy asynchronous database session
+async def get_async_db():
+    """Dependency asincrona, para las rutas en DB_ASINCRONA_RUTAS"""
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -0,0 +1,71 @@
+"""
+Exportar, entrega un listado completo como NDJSON o CSV en una respuesta por partes
+
+La consulta se recorre con un cursor del lado del servidor (yield_per), cada renglon se convierte al esquema
+y se escribe de inmediato, asi que la memoria no crece con la cantidad de renglones. Las rutas son sincronas,
+Starlette recorre el generador en un hilo y la sesion se cierra hasta que termina la respuesta.
+"""
+import csv
+import io
+from typing import Any, Iterator, Optional, Type
+
+from fastapi import Query
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from sqlalchemy.orm import Query as OrmQuery
+
+FORMATOS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",  # Starlette agrega charset=utf-8
+}
+FORMATOS_REGEX = f"^({'|'.join(FORMATOS)})$"
+LOTE = 1000  # Renglones que trae el cursor en cada viaje a la base de datos, y que se escriben en cada parte
+
+
+def formato_query() -> Any:
+    """Parametro formato para las rutas que exportan"""
+    return Query("ndjson", regex=FORMATOS_REGEX, description="Formato, NDJSON (un JSON por renglon) o CSV")
+
+
+def recorrer(consulta: OrmQuery, esquema: Type[BaseModel]) -> Iterator[BaseModel]:
+    """Recorrer la consulta por lotes con un cursor del lado del servidor, entrega cada renglon en el esquema"""
+    for item in consulta.yield_per(LOTE):
+        yield esquema.from_orm(item)
+
+
+def generar_ndjson(consulta: OrmQuery, esquema: Type[BaseModel]) -> Iterator[str]:
+    """Un JSON por renglon, escritos por lotes"""
+    lineas = []
+    for renglon in recorrer(consulta, esquema):
+        lineas.append(renglon.json())
+        if len(lineas) == LOTE:
+            yield "\n".join(lineas) + "\n"
+            lineas = []
+    if lineas:
+        yield "\n".join(lineas) + "\n"
+
+
+def generar_csv(consulta: OrmQuery, esquema: Type[BaseModel]) -> Iterator[str]:
+    """El encabezado con los campos del esquema y un renglon por registro, escritos por lotes"""
+    campos = list(esquema.__fields__)
+    salida = io.StringIO()
+    escritor = csv.writer(salida)
+    escritor.writerow(campos)
+    cantidad = 0
+    for renglon in recorrer(consulta, esquema):
+        escritor.writerow(renglon.dict().values())
+        cantidad += 1
+        if cantidad % LOTE == 0:
+            yield salida.getvalue()
+            salida.seek(0)
+            salida.truncate()
+    yield salida.getvalue()
+
+
+def exportar(consulta: OrmQuery, esquema: Type[BaseModel], formato: str, nombre: Optional[str] = None) -> StreamingResponse:
+    """Respuesta por partes con todos los renglones de la consulta en el formato, nombre es el del archivo a descargar"""
+    generador = generar_csv if formato == "csv" else generar_ndjson
+    encabezados = {}
+    if nombre is not None:
+        encabezados["Content-Disposition"] = f'attachment; filename="{nombre}.{formato}"'
+    return StreamingResponse(generador(consulta, esquema), media_type=FORMATOS[formato], headers=encabezados)
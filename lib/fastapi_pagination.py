@@ -1,11 +1,14 @@
 """
 FastAPI Pagination
 """
-from typing import TypeVar, Generic
+from typing import Generic, Optional, TypeVar
 from fastapi import Query
+from fastapi_pagination.types import GreaterEqualZero
 from fastapi_pagination.default import Page as BasePage, Params as BaseParams
 from fastapi_pagination.limit_offset import LimitOffsetPage as BaseLimitOffsetPage, LimitOffsetParams as BaseLimitOffsetParams
 
+from lib.fastapi_pagination_totales import total_query
+
 LIMIT_DEFAULT = 100
 LIMIT_MAX = 1000
 T = TypeVar("T")
@@ -16,10 +19,13 @@ class LimitOffsetParams(BaseLimitOffsetParams):
 
     limit: int = Query(LIMIT_DEFAULT, ge=1, le=LIMIT_MAX, description="Page size limit")
     offset: int = Query(0, ge=0, description="Page offset")
+    total: Optional[str] = total_query()
 
 
 class LimitOffsetPage(BaseLimitOffsetPage[T], Generic[T]):
-    """Definir nuevos parametros por defecto"""
+    """Definir nuevos parametros por defecto, el total puede omitirse"""
+
+    total: Optional[GreaterEqualZero]
 
     __params_type__ = LimitOffsetParams
 
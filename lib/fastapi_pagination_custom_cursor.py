@@ -0,0 +1,79 @@
+"""
+FastAPI Pagination Custom Cursor Page
+
+Paginacion por llave (keyset) con sqlakeyset, en lugar de LIMIT/OFFSET. La consulta debe ordenarse
+por columnas que juntas no se repitan, como id, clave o (inicio, id). Cada pagina entrega el cursor opaco
+de la siguiente y de la anterior, asi PostgreSQL no recorre ni descarta las filas de las paginas previas.
+"""
+from typing import Any, Generic, List, Optional, Sequence, TypeVar
+
+from fastapi import Query
+from fastapi_pagination.bases import AbstractPage, AbstractParams
+from fastapi_pagination.cursor import CursorParams as BaseCursorParams, encode_cursor
+from fastapi_pagination.ext.sqlalchemy_future import exec_pagination
+from fastapi_pagination.utils import verify_params
+from pydantic.generics import GenericModel
+from sqlalchemy.orm import Session
+
+from lib.fastapi_pagination_totales import contar_total, definir_total, sentencia_de, total_query
+
+T = TypeVar("T")
+
+
+class CursorParams(BaseCursorParams):
+    """Modificar size por defecto y agregar total"""
+
+    cursor: Optional[str] = Query(None, description="Cursor de la pagina")
+    size: int = Query(100, ge=1, le=1000, description="Page size")
+    total: Optional[str] = total_query()
+
+
+class CursorPageResult(GenericModel, Generic[T]):
+    """Resultado que contiene items, total, size y los cursores de la siguiente y la anterior pagina"""
+
+    total: Optional[int]
+    items: List[T]
+    size: int
+    next_page: Optional[str]
+    previous_page: Optional[str]
+
+
+class CustomCursorPage(AbstractPage[T], Generic[T]):
+    """Pagina por cursor personalizada con success y message"""
+
+    success: bool = True
+    message: str = "Success"
+    result: CursorPageResult[T]
+
+    __params_type__ = CursorParams
+
+    @classmethod
+    def create(cls, items: Sequence[T], params: AbstractParams, *, next_: Any = None, previous: Any = None, total: Optional[int] = None, **kwargs: Any):
+        """Create"""
+
+        if not isinstance(params, cls.__params_type__):
+            raise TypeError(f"Params must be {cls.__params_type__}")
+
+        return cls(
+            result=CursorPageResult(
+                total=total,
+                items=items,
+                size=params.size,
+                next_page=encode_cursor(next_),
+                previous_page=encode_cursor(previous),
+            )
+        )
+
+
+def paginate_cursor(db: Session, consulta: Any, params: Optional[AbstractParams] = None, *, total: str = "omitir") -> CustomCursorPage:
+    """Paginar por cursor una consulta del ORM o una sentencia select, por defecto sin total"""
+    params, _ = verify_params(params, "cursor")
+    total = contar_total(db, consulta, definir_total(params, total))
+    return exec_pagination(sentencia_de(consulta), params, db.execute, additional_data={"total": total})
+
+
+def custom_cursor_page_success_false(error: Exception) -> CustomCursorPage:
+    """Crear pagina por cursor personalizada sin items, con success en falso y message con el error"""
+
+    result = CursorPageResult(total=0, items=[], size=0, next_page=None, previous_page=None)
+    return CustomCursorPage(success=False, message=str(error), result=result)
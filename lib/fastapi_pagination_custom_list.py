@@ -1,13 +1,15 @@
 """
 FastAPI Pagination Custom List
 """
-from typing import Generic, List, Sequence, TypeVar
+from typing import Any, Generic, List, Optional, Sequence, TypeVar
 
 from fastapi import Query
 from fastapi_pagination.bases import AbstractPage, AbstractParams
 from fastapi_pagination.default import Params as BaseParams
 from pydantic.generics import GenericModel
 
+from lib.fastapi_pagination_totales import total_query
+
 T = TypeVar("T")
 
 
@@ -15,12 +17,13 @@ class ListParams(BaseParams):
     """Modificar size por defecto"""
 
     size: int = Query(100, ge=1, le=10000, description="Page size")
+    total: Optional[str] = total_query()
 
 
 class ListResult(GenericModel, Generic[T]):
     """Resultado que contiene items, total y size"""
 
-    total: int
+    total: Optional[int]
     items: List[T]
     size: int
 
@@ -35,7 +38,7 @@ class CustomList(AbstractPage[T], Generic[T]):
     __params_type__ = ListParams
 
     @classmethod
-    def create(cls, items: Sequence[T], total: int, params: AbstractParams):
+    def create(cls, items: Sequence[T], params: AbstractParams, *, total: Optional[int] = None, **kwargs: Any):
         """Create"""
 
         if not isinstance(params, cls.__params_type__):
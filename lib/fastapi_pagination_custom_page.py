@@ -1,13 +1,15 @@
 """
 FastAPI Pagination Custom Page
 """
-from typing import Generic, List, Sequence, TypeVar
+from typing import Any, Generic, List, Optional, Sequence, TypeVar
 
 from fastapi import Query
 from fastapi_pagination.bases import AbstractPage, AbstractParams
 from fastapi_pagination.limit_offset import LimitOffsetParams as BaseLimitOffsetParams
 from pydantic.generics import GenericModel
 
+from lib.fastapi_pagination_totales import total_query
+
 T = TypeVar("T")
 
 
@@ -16,12 +18,13 @@ class LimitOffsetParams(BaseLimitOffsetParams):
 
     limit: int = Query(100, ge=1, le=10000, description="Query limit")
     offset: int = Query(0, ge=0, description="Query offset")
+    total: Optional[str] = total_query()
 
 
 class PageResult(GenericModel, Generic[T]):
     """Resultado que contiene items, total, limit y offset"""
 
-    total: int
+    total: Optional[int]
     items: List[T]
     limit: int
     offset: int
@@ -37,7 +40,7 @@ class CustomPage(AbstractPage[T], Generic[T]):
     __params_type__ = LimitOffsetParams
 
     @classmethod
-    def create(cls, items: Sequence[T], total: int, params: AbstractParams):
+    def create(cls, items: Sequence[T], params: AbstractParams, *, total: Optional[int] = None, **kwargs: Any):
         """Create"""
 
         if not isinstance(params, cls.__params_type__):
@@ -0,0 +1,87 @@
+"""
+FastAPI Pagination Totales
+
+El total de un listado puede ser exacto (COUNT), estimado (las filas que estima el plan de PostgreSQL) u omitirse.
+En los listados grandes contar cuesta mas que consultar la pagina.
+
+Cada ruta puede fijar su politica con el argumento total de paginate y paginate_async, y quien consulta
+puede pedir otra con el parametro total; si ninguno lo dice el total es exacto.
+"""
+import json
+from typing import Any, Optional
+
+from fastapi import Query
+from fastapi_pagination.api import create_page
+from fastapi_pagination.bases import AbstractParams
+from fastapi_pagination.ext.sqlalchemy import count_query, paginate_query
+from fastapi_pagination.types import AdditionalData
+from fastapi_pagination.utils import verify_params
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Query as OrmQuery, Session
+
+TOTALES = ("exacto", "estimado", "omitir")
+TOTALES_REGEX = f"^({'|'.join(TOTALES)})$"
+TOTALES_DESCRIPCION = "Total exacto, estimado por el plan de la base de datos u omitido"
+
+
+def total_query(defecto: Optional[str] = None) -> Any:
+    """Parametro total para las clases de parametros de las paginas, si se omite se usa la politica de la ruta"""
+    return Query(defecto, regex=TOTALES_REGEX, description=TOTALES_DESCRIPCION)
+
+
+def sentencia_de(consulta: Any) -> Any:
+    """Entregar la sentencia select de una consulta del ORM, o la misma si ya es select"""
+    return consulta.statement if isinstance(consulta, OrmQuery) else consulta
+
+
+def estimar_total(db: Session, consulta: Any) -> int:
+    """Estimar cuantas filas entrega la consulta, con el plan de PostgreSQL y sin ejecutarla"""
+    compilada = sentencia_de(consulta).order_by(None).compile(dialect=db.get_bind().dialect)
+    parametros = tuple(compilada.params[nombre] for nombre in compilada.positiontup) if compilada.positional else compilada.params
+    plan = db.connection().exec_driver_sql(f"EXPLAIN (FORMAT JSON) {compilada}", parametros).scalar()
+    if isinstance(plan, str):  # asyncpg entrega el JSON como texto
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def contar_total(db: Session, consulta: Any, total: str) -> Optional[int]:
+    """Contar las filas de la consulta como lo pide total, None si se omite"""
+    if total == "omitir":
+        return None
+    if total == "estimado":
+        return estimar_total(db, consulta)
+    return db.execute(count_query(sentencia_de(consulta))).scalar()
+
+
+def definir_total(params: AbstractParams, total: Optional[str]) -> str:
+    """El total que pide quien consulta, si no la politica de la ruta, si no exacto"""
+    return getattr(params, "total", None) or total or "exacto"
+
+
+def paginate(
+    consulta: OrmQuery,
+    params: Optional[AbstractParams] = None,
+    *,
+    total: Optional[str] = None,
+    additional_data: AdditionalData = None,
+) -> Any:
+    """Como paginate de fastapi_pagination.ext.sqlalchemy, con el total exacto, estimado u omitido"""
+    params, _ = verify_params(params, "limit-offset")
+    cantidad = contar_total(consulta.session, consulta, definir_total(params, total))
+    items = paginate_query(consulta, params).all()
+    return create_page(items, cantidad, params, **(additional_data or {}))
+
+
+async def paginate_async(
+    db: AsyncSession,
+    sentencia: Any,
+    params: Optional[AbstractParams] = None,
+    *,
+    total: Optional[str] = None,
+    additional_data: AdditionalData = None,
+) -> Any:
+    """Como paginate de fastapi_pagination.ext.async_sqlalchemy, con el total exacto, estimado u omitido"""
+    params, _ = verify_params(params, "limit-offset")
+    cantidad = await db.run_sync(contar_total, sentencia, definir_total(params, total))
+    items = (await db.execute(paginate_query(sentencia, params))).unique().scalars().all()
+    return create_page(items, cantidad, params, **(additional_data or {}))
@@ -0,0 +1,80 @@
+"""
+Contrasenas, se cifran y verifican en un ejecutor dedicado y acotado
+
+pbkdf2_sha256 es lento a proposito, si se ejecuta en el ciclo de eventos detiene todas las peticiones
+del proceso. Las rutas que lo usan son sincronas y esperan aqui a que termine el ejecutor, asi a lo mas
+CONTRASENAS_HILOS contrasenas se calculan al mismo tiempo y las demas esperan su turno.
+Quien espera no debe tener una conexion de la base de datos, antes de cifrar o verificar se libera con rollback.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from passlib.context import CryptContext
+
+from config.settings import CONTRASENAS_HILOS, CONTRASENAS_PBKDF2_RONDAS
+
+# Contexto compartido, des_crypt es obsoleto y pbkdf2_sha256 con menos rondas de las configuradas debe cifrarse de nuevo
+pwd_context = CryptContext(
+    schemes=["pbkdf2_sha256", "des_crypt"],
+    deprecated="auto",
+    pbkdf2_sha256__default_rounds=CONTRASENAS_PBKDF2_RONDAS,
+    pbkdf2_sha256__min_rounds=CONTRASENAS_PBKDF2_RONDAS,
+)
+
+
+class EjecutorContrasenas:
+    """Ejecutor de hilos para las contrasenas que lleva la cuenta de las tareas en espera y en proceso"""
+
+    def __init__(self, hilos: int):
+        self.hilos = hilos
+        self._ejecutor = ThreadPoolExecutor(max_workers=hilos, thread_name_prefix="contrasenas")
+        self._candado = threading.Lock()
+        self._en_espera = 0
+        self._en_proceso = 0
+        self._terminadas = 0
+
+    def _ejecutar(self, funcion, *args):
+        """Ejecutar la funcion en un hilo del ejecutor, actualizando los contadores"""
+        with self._candado:
+            self._en_espera -= 1
+            self._en_proceso += 1
+        try:
+            return funcion(*args)
+        finally:
+            with self._candado:
+                self._en_proceso -= 1
+                self._terminadas += 1
+
+    def ejecutar(self, funcion, *args):
+        """Encolar la funcion y esperar su resultado"""
+        with self._candado:
+            self._en_espera += 1
+        return self._ejecutor.submit(self._ejecutar, funcion, *args).result()
+
+    def estadisticas(self) -> dict:
+        """Entregar los hilos, las tareas en espera (profundidad de la cola), en proceso y terminadas"""
+        with self._candado:
+            return {
+                "hilos": self.hilos,
+                "en_espera": self._en_espera,
+                "en_proceso": self._en_proceso,
+                "terminadas": self._terminadas,
+            }
+
+
+ejecutor_contrasenas = EjecutorContrasenas(hilos=CONTRASENAS_HILOS)
+
+
+def hash_password(password: str) -> str:
+    """Cifrar una contrasena"""
+    return ejecutor_contrasenas.ejecutar(pwd_context.hash, password)
+
+
+def verify_password(password: str, hashed_password: str) -> bool:
+    """Verificar una contrasena contra su cifrado"""
+    return ejecutor_contrasenas.ejecutar(pwd_context.verify, password, hashed_password)
+
+
+def verify_and_update_password(password: str, hashed_password: str) -> tuple:
+    """Verificar una contrasena, entrega si es valida y el nuevo cifrado si el actual debe reemplazarse o None"""
+    return ejecutor_contrasenas.ejecutar(pwd_context.verify_and_update, password, hashed_password)
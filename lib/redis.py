@@ -4,7 +4,7 @@ Redis
 from redis import Redis
 import rq
 
-from config.settings import REDIS_URL, TASK_QUEUE
+from config.settings import REDIS_TIMEOUT, REDIS_URL, TASK_QUEUE
 
-redis = Redis.from_url(REDIS_URL)
+redis = Redis.from_url(REDIS_URL, socket_connect_timeout=REDIS_TIMEOUT, socket_timeout=REDIS_TIMEOUT)
 task_queue = rq.Queue(TASK_QUEUE, connection=redis, default_timeout=1920)
@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+Reconciliar los contadores de ocupacion de las citas
+
+Crea la tabla cit_slots_ocupacion si no existe y el disparador de cit_citas que mantiene los contadores,
+luego la reconstruye contando las citas. Se ejecuta una vez al instalar, despues solo para corregir diferencias.
+"""
+import argparse
+import sys
+from datetime import date
+
+from citas_cliente import app  # pylint: disable=unused-import  # Registra todos los modelos
+from citas_cliente.core.cit_slots_ocupacion.models import CIT_SLOTS_OCUPACION_DISPARADOR, CIT_SLOTS_OCUPACION_FUNCION, CitSlotOcupacion
+from citas_cliente.v2.cit_citas_anonimas.crud import rebuild_cit_slots_ocupacion
+from lib.database import SessionLocal, engine
+
+
+def main():
+    """Main"""
+
+    # Parsear argumentos
+    parser = argparse.ArgumentParser(description="Reconciliar los contadores de ocupacion de las citas")
+    parser.add_argument("--desde", type=date.fromisoformat, default=date.today(), help="Fecha AAAA-MM-DD default hoy")
+    parser.add_argument("--oficina_id", type=int, default=None, help="ID de la oficina default todas")
+    args = parser.parse_args()
+
+    # Crear la tabla si no existe, y la funcion y el disparador que mantienen los contadores
+    CitSlotOcupacion.__table__.create(bind=engine, checkfirst=True)
+    with engine.begin() as conexion:
+        conexion.execute(CIT_SLOTS_OCUPACION_FUNCION)
+        conexion.execute(CIT_SLOTS_OCUPACION_DISPARADOR)
+
+    # Reconstruir los contadores
+    db = SessionLocal()
+    try:
+        cantidad = rebuild_cit_slots_ocupacion(db, desde=args.desde, oficina_id=args.oficina_id)
+    finally:
+        db.close()
+    print(f"Se reconstruyeron {cantidad} contadores desde {args.desde}")
+
+
+if __name__ == "__main__":
+    main()
+    sys.exit(0)
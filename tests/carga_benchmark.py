@@ -0,0 +1,64 @@
+"""
+Prueba de carga
+
+Envia peticiones concurrentes a una ruta y entrega la cantidad de peticiones por segundo y la latencia,
+para comparar el rendimiento de un proceso de gunicorn antes y despues de un cambio.
+Arranque la API con un solo proceso, por ejemplo
+
+    gunicorn -w 1 -k uvicorn.workers.UvicornWorker citas_cliente.app:app
+
+    python3 -m tests.carga_benchmark --url http://127.0.0.1:8000/v2/oficinas --concurrencias 1 8 32 64
+"""
+import argparse
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+API_TIMEOUT = 12
+
+
+def solicitar(sesion: requests.Session, url: str, encabezados: dict) -> tuple:
+    """Hacer una peticion, entrega los milisegundos y si fue exitosa"""
+    inicio = time.perf_counter()
+    try:
+        respuesta = sesion.get(url, headers=encabezados, timeout=API_TIMEOUT)
+        exitosa = respuesta.status_code == 200
+    except requests.exceptions.RequestException:
+        exitosa = False
+    return (time.perf_counter() - inicio) * 1000, exitosa
+
+
+def cargar(url: str, encabezados: dict, concurrencia: int, peticiones: int):
+    """Enviar las peticiones con la concurrencia dada e imprimir los resultados"""
+    sesiones = [requests.Session() for _ in range(concurrencia)]
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrencia) as ejecutor:
+        resultados = list(ejecutor.map(lambda n: solicitar(sesiones[n % concurrencia], url, encabezados), range(peticiones)))
+    segundos = time.perf_counter() - inicio
+    tiempos = sorted(tiempo for tiempo, _ in resultados)
+    errores = sum(1 for _, exitosa in resultados if not exitosa)
+    p95 = tiempos[int(len(tiempos) * 0.95) - 1]
+    print(f"concurrencia {concurrencia:4}   {peticiones / segundos:8.1f} peticiones/s   mediana {statistics.median(tiempos):8.2f} ms   p95 {p95:8.2f} ms   errores {errores}")
+
+
+def main():
+    """Main"""
+    parser = argparse.ArgumentParser(description="Prueba de carga")
+    parser.add_argument("--url", type=str, required=True, help="URL de la ruta a probar")
+    parser.add_argument("--token", type=str, default="", help="Token de acceso, para las rutas que lo requieren")
+    parser.add_argument("--concurrencias", type=int, nargs="+", default=[1, 8, 32], help="Peticiones al mismo tiempo")
+    parser.add_argument("--peticiones", type=int, default=500, help="Peticiones por concurrencia")
+    args = parser.parse_args()
+
+    encabezados = {}
+    if args.token:
+        encabezados["Authorization"] = f"Bearer {args.token}"
+
+    for concurrencia in args.concurrencias:
+        cargar(args.url, encabezados, concurrencia, args.peticiones)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""
+Prueba de los planes de consulta de las citas
+
+Requiere una base de datos PostgreSQL local con datos, con estadisticas (ANALYZE) y los indices creados con crear_indices.py
+"""
+from datetime import date, datetime, time
+
+from sqlalchemy import func, select
+from sqlalchemy.dialects import postgresql
+
+from citas_cliente import app  # pylint: disable=unused-import  # Registra todos los modelos
+from citas_cliente.core.cit_citas.models import CitCita
+from citas_cliente.v2.cit_citas.crud import get_cit_citas
+from lib.database import SessionLocal
+
+
+def explicar(db, sentencia) -> str:
+    """Entregar el plan que elige el planificador para la sentencia"""
+    compilada = sentencia.compile(dialect=postgresql.dialect())
+    renglones = db.connection().exec_driver_sql(f"EXPLAIN {compilada}", compilada.params).all()
+    return "\n".join(renglon[0] for renglon in renglones)
+
+
+def test_cit_citas_indices():
+    """
+    Prueba que las consultas de las citas pendientes del cliente usen el indice parcial
+    """
+    db = SessionLocal()
+    try:
+        # Tomar una cita pendiente desde hoy para tener un cliente
+        consulta = db.query(CitCita).filter_by(estatus="A").filter_by(estado="PENDIENTE")
+        cit_cita = consulta.filter(CitCita.inicio >= datetime.combine(date.today(), time())).order_by(CitCita.id.desc()).first()
+        if cit_cita is None:
+            assert False, "La base de datos no tiene citas pendientes desde hoy"
+        consulta = get_cit_citas(db, cit_cliente_id=cit_cita.cit_cliente_id)
+
+        # Citas pendientes del cliente, el listado de v2 cit_citas
+        plan = explicar(db, consulta.statement)
+        assert "Seq Scan on cit_citas" not in plan, plan
+        assert "cit_citas_cit_cliente_id_inicio_pendientes_idx" in plan, plan
+
+        # Cantidad de citas pendientes del cliente, la misma sentencia que arma get_cit_citas_disponibles_cantidad con count()
+        plan = explicar(db, select(func.count()).select_from(consulta.enable_eagerloads(False).subquery()))
+        assert "Seq Scan on cit_citas" not in plan, plan
+        assert "cit_citas_cit_cliente_id_inicio_pendientes_idx" in plan, plan
+    finally:
+        db.rollback()
+        db.close()
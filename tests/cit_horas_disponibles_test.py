@@ -0,0 +1,141 @@
+"""
+Prueba del calculo de las horas disponibles
+
+No requiere base de datos. Compara el barrido de calcular_cit_horas_disponibles con el algoritmo anterior,
+que revisaba cada intervalo contra todos los bloqueos, en fotos fijas de oficinas, servicios, bloqueos y citas.
+"""
+import random
+from datetime import date, datetime, time, timedelta
+from types import SimpleNamespace
+
+import pytest
+
+from citas_cliente.v2.cit_horas_disponibles.crud import calcular_cit_horas_disponibles
+
+FECHA = date(2026, 10, 19)
+
+
+def calcular_anterior(oficina, cit_servicio, fecha: date, cit_horas_bloqueadas: list, citas_ya_agendadas: dict) -> list:
+    """El algoritmo anterior, tal como estaba en la version que recorria todos los bloqueos en cada intervalo"""
+    apertura = oficina.apertura
+    cierre = oficina.cierre
+    if cit_servicio.desde and apertura < cit_servicio.desde:
+        apertura = cit_servicio.desde
+    if cit_servicio.hasta and cierre > cit_servicio.hasta:
+        cierre = cit_servicio.hasta
+    tiempo_inicial = datetime(fecha.year, fecha.month, fecha.day, apertura.hour, apertura.minute)
+    tiempo_final = datetime(fecha.year, fecha.month, fecha.day, cierre.hour, cierre.minute)
+    duracion = timedelta(hours=cit_servicio.duracion.hour, minutes=cit_servicio.duracion.minute)
+    tiempos_bloqueados = []
+    for cit_hora_bloqueada in cit_horas_bloqueadas:
+        inicia = datetime(fecha.year, fecha.month, fecha.day, cit_hora_bloqueada.inicio.hour, cit_hora_bloqueada.inicio.minute)
+        termina = datetime(fecha.year, fecha.month, fecha.day, cit_hora_bloqueada.termino.hour, cit_hora_bloqueada.termino.minute) - timedelta(minutes=1)
+        tiempos_bloqueados.append((inicia, termina))
+    horas_minutos_segundos_disponibles = []
+    tiempo = tiempo_inicial
+    while tiempo < tiempo_final:
+        es_hora_disponible = True
+        for tiempo_bloqueado in tiempos_bloqueados:
+            if tiempo_bloqueado[0] <= tiempo <= tiempo_bloqueado[1]:
+                es_hora_disponible = False
+                break
+        if tiempo in citas_ya_agendadas:
+            if citas_ya_agendadas[tiempo] >= oficina.limite_personas:
+                es_hora_disponible = False
+        if es_hora_disponible:
+            horas_minutos_segundos_disponibles.append(tiempo.time())
+        tiempo = tiempo + duracion
+    return horas_minutos_segundos_disponibles
+
+
+def oficina(apertura: time, cierre: time, limite_personas: int) -> SimpleNamespace:
+    """Oficina con sus horarios y limite de personas"""
+    return SimpleNamespace(apertura=apertura, cierre=cierre, limite_personas=limite_personas)
+
+
+def cit_servicio(duracion: time, desde: time = None, hasta: time = None) -> SimpleNamespace:
+    """Servicio con su duracion y opcionalmente su horario"""
+    return SimpleNamespace(duracion=duracion, desde=desde, hasta=hasta)
+
+
+def bloqueo(inicio: time, termino: time) -> SimpleNamespace:
+    """Hora bloqueada de la oficina"""
+    return SimpleNamespace(inicio=inicio, termino=termino)
+
+
+def agendadas(*tiempos: tuple, fecha: date = FECHA) -> dict:
+    """Citas ya agendadas, de (hora, minuto, cantidad) a {datetime: cantidad}"""
+    return {datetime(fecha.year, fecha.month, fecha.day, hora, minuto): cantidad for hora, minuto, cantidad in tiempos}
+
+
+FOTOS = [
+    # Sin bloqueos ni citas
+    (oficina(time(8, 0), time(14, 0), 3), cit_servicio(time(0, 15)), [], {}),
+    # Bloqueos traslapados, contiguos, al abrir, al cerrar y uno invertido que no bloquea nada
+    (
+        oficina(time(8, 0), time(16, 0), 2),
+        cit_servicio(time(0, 30)),
+        [bloqueo(time(9, 0), time(10, 0)), bloqueo(time(9, 30), time(11, 0)), bloqueo(time(11, 0), time(11, 30)), bloqueo(time(8, 0), time(8, 1)), bloqueo(time(15, 45), time(17, 0)), bloqueo(time(13, 0), time(12, 0))],
+        {},
+    ),
+    # Bloqueos que no caen en el minuto de un intervalo y bloqueos con segundos
+    (oficina(time(8, 30), time(15, 0), 1), cit_servicio(time(0, 20)), [bloqueo(time(9, 5), time(9, 10)), bloqueo(time(10, 10, 30), time(10, 50, 45))], {}),
+    # Citas en el limite, bajo el limite, fuera del horario y de otra fecha
+    (
+        oficina(time(9, 0), time(13, 0), 2),
+        cit_servicio(time(0, 15)),
+        [],
+        {**agendadas((9, 0, 2), (9, 15, 1), (10, 0, 3), (12, 59, 5), (14, 0, 2)), **agendadas((9, 30, 2), fecha=FECHA + timedelta(days=1))},
+    ),
+    # Horario del servicio dentro del de la oficina, y una duracion que no divide el horario
+    (oficina(time(8, 0), time(16, 0), 1), cit_servicio(time(0, 45), desde=time(9, 10), hasta=time(13, 0)), [bloqueo(time(10, 0), time(10, 40))], agendadas((11, 25, 1))),
+    # Horario del servicio mas amplio que el de la oficina, duracion de mas de una hora
+    (oficina(time(9, 0), time(14, 0), 4), cit_servicio(time(1, 30), desde=time(7, 0), hasta=time(18, 0)), [bloqueo(time(12, 0), time(12, 1))], agendadas((10, 30, 4))),
+    # Todo el dia bloqueado
+    (oficina(time(8, 0), time(15, 0), 3), cit_servicio(time(0, 30)), [bloqueo(time(0, 0), time(23, 59))], {}),
+]
+
+
+@pytest.mark.parametrize("foto", range(len(FOTOS)))
+def test_cit_horas_disponibles_fotos(foto):
+    """
+    Prueba que el barrido entregue lo mismo que el algoritmo anterior en las fotos fijas
+    """
+    parametros = dict(zip(("oficina", "cit_servicio", "cit_horas_bloqueadas", "citas_ya_agendadas"), FOTOS[foto]), fecha=FECHA)
+    assert calcular_cit_horas_disponibles(**parametros) == calcular_anterior(**parametros)
+
+
+def test_cit_horas_disponibles_aleatorias():
+    """
+    Prueba que el barrido entregue lo mismo que el algoritmo anterior en fotos generadas con una semilla fija
+    """
+    generador = random.Random(20261019)
+    for _ in range(500):
+        apertura = time(generador.randint(6, 10), generador.choice((0, 15, 30, 45)))
+        cierre = time(generador.randint(12, 20), generador.choice((0, 15, 30, 45)))
+        desde = time(generador.randint(6, 12), generador.choice((0, 10, 30))) if generador.random() < 0.3 else None
+        hasta = time(generador.randint(11, 20), generador.choice((0, 20, 45))) if generador.random() < 0.3 else None
+        duracion = time(generador.choice((0, 0, 0, 1)), generador.choice((5, 10, 15, 20, 30, 45)))
+        bloqueos = []
+        for _ in range(generador.randint(0, 8)):
+            inicio = time(generador.randint(6, 20), generador.randint(0, 59))
+            termino = time(min(inicio.hour + generador.randint(0, 2), 23), generador.randint(0, 59))
+            bloqueos.append(bloqueo(inicio, termino))
+        limite_personas = generador.randint(1, 4)
+        citas = agendadas(*[(generador.randint(6, 20), generador.choice((0, 5, 10, 15, 20, 30, 45)), generador.randint(1, 5)) for _ in range(generador.randint(0, 20))])
+        parametros = {
+            "oficina": oficina(apertura, cierre, limite_personas),
+            "cit_servicio": cit_servicio(duracion, desde, hasta),
+            "fecha": FECHA,
+            "cit_horas_bloqueadas": bloqueos,
+            "citas_ya_agendadas": citas,
+        }
+        assert calcular_cit_horas_disponibles(**parametros) == calcular_anterior(**parametros), parametros
+
+
+def test_cit_horas_disponibles_duracion_cero():
+    """
+    Prueba que un servicio sin duracion cause ValueError, el algoritmo anterior nunca terminaba
+    """
+    with pytest.raises(ValueError):
+        calcular_cit_horas_disponibles(oficina(time(8, 0), time(14, 0), 3), cit_servicio(time(0, 0)), FECHA, [], {})
@@ -0,0 +1,57 @@
+"""
+Prueba de la cantidad de consultas de los listados
+
+Requiere una base de datos PostgreSQL local con datos. Cada listado debe entregar una pagina completa,
+con las relaciones que leen sus esquemas, en una sola consulta; si alguien quita la carga anticipada
+de una relacion la prueba falla mostrando la sentencia que se repite por cada renglon.
+"""
+from citas_cliente import app  # pylint: disable=unused-import  # Registra todos los modelos
+from citas_cliente.core.cit_citas.models import CitCita
+from citas_cliente.v2.autoridades.crud import get_autoridades
+from citas_cliente.v2.autoridades.schemas import AutoridadOut
+from citas_cliente.v2.cit_citas.crud import get_cit_citas
+from citas_cliente.v2.cit_citas.schemas import CitCitaOut
+from citas_cliente.v2.cit_oficinas_servicios.crud import get_cit_oficinas_servicios
+from citas_cliente.v2.cit_oficinas_servicios.schemas import CitOficinaServicioOut
+from citas_cliente.v2.cit_servicios.crud import get_cit_servicios
+from citas_cliente.v2.cit_servicios.schemas import CitServicioOut
+from citas_cliente.v2.oficinas.crud import get_oficinas
+from citas_cliente.v2.oficinas.schemas import OficinaOut
+from citas_cliente.v3.autoridades.crud import get_autoridades as get_autoridades_v3
+from citas_cliente.v3.autoridades.schemas import AutoridadOut as AutoridadOutV3
+from lib.consultas_sql import maximo_consultas
+from lib.database import SessionLocal
+
+PAGINA = 100
+
+
+def serializar(consulta, esquema) -> list:
+    """Consultar una pagina y convertirla al esquema, como lo hace paginate"""
+    return [esquema.from_orm(item) for item in consulta.limit(PAGINA).all()]
+
+
+def test_consultas_listados():
+    """
+    Prueba que cada listado consulte una pagina en una sola sentencia
+    """
+    db = SessionLocal()
+    try:
+        listados = [
+            (get_autoridades(db), AutoridadOut),
+            (get_cit_oficinas_servicios(db), CitOficinaServicioOut),
+            (get_cit_servicios(db), CitServicioOut),
+            (get_oficinas(db), OficinaOut),
+            (get_autoridades_v3(db), AutoridadOutV3),
+        ]
+
+        # Las citas pendientes del cliente que tiene la cita mas reciente
+        cit_cita = db.query(CitCita).filter_by(estatus="A").filter_by(estado="PENDIENTE").order_by(CitCita.id.desc()).first()
+        if cit_cita is not None:
+            listados.append((get_cit_citas(db, cit_cliente_id=cit_cita.cit_cliente_id), CitCitaOut))
+
+        for consulta, esquema in listados:
+            db.expunge_all()  # Sin objetos en la sesion, las relaciones no se toman del mapa de identidad
+            with maximo_consultas(1):
+                serializar(consulta, esquema)
+    finally:
+        db.close()
@@ -0,0 +1,69 @@
+"""
+Micro-benchmark de las contrasenas
+
+Mide la latencia de verificar una contrasena con cada cifrado que puede tener un cliente al ingresar,
+para dimensionar CONTRASENAS_PBKDF2_RONDAS y CONTRASENAS_HILOS contra el pico de ingresos.
+
+    python3 -m tests.contrasenas_benchmark --repeticiones 50 --rondas 29000 100000 200000
+"""
+import argparse
+import hashlib
+import statistics
+import time
+
+from passlib.hash import des_crypt, pbkdf2_sha256
+
+from config.settings import CONTRASENAS_HILOS, CONTRASENAS_PBKDF2_RONDAS
+from lib.passwords import pwd_context
+
+CONTRASENA = "Perr$23Verde"
+
+
+def medir(verificar, repeticiones: int) -> list:
+    """Entregar la lista de milisegundos de cada repeticion"""
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        verificar()
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    return tiempos
+
+
+def reportar(nombre: str, tiempos: list):
+    """Imprimir la mediana, el percentil 95 y los ingresos por segundo por proceso"""
+    mediana = statistics.median(tiempos)
+    p95 = sorted(tiempos)[int(len(tiempos) * 0.95) - 1]
+    ingresos = CONTRASENAS_HILOS * 1000 / mediana
+    print(f"{nombre:32} mediana {mediana:8.2f} ms   p95 {p95:8.2f} ms   ~{ingresos:8.1f} ingresos/s por proceso")
+
+
+def main():
+    """Main"""
+    parser = argparse.ArgumentParser(description="Micro-benchmark de las contrasenas")
+    parser.add_argument("--repeticiones", type=int, default=30, help="Repeticiones por cifrado")
+    parser.add_argument("--rondas", type=int, nargs="*", default=[CONTRASENAS_PBKDF2_RONDAS], help="Rondas de pbkdf2_sha256 a medir")
+    args = parser.parse_args()
+
+    print(f"CONTRASENAS_HILOS={CONTRASENAS_HILOS} CONTRASENAS_PBKDF2_RONDAS={CONTRASENAS_PBKDF2_RONDAS}")
+
+    # pbkdf2_sha256 con cada cantidad de rondas
+    for rondas in args.rondas:
+        cifrado = pbkdf2_sha256.using(rounds=rondas).hash(CONTRASENA)
+        reportar(f"pbkdf2_sha256 {rondas} rondas", medir(lambda: pwd_context.verify(CONTRASENA, cifrado), args.repeticiones))
+
+    # des_crypt, obsoleto, al ingresar se verifica y se cifra de nuevo
+    cifrado = des_crypt.hash(CONTRASENA)
+    reportar("des_crypt + cifrar de nuevo", medir(lambda: pwd_context.verify_and_update(CONTRASENA, cifrado), args.repeticiones))
+
+    # md5 de la version uno, al ingresar se compara y se cifra de nuevo
+    cifrado = hashlib.md5(CONTRASENA.encode("utf-8")).hexdigest()
+
+    def verificar_md5():
+        if hashlib.md5(CONTRASENA.encode("utf-8")).hexdigest() == cifrado:
+            pwd_context.hash(CONTRASENA)
+
+    reportar("md5 + cifrar de nuevo", medir(verificar_md5, args.repeticiones))
+
+
+if __name__ == "__main__":
+    main()